@@ -26,6 +26,7 @@ class Tile(QtWidgets.QWidget):
 
         self.filled = False
         self.widget = None
+        self.currentPalette = None
         self.lock = None
         self.dragInProcess = False
         self.currentTileNumber = 0
@@ -39,6 +40,25 @@ class Tile(QtWidgets.QWidget):
         self.setMouseTracking(True)
         self.setLayout(self.layout)
 
+    def reset(self, fromRow, fromColumn, rowSpan, columnSpan, verticalSpan, horizontalSpan):
+        """prepares a recycled tile to be used again as an empty tile"""
+        self.originTileLayout = self.tileLayout
+        self.filled = False
+        self.widget = None
+        self.lock = None
+        self.dragInProcess = False
+        self.currentTileNumber = 0
+        self.__mouseMovePos = None
+        self.updateSize(fromRow, fromColumn, rowSpan, columnSpan, verticalSpan, horizontalSpan)
+        self.setVisible(True)
+
+    def takeWidget(self):
+        """takes the widget out of the tile, to the tile parent, so that the empty tile can be reused"""
+        widget = self.widget
+        self.__removeWidget()
+        widget.setParent(self.parentWidget())
+        return widget
+
     def updateSize(self, fromRow=None, fromColumn=None, rowSpan=None, columnSpan=None, verticalSpan=None,
                    horizontalSpan=None):
         """changes the tile size"""
@@ -78,6 +98,9 @@ class Tile(QtWidgets.QWidget):
 
     def changeColor(self, color):
         """Changes the tile background color"""
+        if color is self.currentPalette:
+            return
+        self.currentPalette = color
         self.setAutoFillBackground(True)
         self.setPalette(color)
 
@@ -250,9 +273,12 @@ class Tile(QtWidgets.QWidget):
             if self.tileLayout.focus:
                 widget.setFocus()
 
+        # the layout replaced this tile when its widget was removed, it can be reused now that the drag is over
         self.originTileLayout = self.tileLayout
-        self.setVisible(True)
         self.dragInProcess = False
+        if self.filled:
+            self.__removeWidget()
+        self.tileLayout.releaseTile(self)
 
     def __isDropPossible(self, event):
         """checks if this tile can accept the drop"""
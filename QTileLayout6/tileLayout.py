@@ -2,6 +2,7 @@ from PyQt6 import QtWidgets, QtCore, QtGui
 from PyQt6.QtCore import QRect
 from PyQt6.QtGui import QPalette
 from PyQt6.QtWidgets import QWidget
+import itertools
 import uuid
 
 from .tile import Tile
@@ -14,6 +15,8 @@ class QTileLayout(QtWidgets.QGridLayout):
 
     tileResized = QtCore.pyqtSignal(QWidget, int, int, int, int)
     tileMoved = QtCore.pyqtSignal(QWidget, str, str, int, int, int, int)
+    globalSizeSettled = QtCore.pyqtSignal(int, int)
+    tileVisibilityChanged = QtCore.pyqtSignal(QWidget, bool)
 
     def __init__(self, rowNumber, columnNumber, verticalSpan, horizontalSpan, verticalSpacing=5, horizontalSpacing=5,
                  *args, **kwargs):
@@ -35,7 +38,12 @@ class QTileLayout(QtWidgets.QGridLayout):
         self.focus = False
         self.widgetToDrop = None
         self.tileMap = []
-        self.widgetTileCouple = {'widget': [], 'tile': []}
+        self.occupancy = []
+        self.occupiedCells = 0
+        # one bit per row whose cells are all occupied, so that findFreeArea skips them
+        self.fullRows = 0
+        self.widgetToTile = {}
+        self.tileToWidget = {}
         self.id = str(uuid.uuid4())
         self.linkedLayout = {self.id: self}
 
@@ -50,6 +58,41 @@ class QTileLayout(QtWidgets.QGridLayout):
             'resize': (211, 211, 211),
             'empty_check': (150, 150, 150),
         }
+        self.paletteCache = {}
+        self.baseColor = None
+        self.highlightedTiles = set()
+        self.dirtyTiles = set()
+
+        # resize parameters: resize events are coalesced to one relayout per frame
+        self.pendingSize = None
+        self.resizeTimer = QtCore.QTimer(self)
+        self.resizeTimer.setSingleShot(True)
+        self.resizeTimer.setInterval(16)
+        self.resizeTimer.timeout.connect(self.__applyGlobalSize)
+        self.settleTimer = QtCore.QTimer(self)
+        self.settleTimer.setSingleShot(True)
+        self.settleTimer.setInterval(200)
+        self.settleTimer.timeout.connect(self.__emitGlobalSizeSettled)
+
+        # batch parameters: see beginUpdate and endUpdate
+        self.updateDepth = 0
+        self.updateWidget = None
+        self.pendingPlacement = set()
+        self.pendingRemoval = set()
+        self.pendingDeletion = []
+
+        # empty tiles removed from the grid, kept to be reused instead of creating new ones
+        self.tilePool = []
+
+        # virtualization parameters: see setVirtualized and setViewport
+        self.virtualized = False
+        self.viewport = None
+        self.viewportMargin = 1
+        # the rows and columns ranges the tiles were made for by the last __updateViewport, None to walk every cell
+        self.viewportCells = None
+        self.hiddenWidgets = set()
+        self.pendingColor = None
+        self.pendingTilesUpdate = False
 
         self.setRowStretch(self.rowNumber, 1)
         self.setColumnStretch(self.columnNumber, 1)
@@ -58,12 +101,12 @@ class QTileLayout(QtWidgets.QGridLayout):
     def addWidget(self, widget: QWidget, fromRow: int, fromColumn: int, rowSpan: int = 1, columnSpan: int = 1):
         """adds a widget in the layout: works like the addWidget method in a gridLayout"""
         if widget is not None:
-            assert widget not in self.widgetTileCouple['widget']
+            assert widget not in self.widgetToTile
             assert self.isAreaEmpty(fromRow, fromColumn, rowSpan, columnSpan)
             
-            tile = self.tileMap[fromRow][fromColumn]
-            self.widgetTileCouple['widget'].append(widget)
-            self.widgetTileCouple['tile'].append(tile)
+            tile = self.__tileAt(fromRow, fromColumn)
+            self.widgetToTile[widget] = tile
+            self.tileToWidget[tile] = widget
 
             # if the widget is on more than 1 tile, the tiles must be merged
             if rowSpan > 1 or columnSpan > 1:
@@ -76,14 +119,17 @@ class QTileLayout(QtWidgets.QGridLayout):
                 
             widget.setMouseTracking(True)
             tile.addWidget(widget)
-            
-        
+            self.dirtyTiles.add(tile)
+            self.__setAreaOccupied(fromRow, fromColumn, rowSpan, columnSpan, True)
+            self.__updateViewport()
+
     def removeWidget(self, widget: QWidget):
         """removes the given widget"""
-        assert widget in self.widgetTileCouple['widget']
+        assert widget in self.widgetToTile
 
-        index = self.widgetTileCouple['widget'].index(widget)
-        tile = self.widgetTileCouple['tile'][index]
+        tile = self.widgetToTile.pop(widget)
+        self.tileToWidget.pop(tile)
+        self.hiddenWidgets.discard(widget)
 
         fromRow = tile.getFromRow()
         fromColumn = tile.getFromColumn()
@@ -96,9 +142,12 @@ class QTileLayout(QtWidgets.QGridLayout):
         ]
 
         widget.setMouseTracking(False)
+        if not tile.dragInProcess:
+            # the widget leaves its tile (hidden, like any widget given a new parent), which goes back to the pool
+            tile.takeWidget()
         self.hardSplitTiles(fromRow, fromColumn, tilesToSplit)
-        self.widgetTileCouple['widget'].pop(index)
-        self.widgetTileCouple['tile'].pop(index)
+        self.__setAreaOccupied(fromRow, fromColumn, rowSpan, columnSpan, False)
+        self.__updateViewport(tilesToSplit)
         self.changeTilesColor('idle')
 
     def addRows(self, rowNumber: int):
@@ -108,12 +157,17 @@ class QTileLayout(QtWidgets.QGridLayout):
 
         for row in range(self.rowNumber, self.rowNumber + rowNumber):
             self.tileMap.append([])
+            self.occupancy.append(0)
             for column in range(self.columnNumber):
-                tile = self.__createTile(row, column)
+                tile = None if self.virtualized else self.__createTile(row, column)
                 self.tileMap[-1].append(tile)
 
         self.rowNumber += rowNumber
         self.setRowStretch(self.rowNumber, 1)
+        self.viewportCells = None
+        if self.virtualized:
+            self.__updateGridMinimumSize()
+            self.__updateViewport()
 
     def addColumns(self, columnNumber: int):
         """adds columns at the right of the layout"""
@@ -122,11 +176,16 @@ class QTileLayout(QtWidgets.QGridLayout):
 
         for row in range(self.rowNumber):
             for column in range(self.columnNumber, self.columnNumber + columnNumber):
-                tile = self.__createTile(row, column)
+                tile = None if self.virtualized else self.__createTile(row, column)
                 self.tileMap[row].append(tile)
 
         self.columnNumber += columnNumber
+        self.fullRows = 0
         self.setColumnStretch(self.columnNumber, 1)
+        self.viewportCells = None
+        if self.virtualized:
+            self.__updateGridMinimumSize()
+            self.__updateViewport()
 
     def removeRows(self, rowNumber: int):
         """removes rows from the layout bottom"""
@@ -134,13 +193,17 @@ class QTileLayout(QtWidgets.QGridLayout):
 
         for row in range(self.rowNumber - rowNumber, self.rowNumber):
             for column in range(self.columnNumber):
-                super().removeWidget(self.tileMap[row][column])
-                self.tileMap[row][column].deleteLater()
+                if self.tileMap[row][column] is not None:
+                    self.__deleteTile(self.tileMap[row][column])
             self.setRowMinimumHeight(row, 0)
             self.setRowStretch(row, 0)
 
         self.rowNumber -= rowNumber
+        self.viewportCells = None
         self.tileMap = self.tileMap[:self.rowNumber]
+        self.occupancy = self.occupancy[:self.rowNumber]
+        self.fullRows &= (1 << self.rowNumber) - 1
+        self.__trimPool()
 
     def removeColumns(self, columnNumber: int):
         """removes columns from the layout right"""
@@ -148,14 +211,19 @@ class QTileLayout(QtWidgets.QGridLayout):
 
         for column in range(self.columnNumber - columnNumber, self.columnNumber):
             for row in range(self.rowNumber):
-                super().removeWidget(self.tileMap[row][column])
-                self.tileMap[row][column].deleteLater()
+                if self.tileMap[row][column] is not None:
+                    self.__deleteTile(self.tileMap[row][column])
 
             self.setColumnMinimumWidth(column, 0)
             self.setColumnStretch(column, 0)
 
         self.columnNumber -= columnNumber
+        self.viewportCells = None
         self.tileMap = [row[:self.columnNumber] for row in self.tileMap]
+        # the removed columns were free, the rows may be full now
+        fullMask = (1 << self.columnNumber) - 1
+        self.fullRows = sum(1 << row for row in range(self.rowNumber) if self.occupancy[row] == fullMask)
+        self.__trimPool()
 
     def acceptDragAndDrop(self, value: bool):
         """is the user allowed to drag and drop tiles ?"""
@@ -184,19 +252,27 @@ class QTileLayout(QtWidgets.QGridLayout):
     def setColorIdle(self, color: tuple):
         """the default tile color"""
         self.colorMap['idle'] = color
+        self.__resetPalette('idle')
         self.changeTilesColor('idle')
 
     def setColorResize(self, color: tuple):
         """the tile color during resizing"""
         self.colorMap['resize'] = color
+        self.__resetPalette('resize')
 
     def setColorDragAndDrop(self, color: tuple):
         """the tile color during drag and drop"""
         self.colorMap['drag_and_drop'] = color
+        self.__resetPalette('drag_and_drop')
+
+    def setResizeSettleDelay(self, delay: int):
+        """the time in ms without resize event after which globalSizeSettled is emitted"""
+        self.settleTimer.setInterval(delay)
 
     def setColorEmptyCheck(self, color: tuple):
         """the tile color, if empty, during drag and drop"""
         self.colorMap['empty_check'] = color
+        self.__resetPalette('empty_check')
 
     def rowCount(self) -> int:
         """Returns the number of rows"""
@@ -208,6 +284,8 @@ class QTileLayout(QtWidgets.QGridLayout):
 
     def tileRect(self, row: int, column: int) -> QRect:
         """Returns the geometry of the tile at (row, column)"""
+        if self.tileMap[row][column] is None:
+            return QRect(0, 0, self.horizontalSpan, self.verticalSpan)
         return self.tileMap[row][column].rect()
 
     def rowsMinimumHeight(self) -> int:
@@ -254,6 +332,80 @@ class QTileLayout(QtWidgets.QGridLayout):
         super().setHorizontalSpacing(spacing)
         self.__updateAllTiles()
 
+    def beginUpdate(self):
+        """starts a batch of changes: grid placement, tile geometry and colors are only applied by endUpdate"""
+        if self.updateDepth == 0:
+            self.updateWidget = self.parentWidget()
+            if self.updateWidget is not None:
+                self.updateWidget.setUpdatesEnabled(False)
+        self.updateDepth += 1
+
+    def endUpdate(self):
+        """ends a batch of changes and applies the final tile map in one pass"""
+        assert self.updateDepth > 0
+        self.updateDepth -= 1
+        if self.updateDepth:
+            return
+
+        for tile in self.pendingRemoval - self.pendingPlacement:
+            super().removeWidget(tile)
+        for tile in self.pendingDeletion:
+            tile.deleteLater()
+        for tile in self.pendingPlacement:
+            super().removeWidget(tile)
+            super().addWidget(tile, tile.getFromRow(), tile.getFromColumn(), tile.getRowSpan(), tile.getColumnSpan())
+        self.pendingRemoval = set()
+        self.pendingDeletion = []
+        self.pendingPlacement = set()
+
+        if self.pendingTilesUpdate:
+            self.pendingTilesUpdate = False
+            self.__updateAllTiles()
+        colorChoice = self.pendingColor or self.baseColor or 'idle'
+        self.pendingColor = None
+        self.changeTilesColor(colorChoice)
+
+        if self.updateWidget is not None:
+            self.updateWidget.setUpdatesEnabled(True)
+            self.updateWidget = None
+
+    def releaseTile(self, tile):
+        """takes back a tile that is no longer in the grid, to reuse it later"""
+        if len(self.tilePool) < self.rowNumber * self.columnNumber:
+            tile.setVisible(False)
+            self.tilePool.append(tile)
+        else:
+            self.__disposeTile(tile)
+
+    def setVirtualized(self, virtualized: bool, margin: int = 1):
+        """only keeps tile widgets for the cells around the viewport, the other ones are plain data"""
+        self.virtualized = virtualized
+        self.viewportMargin = margin
+        self.viewportCells = None
+        if virtualized:
+            self.__updateGridMinimumSize()
+            self.__updateViewport()
+        else:
+            for row in range(self.rowNumber):
+                for column in range(self.columnNumber):
+                    self.__tileAt(row, column)
+            hiddenWidgets, self.hiddenWidgets = self.hiddenWidgets, set()
+            for widget in hiddenWidgets:
+                self.tileVisibilityChanged.emit(widget, True)
+
+    def setViewport(self, viewport: QRect):
+        """the visible part of the layout, in the coordinates of the widget holding the layout"""
+        self.viewport = QRect(viewport)
+        self.__updateViewport()
+
+    def isWidgetVisible(self, widget: QWidget) -> bool:
+        """Returns False if the widget is not in the layout or out of the viewport of a virtualized layout"""
+        return widget in self.widgetToTile and widget not in self.hiddenWidgets
+
+    def isUpdating(self) -> bool:
+        """Returns True between beginUpdate and the matching endUpdate"""
+        return self.updateDepth > 0
+
     def getId(self):
         """Returns the layout id"""
         return self.id
@@ -262,9 +414,18 @@ class QTileLayout(QtWidgets.QGridLayout):
         """Activates or not the widget focus after drag & drop or resize"""
         self.focus = focus
 
+    def hasWidget(self, widget: QWidget) -> bool:
+        """Returns True if the widget is in the layout"""
+        return widget in self.widgetToTile
+
     def widgetList(self) -> list:
         """Returns the widgets currently in the layout"""
-        return self.widgetTileCouple['widget']
+        return list(self.widgetToTile)
+
+    def widgetPosition(self, widget: QWidget) -> tuple:
+        """Returns (fromRow, fromColumn, rowSpan, columnSpan) of the given widget"""
+        tile = self.widgetToTile[widget]
+        return tile.getFromRow(), tile.getFromColumn(), tile.getRowSpan(), tile.getColumnSpan()
 
     def linkLayout(self, layout: QtWidgets.QLayout):
         """Links this layout with another one to allow drag and drop between them"""
@@ -285,7 +446,7 @@ class QTileLayout(QtWidgets.QGridLayout):
 
     def highlightTiles(self, direction, fromRow, fromColumn, tileNumber):
         """highlights tiles that will be merged during resizing"""
-        tile = self.tileMap[fromRow][fromColumn]
+        tile = self.__tileAt(fromRow, fromColumn)
         tilesToMerge, increase, fromRow, fromColumn, rowSpan, columnSpan = self.__getTilesToBeResized(
             tile, direction, fromRow, fromColumn, tileNumber
         )
@@ -295,19 +456,24 @@ class QTileLayout(QtWidgets.QGridLayout):
 
     def resizeTile(self, direction, fromRow, fromColumn, tileNumber):
         """called when a tile is resized"""
-        tile = self.tileMap[fromRow][fromColumn]
+        tile = self.__tileAt(fromRow, fromColumn)
         tilesToMerge, increase, fromRow, fromColumn, rowSpan, columnSpan = self.__getTilesToBeResized(
             tile, direction, fromRow, fromColumn, tileNumber
         )
 
         if tilesToMerge:
+            self.__setAreaOccupied(
+                tile.getFromRow(), tile.getFromColumn(), tile.getRowSpan(), tile.getColumnSpan(), False
+            )
             if increase:
                 self.__mergeTiles(tile, fromRow, fromColumn, rowSpan, columnSpan, tilesToMerge)
             else:
                 self.__splitTiles(tile, fromRow, fromColumn, rowSpan, columnSpan, tilesToMerge)
-            index = self.widgetTileCouple['tile'].index(tile)
-            widget = self.widgetTileCouple['widget'][index]
-            self.tileResized.emit(widget, fromRow, fromColumn, rowSpan, columnSpan)
+            self.__setAreaOccupied(fromRow, fromColumn, rowSpan, columnSpan, tile.isFilled())
+            self.__updateViewport(tilesToMerge)
+            widget = self.tileToWidget.get(tile)
+            if widget is not None:
+                self.tileResized.emit(widget, fromRow, fromColumn, rowSpan, columnSpan)
 
     def hardSplitTiles(self, fromRow, fromColumn, tilesToSplit):
         """splits the tiles and return the new one at (fromRow, fromColumn)"""
@@ -315,15 +481,17 @@ class QTileLayout(QtWidgets.QGridLayout):
         tilesToRecycle = set()
 
         for row, column in tilesToSplit:
-            tilesToRecycle.add(self.tileMap[row][column])
-            self.__createTile(row, column, updateTileMap=True)
+            if self.tileMap[row][column] is not None:
+                tilesToRecycle.add(self.tileMap[row][column])
 
+        # recycled first, so that the new tiles are taken from the pool
         for tile in tilesToRecycle:
-            super().removeWidget(tile)
-            tile.deleteLater()
+            self.__deleteTile(tile)
+        for row, column in tilesToSplit:
+            self.__createTile(row, column, updateTileMap=True)
 
         tile = self.tileMap[fromRow][fromColumn]
-        super().addWidget(tile, fromRow, fromColumn)
+        self.__placeTile(tile, fromRow, fromColumn)
         return tile
 
     def isAreaEmpty(self, fromRow, fromColumn, rowSpan, columnSpan, color=''):
@@ -334,12 +502,41 @@ class QTileLayout(QtWidgets.QGridLayout):
                 (fromRow < 0) or (fromColumn < 0)):
             isEmpty = False
         else:
-            isEmpty = all([not self.tileMap[fromRow + row][fromColumn + column].isFilled()
-                           for row in range(rowSpan) for column in range(columnSpan)])
+            mask = self.__columnMask(fromColumn, columnSpan)
+            isEmpty = not any(self.occupancy[fromRow + row] & mask for row in range(rowSpan))
         if isEmpty and isinstance(color, str) and color in self.colorMap.keys():
             self.changeTilesColor('empty_check', (fromRow, fromColumn), (rowSpan, columnSpan))
         return isEmpty
 
+    def findFreeArea(self, rowSpan=1, columnSpan=1):
+        """returns the first (row, column) where a rowSpan x columnSpan area is free, or None if there is none"""
+        if rowSpan > self.rowNumber or columnSpan > self.columnNumber:
+            return None
+        if self.occupiedCells + rowSpan * columnSpan > self.rowNumber * self.columnNumber:
+            return None
+
+        fullMask = (1 << self.columnNumber) - 1
+        # the rows an area can start from: none of the rowSpan rows from there is full, so a 1x1 area is found in
+        # the first row tried, the other ones skip the full rows but may try every other row
+        freeRows = ~self.fullRows & ((1 << self.rowNumber) - 1)
+        startRows = freeRows
+        for shift in range(1, rowSpan):
+            startRows &= freeRows >> shift
+        while startRows:
+            fromRow = (startRows & -startRows).bit_length() - 1
+            startRows &= startRows - 1
+            occupied = 0
+            for row in range(fromRow, fromRow + rowSpan):
+                occupied |= self.occupancy[row]
+            # a bit stays set only if the columnSpan columns starting there are all free
+            free = ~occupied & fullMask
+            for shift in range(1, columnSpan):
+                free &= ~occupied >> shift
+            free &= (1 << (self.columnNumber - columnSpan + 1)) - 1
+            if free:
+                return fromRow, (free & -free).bit_length() - 1
+        return None
+
     def getWidgetToDrop(self):
         """gets the widget that the user is dragging"""
         widget = self.widgetToDrop
@@ -351,49 +548,232 @@ class QTileLayout(QtWidgets.QGridLayout):
         self.widgetToDrop = widget
 
     def changeTilesColor(self, colorChoice, from_tile=(0, 0), to_tile=None):
-        """changes the color of all tiles"""
-        palette = QPalette()
-        palette.setBrush(QPalette.ColorRole.Window, QtGui.QColor(*self.colorMap[colorChoice]))
-        # palette.setColor(QPalette.Background, QtGui.QColor(*self.colorMap[colorChoice]))
-        palette_idle = QPalette()
-        palette_idle.setBrush(QPalette.ColorRole.Window, QtGui.QColor(*self.colorMap['idle']))
-        # palette_idle.setColor(QPalette.Background, QtGui.QColor(*self.colorMap['idle']))
+        """changes the color of the tiles, only repainting the ones whose color changed since the last call"""
+        if self.updateDepth:
+            # highlights are meaningless in the middle of a batch, the base color is applied by endUpdate
+            if to_tile is None:
+                self.pendingColor = colorChoice
+            return
+
         if to_tile is None:
-            to_tile = (self.rowNumber, self.columnNumber)
-        for row in range(from_tile[0], from_tile[0] + to_tile[0]):
-            for column in range(from_tile[1], from_tile[1] + to_tile[1]):
-                if not self.tileMap[row][column].isFilled():
-                    self.tileMap[row][column].changeColor(palette)
-                else:
-                    self.tileMap[row][column].changeColor(palette_idle)
+            if colorChoice != self.baseColor:
+                # every empty tile changes color
+                self.baseColor = colorChoice
+                tilesToPaint = self.__tilesInArea(0, 0, self.rowNumber, self.columnNumber)
+            else:
+                tilesToPaint = self.highlightedTiles | self.dirtyTiles
+            self.highlightedTiles = set()
+            self.dirtyTiles = set()
+        else:
+            tilesToPaint = self.__tilesInArea(from_tile[0], from_tile[1], to_tile[0], to_tile[1])
+            self.highlightedTiles |= tilesToPaint
+
+        palette = self.__palette(colorChoice)
+        palette_idle = self.__palette('idle')
+        for tile in tilesToPaint:
+            if not tile.isFilled():
+                tile.changeColor(palette)
+            else:
+                tile.changeColor(palette_idle)
 
     def updateGlobalSize(self, newSize: QtGui.QResizeEvent):
-        """update the size of the layout"""
+        """update the size of the layout: the relayout is deferred and coalesced to one per frame"""
+        self.pendingSize = QtCore.QSize(newSize.size())
+        if not self.resizeTimer.isActive():
+            self.resizeTimer.start()
+        self.settleTimer.start()
+
+    def __applyGlobalSize(self):
+        """applies the last size given to updateGlobalSize"""
+        if self.pendingSize is None:
+            return
+        newSize, self.pendingSize = self.pendingSize, None
+
         verticalMargins = self.contentsMargins().top() + self.contentsMargins().bottom()
         verticalSpan = int(
-            (newSize.size().height() - (self.rowNumber - 1) * self.verticalSpacing() - verticalMargins)
+            (newSize.height() - (self.rowNumber - 1) * self.verticalSpacing() - verticalMargins)
             // self.rowNumber
         )
 
         horizontalMargins = self.contentsMargins().left() + self.contentsMargins().right()
         horizontalSpan = int(
-            (newSize.size().width() - (self.columnNumber - 1) * self.horizontalSpacing() - horizontalMargins)
+            (newSize.width() - (self.columnNumber - 1) * self.horizontalSpacing() - horizontalMargins)
             // self.columnNumber
         )
 
-        self.verticalSpan = max(verticalSpan, self.minVerticalSpan)
-        self.horizontalSpan = max(horizontalSpan, self.minHorizontalSpan)
+        verticalSpan = max(verticalSpan, self.minVerticalSpan)
+        horizontalSpan = max(horizontalSpan, self.minHorizontalSpan)
+        if (verticalSpan, horizontalSpan) == (self.verticalSpan, self.horizontalSpan):
+            return
+
+        self.verticalSpan = verticalSpan
+        self.horizontalSpan = horizontalSpan
         self.__updateAllTiles()
 
+    def __emitGlobalSizeSettled(self):
+        """tells that the resizing is over, once the last pending size is applied"""
+        self.__applyGlobalSize()
+        self.globalSizeSettled.emit(self.verticalSpan, self.horizontalSpan)
+
+    def __setAreaOccupied(self, fromRow, fromColumn, rowSpan, columnSpan, occupied):
+        """updates the occupancy bitmap of the given area"""
+        mask = self.__columnMask(fromColumn, columnSpan)
+        fullMask = (1 << self.columnNumber) - 1
+        for row in range(fromRow, fromRow + rowSpan):
+            if occupied:
+                self.occupiedCells += columnSpan - bin(self.occupancy[row] & mask).count('1')
+                self.occupancy[row] |= mask
+                if self.occupancy[row] == fullMask:
+                    self.fullRows |= 1 << row
+            else:
+                self.occupiedCells -= bin(self.occupancy[row] & mask).count('1')
+                self.occupancy[row] &= ~mask
+                self.fullRows &= ~(1 << row)
+
+    def __palette(self, colorChoice):
+        """returns the cached palette of the given color"""
+        palette = self.paletteCache.get(colorChoice)
+        if palette is None:
+            palette = QPalette()
+            palette.setBrush(QPalette.ColorRole.Window, QtGui.QColor(*self.colorMap[colorChoice]))
+            self.paletteCache[colorChoice] = palette
+        return palette
+
+    def __resetPalette(self, colorChoice):
+        """drops the cached palette of the given color so that every tile is repainted with the new one"""
+        self.paletteCache.pop(colorChoice, None)
+        self.baseColor = None
+
+    def __tilesInArea(self, fromRow, fromColumn, rowSpan, columnSpan):
+        """returns the distinct tiles covering the given area"""
+        return {
+            self.tileMap[row][column]
+            for row in range(fromRow, fromRow + rowSpan)
+            for column in range(fromColumn, fromColumn + columnSpan)
+            if self.tileMap[row][column] is not None
+        }
+
+    def __tileAt(self, row, column):
+        """returns the tile at (row, column), creating it if the cell was virtualized"""
+        tile = self.tileMap[row][column]
+        if tile is None:
+            tile = self.__createTile(row, column, updateTileMap=True)
+        return tile
+
+    def __visibleCells(self):
+        """returns the rows and columns ranges intersecting the viewport, margin included"""
+        if self.viewport is None:
+            return range(self.rowNumber), range(self.columnNumber)
+        margins = self.contentsMargins()
+        rowStep = self.verticalSpan + self.verticalSpacing()
+        columnStep = self.horizontalSpan + self.horizontalSpacing()
+        firstRow = (self.viewport.top() - margins.top()) // rowStep - self.viewportMargin
+        lastRow = (self.viewport.bottom() - margins.top()) // rowStep + self.viewportMargin
+        firstColumn = (self.viewport.left() - margins.left()) // columnStep - self.viewportMargin
+        lastColumn = (self.viewport.right() - margins.left()) // columnStep + self.viewportMargin
+        return (
+            range(max(firstRow, 0), min(lastRow + 1, self.rowNumber)),
+            range(max(firstColumn, 0), min(lastColumn + 1, self.columnNumber)),
+        )
+
+    def __updateViewport(self, changedCells=()):
+        """creates the tiles entering the viewport, recycles the empty ones leaving it and parks the widgets
+        only the cells that entered or left the viewport since the last call are walked, with the changedCells
+        whose tiles were just made or split, every cell after the grid itself changed"""
+        if not self.virtualized:
+            return
+        rows, columns = self.__visibleCells()
+        if self.viewportCells is None:
+            cells = ((row, column) for row in range(self.rowNumber) for column in range(self.columnNumber))
+        else:
+            cells = itertools.chain(self.__changedCells(self.viewportCells, (rows, columns)), changedCells)
+        self.viewportCells = (rows, columns)
+
+        for row, column in cells:
+            tile = self.tileMap[row][column]
+            if row in rows and column in columns:
+                if tile is None:
+                    self.__createTile(row, column, updateTileMap=True)
+            elif (tile is not None and not tile.isFilled() and not tile.dragInProcess
+                  and tile.getRowSpan() == 1 and tile.getColumnSpan() == 1):
+                self.__deleteTile(tile)
+                self.tileMap[row][column] = None
+
+        for widget, tile in list(self.widgetToTile.items()):
+            visible = (
+                tile.getFromRow() <= rows.stop - 1 and tile.getFromRow() + tile.getRowSpan() > rows.start
+                and tile.getFromColumn() <= columns.stop - 1
+                and tile.getFromColumn() + tile.getColumnSpan() > columns.start
+            )
+            if visible == (widget in self.hiddenWidgets):
+                if visible:
+                    self.hiddenWidgets.discard(widget)
+                else:
+                    self.hiddenWidgets.add(widget)
+                self.tileVisibilityChanged.emit(widget, visible)
+
+    @staticmethod
+    def __changedCells(cells, otherCells):
+        """returns the cells in one of the (rows, columns) areas but not in the other one"""
+        for (rows, columns), (otherRows, otherColumns) in ((cells, otherCells), (otherCells, cells)):
+            for row in rows:
+                for column in columns:
+                    if row not in otherRows or column not in otherColumns:
+                        yield row, column
+
+    def __updateGridMinimumSize(self):
+        """keeps the size of the virtualized cells, which have no tile to give it to the grid"""
+        for row in range(self.rowNumber):
+            self.setRowMinimumHeight(row, self.verticalSpan)
+        for column in range(self.columnNumber):
+            self.setColumnMinimumWidth(column, self.horizontalSpan)
+
+    def __placeTile(self, tile, fromRow, fromColumn, rowSpan=1, columnSpan=1):
+        """puts a tile at the given place of the grid, or postpones it until endUpdate"""
+        if self.updateDepth:
+            self.pendingPlacement.add(tile)
+            return
+        super().removeWidget(tile)
+        super().addWidget(tile, fromRow, fromColumn, rowSpan, columnSpan)
+
+    def __deleteTile(self, tile):
+        """removes a tile from the grid and recycles it, or deletes it if it still holds a widget"""
+        self.highlightedTiles.discard(tile)
+        self.dirtyTiles.discard(tile)
+        if self.updateDepth:
+            self.pendingPlacement.discard(tile)
+            self.pendingRemoval.add(tile)
+        else:
+            super().removeWidget(tile)
+
+        if tile.dragInProcess:
+            # the dragged tile gives itself back with releaseTile once the drag is over
+            return
+        if tile.isFilled():
+            self.__disposeTile(tile)
+        else:
+            self.releaseTile(tile)
+
+    def __trimPool(self):
+        """deletes the pooled tiles a smaller grid could not use"""
+        while len(self.tilePool) > self.rowNumber * self.columnNumber:
+            self.__disposeTile(self.tilePool.pop())
+
+    def __disposeTile(self, tile):
+        """deletes a tile for good, once the current batch is over"""
+        if self.updateDepth:
+            self.pendingDeletion.append(tile)
+        else:
+            tile.deleteLater()
+
     def __mergeTiles(self, tile, fromRow, fromColumn, rowSpan, columnSpan, tilesToMerge):
         """merges the tilesToMerge with tile"""
         for row, column in tilesToMerge:
-            super().removeWidget(self.tileMap[row][column])
-            self.tileMap[row][column].deleteLater()
+            if self.tileMap[row][column] is not None:
+                self.__deleteTile(self.tileMap[row][column])
             self.tileMap[row][column] = tile
 
-        super().removeWidget(tile)
-        super().addWidget(tile, fromRow, fromColumn, rowSpan, columnSpan)
+        self.__placeTile(tile, fromRow, fromColumn, rowSpan, columnSpan)
         tile.updateSize(fromRow, fromColumn, rowSpan, columnSpan)
 
     def __splitTiles(self, tile, fromRow, fromColumn, rowSpan, columnSpan, tilesToSplit):
@@ -401,22 +781,29 @@ class QTileLayout(QtWidgets.QGridLayout):
         for row, column in tilesToSplit:
             self.__createTile(row, column, updateTileMap=True)
 
-        super().removeWidget(tile)
-        super().addWidget(tile, fromRow, fromColumn, rowSpan, columnSpan)
+        self.__placeTile(tile, fromRow, fromColumn, rowSpan, columnSpan)
         tile.updateSize(fromRow, fromColumn, rowSpan, columnSpan)
 
     def __createTile(self, fromRow, fromColumn, rowSpan=1, columnSpan=1, updateTileMap=False):
         """creates a tile: a tile is basically a place holder that can contain a widget or not"""
-        tile = Tile(
-            self,
-            fromRow,
-            fromColumn,
-            rowSpan,
-            columnSpan,
-            self.verticalSpan,
-            self.horizontalSpan,
-        )
-        super().addWidget(tile, fromRow, fromColumn, rowSpan, columnSpan)
+        if self.tilePool:
+            tile = self.tilePool.pop()
+            tile.reset(fromRow, fromColumn, rowSpan, columnSpan, self.verticalSpan, self.horizontalSpan)
+        else:
+            tile = Tile(
+                self,
+                fromRow,
+                fromColumn,
+                rowSpan,
+                columnSpan,
+                self.verticalSpan,
+                self.horizontalSpan,
+            )
+        if self.updateDepth:
+            self.pendingPlacement.add(tile)
+        else:
+            super().addWidget(tile, fromRow, fromColumn, rowSpan, columnSpan)
+        self.dirtyTiles.add(tile)
 
         if updateTileMap:
             tilePositions = [
@@ -500,7 +887,7 @@ class QTileLayout(QtWidgets.QGridLayout):
                 columnDelta = (columnSpan + column) * (dirX == 1) + (-column - 1) * (dirX == -1)
                 for row in range(rowSpan):
                     tilesToCheck.append((fromRow + row, fromColumn + columnDelta))
-                    if self.tileMap[fromRow + row][fromColumn + columnDelta].isFilled():
+                    if self.occupancy[fromRow + row] >> (fromColumn + columnDelta) & 1:
                         return tileNumberAvailable, self.__flattenList(tilesToMerge)
                 tileNumberAvailable += dirX
                 tilesToMerge.append(tilesToCheck)
@@ -512,7 +899,7 @@ class QTileLayout(QtWidgets.QGridLayout):
                 rowDelta = (rowSpan + row) * (dirY == 1) + (-row - 1) * (dirY == -1)
                 for column in range(columnSpan):
                     tilesToCheck.append((fromRow + rowDelta, fromColumn + column))
-                    if self.tileMap[fromRow + rowDelta][fromColumn + column].isFilled():
+                    if self.occupancy[fromRow + rowDelta] >> (fromColumn + column) & 1:
                         return tileNumberAvailable, self.__flattenList(tilesToMerge)
                 tileNumberAvailable += dirY
                 tilesToMerge.append(tilesToCheck)
@@ -523,18 +910,29 @@ class QTileLayout(QtWidgets.QGridLayout):
         """Creates a map to be able to locate each tile on the grid"""
         for row in range(self.rowNumber):
             self.tileMap.append([])
+            self.occupancy.append(0)
             for column in range(self.columnNumber):
                 tile = self.__createTile(row, column)
                 self.tileMap[-1].append(tile)
 
     def __updateAllTiles(self):
         """Forces the tiles to update their geometry"""
-        for row in range(self.rowNumber):
-            for column in range(self.columnNumber):
-                self.tileMap[row][column].updateSize(
-                    verticalSpan=self.verticalSpan,
-                    horizontalSpan=self.horizontalSpan
-                )
+        if self.updateDepth:
+            self.pendingTilesUpdate = True
+            return
+        if self.virtualized:
+            self.__updateGridMinimumSize()
+            self.__updateViewport()
+        for tile in self.__tilesInArea(0, 0, self.rowNumber, self.columnNumber):
+            tile.updateSize(
+                verticalSpan=self.verticalSpan,
+                horizontalSpan=self.horizontalSpan
+            )
+
+    @staticmethod
+    def __columnMask(fromColumn, columnSpan):
+        """returns the occupancy bits covering columnSpan columns from fromColumn"""
+        return ((1 << columnSpan) - 1) << fromColumn
 
     @staticmethod
     def __flattenList(toFlatten):
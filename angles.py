@@ -0,0 +1,121 @@
+import numpy as np
+
+# MoilCV renders an anypoint view like a pinhole camera turned toward the view, with a focal length of
+# zoom * ANYPOINT_FOCAL pixels and centered in an image of the size of the fisheye image (measured on MoilCV, it
+# does not depend on the parameters of the camera but its ratio, and only holds for a ratio of 1)
+ANYPOINT_FOCAL = 196.8
+
+# the tables of every camera, see AngleLookup.for_camera
+angle_lookups = {}
+
+
+def clear_angle_lookups():
+    angle_lookups.clear()
+
+
+def angle_lookups_usage():
+    return sum(lookup.alpha_of_rho.nbytes + lookup.rho_of_alpha.nbytes for lookup in angle_lookups.values())
+
+
+# the tables are small and quick to make again, so they are all freed at once
+def evict_angle_lookups(nbytes):
+    freed = angle_lookups_usage()
+    clear_angle_lookups()
+    return freed
+
+
+# converts positions in the fisheye image to alpha/beta and back, for arrays of any shape at once
+# the lens model of moildev only depends on the distance to the image center (rho), so one table of alpha for
+# every rho (and of rho for every 0.1 degree of alpha) is enough for every pixel of the image
+# alpha and beta follow moildev.get_alpha_beta: mode 1 gives the angle from the optical axis and the direction
+# clockwise from the top of the image (0 to 360), mode 2 the vertical and horizontal angles (pitch and yaw)
+# the calibration ratio of the camera is in the rho tables of moildev already; the ratio only places the anypoint
+# views in their own image (MoilCV maps the same fisheye pixel to the same angles whatever the ratio), so like
+# get_alpha_beta the positions in the fisheye image do not depend on it
+# positions outside of the lens (alpha over max_alpha) give nan
+# the tables also give the maps of anypoint views without moildev, see anypoint_maps
+class AngleLookup:
+    def __init__(self, moildev, max_alpha=110):
+        self.icx = moildev.icx
+        self.icy = moildev.icy
+        self.image_size = (moildev.image_width, moildev.image_height)
+        self.max_alpha = max_alpha
+        # moildev keeps its own tables with these resolutions: 0.1 degree for alpha and 1 pixel for rho
+        self.alpha_of_rho = np.array([moildev.get_alpha_from_rho(rho) for rho in range(3600)], dtype=np.float32)
+        self.rho_of_alpha = np.array([moildev.get_rho_from_alpha(i / 10) for i in range(1800)], dtype=np.float32)
+
+    # the table of the camera, made once
+    @staticmethod
+    def for_camera(moildev, camera_key):
+        camera_key = tuple(camera_key)
+        if camera_key not in angle_lookups:
+            angle_lookups[camera_key] = AngleLookup(moildev)
+        return angle_lookups[camera_key]
+
+    def alpha_beta(self, x, y, mode=1):
+        delta_x = np.asarray(x, dtype=np.float32) - self.icx
+        delta_y = self.icy - np.asarray(y, dtype=np.float32)
+        if mode == 1:
+            alpha = self.__alpha(np.hypot(delta_x, delta_y))
+            beta = np.mod(90 - np.degrees(np.arctan2(delta_y, delta_x)), 360)
+        else:
+            alpha = np.copysign(self.__alpha(np.abs(delta_y)), delta_y)
+            beta = np.copysign(self.__alpha(np.abs(delta_x)), delta_x)
+        outside = self.__alpha(np.hypot(delta_x, delta_y)) > self.max_alpha
+        return np.where(outside, np.nan, alpha), np.where(outside, np.nan, beta)
+
+    # the positions of alpha/beta, the inverse of alpha_beta in both modes
+    def position(self, alpha, beta, mode=1):
+        alpha = np.asarray(alpha, dtype=np.float32)
+        beta = np.asarray(beta, dtype=np.float32)
+        if mode == 1:
+            rho = self.__rho(alpha)
+            return self.icx + rho * np.sin(np.radians(beta)), self.icy - rho * np.cos(np.radians(beta))
+        return (
+            self.icx + np.copysign(self.__rho(np.abs(beta)), beta),
+            self.icy - np.copysign(self.__rho(np.abs(alpha)), alpha),
+        )
+
+    # one pair of alpha/beta for a point, None for both outside of the lens like moildev.get_alpha_beta
+    def point_alpha_beta(self, x, y, mode=1):
+        alpha, beta = self.alpha_beta(x, y, mode)
+        if np.isnan(alpha):
+            return None, None
+        return float(alpha), float(beta)
+
+    # maps of the anypoint view (see anypoint.default_view) with width columns, within a pixel of the maps of moildev
+    # scaled down to that width, for previews: a few ms at the width of a tile instead of moildev at full resolution
+    def anypoint_maps(self, view, width):
+        image_width, image_height = self.image_size
+        height = max(round(image_height * width / image_width), 1)
+        # the full resolution pixels at the centers of the scaled ones, like cv2.resize samples them
+        x = (np.arange(width, dtype=np.float32) + 0.5) * image_width / width - 0.5 - image_width / 2
+        y = (np.arange(height, dtype=np.float32) + 0.5) * image_height / height - 0.5 - image_height / 2
+        x, y = np.meshgrid(x, y)
+        rays = np.stack([x, y, np.full_like(x, view['zoom'] * ANYPOINT_FOCAL)], axis=-1) @ self.__rotation(view).T
+        rho = self.__rho(np.degrees(np.arctan2(np.hypot(rays[..., 0], rays[..., 1]), rays[..., 2])))
+        direction = np.arctan2(rays[..., 1], rays[..., 0])
+        return (
+            (self.icx + rho * np.cos(direction)).astype(np.float32),
+            (self.icy + rho * np.sin(direction)).astype(np.float32),
+        )
+
+    # turns the optical axis (x to the right and y down the image) to the view: mode 1 tilts it by alpha toward
+    # the top of the image then turns it by beta clockwise, mode 2 tilts it by alpha (pitch) then by beta (yaw)
+    # toward the right
+    @staticmethod
+    def __rotation(view):
+        alpha, beta = np.radians(view['alpha']), np.radians(view['beta'])
+        tilt = np.array([[1, 0, 0], [0, np.cos(alpha), -np.sin(alpha)], [0, np.sin(alpha), np.cos(alpha)]])
+        if view['mode'] == 1:
+            turn = np.array([[np.cos(beta), -np.sin(beta), 0], [np.sin(beta), np.cos(beta), 0], [0, 0, 1]])
+        else:
+            turn = np.array([[np.cos(beta), 0, np.sin(beta)], [0, 1, 0], [-np.sin(beta), 0, np.cos(beta)]])
+        return turn @ tilt
+
+    # interpolated between the 0.1 degree steps of the table
+    def __rho(self, alpha):
+        return np.interp(alpha * 10, np.arange(len(self.rho_of_alpha)), self.rho_of_alpha)
+
+    def __alpha(self, rho):
+        return self.alpha_of_rho[np.clip(np.rint(rho), 0, len(self.alpha_of_rho) - 1).astype(np.intp)]
@@ -0,0 +1,364 @@
+import math
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6 import QtCore
+import cv2
+import numpy as np
+
+
+# the anypoint view of a tile: mode 1 uses alpha, beta and zoom, mode 2 uses alpha as pitch and beta as yaw
+def default_view():
+    return {'mode': 1, 'alpha': 0, 'beta': 0, 'zoom': 4}
+
+
+# the four quadrants of a 360 degree fisheye (beta is the direction around the optical axis)
+def quadrant_views(alpha=45, zoom=4):
+    return [{'mode': 1, 'alpha': alpha, 'beta': beta, 'zoom': zoom} for beta in (0, 90, 180, 270)]
+
+
+# moildev fills the same two buffers on every call, so two threads computing maps with one moildev at once would mix
+# their views: the computations are serialised per moildev
+moildev_locks = weakref.WeakKeyDictionary()
+moildev_locks_lock = threading.Lock()
+
+
+def moildev_lock(moildev):
+    with moildev_locks_lock:
+        return moildev_locks.setdefault(moildev, threading.Lock())
+
+
+# X-Y maps of the anypoint views, computed once per camera and view then reused by every tile showing it
+# the maps of the views shown by tiles are also written to cache_dir so they do not have to be computed again after a
+# restart, the views only looked at (e.g. while picking a view) are not; the files take at most max_disk_bytes, the
+# least recently used ones are removed first
+# maps scaled down to the display width of a tile are derived from the full resolution ones and only kept in memory
+# the cache is shared with MapWorker, which computes maps in a background thread
+# the maps in memory are not limited by count, the MemoryBudget of the plugin evicts them by bytes (see evict)
+class MapCache:
+    def __init__(self, cache_dir=None, max_disk_bytes=512 * 2**20):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.maps = {}
+        # the keys of the maps known to be in cache_dir
+        self.persisted = set()
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def key(camera_key, view):
+        return (tuple(camera_key), view['mode'], view['alpha'], view['beta'], view['zoom'])
+
+    # returns (map_x, map_y) of the view, from memory, from the disk cache or computed with moildev
+    # with width, the maps give an image of that width (never wider than the full resolution one)
+    # the lock is only held to look the maps up and to insert them: the GUI thread renders with the cache while
+    # MapWorker computes, so two threads may compute the same maps at once (one after the other, see moildev_lock),
+    # the first ones inserted are kept
+    # persist writes the maps to cache_dir, also when they were computed before without it
+    def get(self, moildev, camera_key, view, width=None, persist=True):
+        key = self.key(camera_key, view)
+        with self.lock:
+            maps = self.__lookup(key)
+        if maps is None:
+            maps = self.__load(key)
+            if maps is None:
+                maps = self.__compute(moildev, view)
+            with self.lock:
+                maps = self.__insert(key, maps)
+        if persist:
+            self.__save(key, maps)
+        return self.__scaled(key, maps, width)
+
+    # the maps of the view if they are in memory (scaled ones are derived from them), never computed
+    def find(self, camera_key, view, width=None):
+        key = self.key(camera_key, view)
+        with self.lock:
+            maps = self.__lookup(key)
+        if maps is None:
+            return None
+        return self.__scaled(key, maps, width)
+
+    # maps close to the ones of the view, made from the maps in memory without moildev, for the cameras whose
+    # maps AngleLookup.anypoint_maps cannot make
+    # a mode 1 view that only differs by beta from a view in memory is that view turned around the image center,
+    # because the lens model only depends on alpha (beta grows clockwise from the top of the image, like get_alpha_beta)
+    def preview(self, moildev, camera_key, view, width=None):
+        if view['mode'] != 1:
+            return None
+        camera_key = tuple(camera_key)
+        with self.lock:
+            cached_maps = list(self.maps.items())
+        for key, maps in reversed(cached_maps):
+            if len(key) != (5 if width is None else 6) or key[:3] != (camera_key, 1, view['alpha']):
+                continue
+            if key[4] != view['zoom'] or (width is not None and key[5] != width):
+                continue
+            return self.__rotate(maps, view['beta'] - key[3], moildev.icx, moildev.icy)
+        return None
+
+    @staticmethod
+    def __rotate(maps, angle, icx, icy):
+        cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+        delta_x, delta_y = np.asarray(maps[0]) - icx, np.asarray(maps[1]) - icy
+        return (
+            (icx + delta_x * cos - delta_y * sin).astype(np.float32),
+            (icy + delta_x * sin + delta_y * cos).astype(np.float32),
+        )
+
+    def __scaled(self, key, maps, width):
+        if width is None or width >= maps[0].shape[1]:
+            return maps
+        scaled_key = key + (width,)
+        with self.lock:
+            scaled_maps = self.__lookup(scaled_key)
+        if scaled_maps is None:
+            # the maps hold source coordinates, so resizing them samples the same view with fewer pixels
+            height = max(round(maps[0].shape[0] * width / maps[0].shape[1]), 1)
+            scaled_maps = tuple(cv2.resize(np.asarray(m), (width, height), interpolation=cv2.INTER_LINEAR) for m in maps)
+            with self.lock:
+                scaled_maps = self.__insert(scaled_key, scaled_maps)
+        return scaled_maps
+
+    # the remap never computes nor loads maps, so that frames never wait for them: it returns None when the maps
+    # of the view are not in memory, they are then asked to MapWorker.fetch
+    def remap(self, image, camera_key, view, width=None):
+        maps = self.find(camera_key, view, width)
+        if maps is None:
+            return None
+        return cv2.remap(image, maps[0], maps[1], cv2.INTER_CUBIC)
+
+    # every view of the same frame in one cv2.remap call: the maps of the views are stacked on top of each other
+    # and the result is cut back into one image per view, which are views of the stacked result (no copy)
+    # like remap, None when the maps of one of the views are not in memory
+    def remap_views(self, image, camera_key, views, width=None):
+        stack_key = ('stack', width) + tuple(self.key(camera_key, view) for view in views)
+        with self.lock:
+            stack = self.__lookup(stack_key)
+        if stack is None:
+            maps = [self.find(camera_key, view, width) for view in views]
+            if any(m is None for m in maps):
+                return None
+            if len({m[0].shape for m in maps}) > 1:
+                return [cv2.remap(image, map_x, map_y, cv2.INTER_CUBIC) for map_x, map_y in maps]
+            stack = np.vstack([m[0] for m in maps]), np.vstack([m[1] for m in maps])
+            with self.lock:
+                stack = self.__insert(stack_key, stack)
+
+        result = cv2.remap(image, stack[0], stack[1], cv2.INTER_CUBIC)
+        return np.split(result, len(views))
+
+    def clear(self):
+        with self.lock:
+            self.maps = {}
+
+    # frees the maps of a view no tile shows anymore, with its scaled maps and the stacks it is part of
+    # (the disk cache keeps them)
+    def discard(self, camera_key, view):
+        key = self.key(camera_key, view)
+        with self.lock:
+            for cached_key in list(self.maps):
+                if cached_key[:5] == key or (cached_key[0] == 'stack' and key in cached_key[2:]):
+                    del self.maps[cached_key]
+
+    # bytes of the maps in memory, derived ones are the scaled maps and the stacks of the view groups, which are
+    # cheap to make again from the full resolution maps, mapped ones the maps memory mapped from cache_dir, whose
+    # pages are read when used and can be dropped by the system (they are never derived)
+    def memory_usage(self, derived=False, mapped=False):
+        with self.lock:
+            return sum(
+                m.nbytes for key, maps in self.maps.items() if self.__kind(key, maps) == (derived, mapped) for m in maps
+            )
+
+    # frees at least nbytes of maps (or all of them), the least recently used first, returns the bytes freed
+    def evict(self, nbytes, derived=False, mapped=False):
+        freed = 0
+        with self.lock:
+            for key in [key for key, maps in self.maps.items() if self.__kind(key, maps) == (derived, mapped)]:
+                if freed >= nbytes:
+                    break
+                freed += sum(m.nbytes for m in self.maps.pop(key))
+        return freed
+
+    @staticmethod
+    def __kind(key, maps):
+        return key[0] == 'stack' or len(key) == 6, isinstance(maps[0], np.memmap)
+
+    # the maps of key, which become the most recently used ones, None if they are not in memory
+    def __lookup(self, key):
+        maps = self.maps.pop(key, None)
+        if maps is not None:
+            self.maps[key] = maps
+        return maps
+
+    # maps inserted by another thread in the meantime are kept rather than the ones given, returns the kept ones
+    # the most recently used maps are at the end of the dict
+    def __insert(self, key, maps):
+        maps = self.maps.pop(key, maps)
+        self.maps[key] = maps
+        return maps
+
+    @staticmethod
+    def __compute(moildev, view):
+        with moildev_lock(moildev):
+            if view['mode'] == 1:
+                map_x, map_y = moildev.maps_anypoint_mode1(view['alpha'], view['beta'], view['zoom'])
+            else:
+                map_x, map_y = moildev.maps_anypoint_mode2(view['alpha'], view['beta'], 0, view['zoom'])
+            # the buffers are filled again by the next call, so they have to be copied to be kept
+            return map_x.copy(), map_y.copy()
+
+    def __path(self, key):
+        name = '_'.join(str(part) for part in key[0] + key[1:]).replace(os.sep, '-').replace(' ', '-')
+        return os.path.join(self.cache_dir, name + '_{}.npy')
+
+    def __load(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self.__path(key)
+        try:
+            # memory mapped so that only the pages used by cv2.remap are read
+            maps = np.load(path.format('x'), mmap_mode='r'), np.load(path.format('y'), mmap_mode='r')
+            # the modification time of the files is their last use, see __prune
+            os.utime(path.format('x'))
+            os.utime(path.format('y'))
+        except (OSError, ValueError):
+            return None
+        self.persisted.add(key)
+        return maps
+
+    def __save(self, key, maps):
+        if self.cache_dir is None or key in self.persisted:
+            return
+        self.persisted.add(key)
+        path = self.__path(key)
+        # written aside then renamed, since another thread may be saving or loading the same maps
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for name, m in zip('xy', maps):
+                temporary_path = '{}.{}'.format(path.format(name), threading.get_ident())
+                with open(temporary_path, 'wb') as file:
+                    np.save(file, m)
+                os.replace(temporary_path, path.format(name))
+        except OSError:
+            # the maps are only computed again after a restart
+            return
+        self.__prune()
+
+    # removes the least recently used maps until the files of cache_dir take at most max_disk_bytes
+    def __prune(self):
+        files = {}
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(('_x.npy', '_y.npy')):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            modified, size, paths = files.get(entry.name[:-len('x.npy')], (0, 0, []))
+            files[entry.name[:-len('x.npy')]] = (max(modified, stat.st_mtime), size + stat.st_size, paths + [entry.path])
+        excess = sum(size for modified, size, paths in files.values()) - self.max_disk_bytes
+        if excess <= 0:
+            return
+        removed = set()
+        for modified, size, paths in sorted(files.values()):
+            if excess <= 0:
+                break
+            for file_path in paths:
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
+            removed.add(paths[0][:-len('x.npy')] + '{}.npy')
+            excess -= size
+        self.persisted = {key for key in self.persisted if self.__path(key) not in removed}
+
+
+# computes the maps of views in a background thread, so that a new view never blocks the GUI thread
+# only the latest requested view waits while maps are being computed, the views requested in between are skipped
+# the maps fetched for the frames of the tiles (see MapCache.remap) are queued behind it, each view once
+class MapWorker(QtCore.QObject):
+    # the view whose maps are now in the map cache
+    maps_ready = QtCore.pyqtSignal(object)
+    # the view whose maps could not be computed
+    map_failed = QtCore.pyqtSignal(object)
+    # the view whose request was replaced by a later one before its maps were computed
+    dropped = QtCore.pyqtSignal(object)
+    # emitted from the worker thread with the job and whether it succeeded, delivered in the GUI thread
+    computed = QtCore.pyqtSignal(object, bool)
+
+    def __init__(self, map_cache):
+        super().__init__()
+        self.map_cache = map_cache
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='maps')
+        self.running = False
+        self.job = None
+        self.pending = None
+        # the fetched views waiting for the worker, the one being computed and the ones that failed, by
+        # MapCache.key + (width,): a failed view is not fetched again until clear_failed()
+        self.queued = {}
+        self.fetching = None
+        self.failed = set()
+        # the maps of the job being computed are discarded once done, see cancel
+        self.cancelled = False
+        self.computed.connect(self.__computed)
+
+    # persist is passed to MapCache.get, views that are only looked at are not written to the disk cache
+    def request(self, moildev, camera_key, view, width=None, persist=True):
+        dropped, self.pending = self.pending, (moildev, camera_key, dict(view), width, persist)
+        if dropped is not None:
+            self.dropped.emit(dropped[2])
+        if not self.running:
+            self.__start()
+
+    # the maps of a view shown by a tile, loaded from the disk cache or computed after the requested view
+    def fetch(self, moildev, camera_key, view, width=None):
+        key = self.map_cache.key(camera_key, view) + (width,)
+        if key in self.queued or key == self.fetching or key in self.failed:
+            return
+        self.queued[key] = (moildev, camera_key, dict(view), width, True)
+        if not self.running:
+            self.__start()
+
+    # the views of camera_key are no longer shown (e.g. their tiles were closed): their queued fetches are dropped and
+    # the maps of the one being computed are discarded once done, instead of staying in the map cache
+    def cancel(self, camera_key, views):
+        keys = [self.map_cache.key(camera_key, view) for view in views]
+        for key in [key for key in self.queued if key[:5] in keys]:
+            del self.queued[key]
+        if self.running and self.map_cache.key(self.job[1], self.job[2]) in keys:
+            self.cancelled = True
+
+    # e.g. after the cameras changed
+    def clear_failed(self):
+        self.failed.clear()
+
+    def shutdown(self):
+        self.pending = None
+        self.queued.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __start(self):
+        if self.pending is not None:
+            job, self.pending, self.fetching = self.pending, None, None
+        else:
+            self.fetching = next(iter(self.queued))
+            job = self.queued.pop(self.fetching)
+        self.running = True
+        self.job = job
+        future = self.executor.submit(self.map_cache.get, *job)
+        future.add_done_callback(lambda f: f.cancelled() or self.computed.emit(job, f.exception() is None))
+
+    def __computed(self, job, success):
+        self.running = False
+        cancelled, self.cancelled = self.cancelled, False
+        if not success and self.fetching is not None:
+            self.failed.add(self.fetching)
+        self.fetching = None
+        if cancelled:
+            self.map_cache.discard(job[1], job[2])
+        elif success:
+            self.maps_ready.emit(job[2])
+        else:
+            self.map_failed.emit(job[2])
+        if self.pending is not None or self.queued:
+            self.__start()
@@ -0,0 +1,50 @@
+# time to load the plugin and show its widget the first time, run from the MoilApp directory (the one with src/):
+#   python plugins/<this plugin>/benchmarks/startup.py
+import importlib.util
+import os
+import sys
+import time
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.getcwd())
+
+from PyQt6 import QtWidgets
+
+
+def timed(name, function):
+    start = time.perf_counter()
+    result = function()
+    print('{:<24}{:8.1f} ms'.format(name, (time.perf_counter() - start) * 1000))
+    return result
+
+
+def import_plugin():
+    spec = importlib.util.spec_from_file_location(
+        'surveillance_plugin', os.path.join(PLUGIN_DIR, '__init__.py'), submodule_search_locations=[PLUGIN_DIR]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = package
+    spec.loader.exec_module(package)
+    return importlib.import_module(spec.name + '.controller')
+
+
+def show(widget):
+    widget.show()
+    QtWidgets.QApplication.processEvents()
+
+
+def main():
+    app = QtWidgets.QApplication(sys.argv)
+    from src.models.model_apps import Model
+
+    controller = timed('import', import_plugin)
+    plugin = timed('plugin', controller.SurveillanceFisheyeCamera)
+    widget = timed('set_plugin_widget', lambda: plugin.set_plugin_widget(Model()))
+    timed('first show', lambda: show(widget))
+    timed('second show', lambda: (widget.hide(), show(widget)))
+    widget.close()
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# adds and closes a tile many times and compares the memory of the process before and after, run from the
+# MoilApp directory (the one with src/):
+#   python plugins/<this plugin>/benchmarks/tile_leak.py <camera type> <camera parameter file> [cycles]
+import gc
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.getcwd())
+
+from PyQt6 import QtWidgets, QtCore
+
+WARMUP_CYCLES = 20
+
+
+def rss():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def import_plugin():
+    spec = importlib.util.spec_from_file_location(
+        'surveillance_plugin', os.path.join(PLUGIN_DIR, '__init__.py'), submodule_search_locations=[PLUGIN_DIR]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = package
+    spec.loader.exec_module(package)
+    return importlib.import_module(spec.name + '.controller')
+
+
+def process_events(seconds=0.0):
+    end = time.monotonic() + seconds
+    while True:
+        QtWidgets.QApplication.processEvents()
+        QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete)
+        if time.monotonic() >= end:
+            break
+
+
+# one tile opened on the source until it shows a frame, then closed
+def cycle(controller, source):
+    widget_tile = controller.create_tile(*controller.tile_layout.findFreeArea(1, 1))
+    controller.connect_tile_source(widget_tile, source)
+    start = time.monotonic()
+    while controller.connector.is_pending(widget_tile) and time.monotonic() - start < 5:
+        process_events(0.001)
+    controller.close_tile(widget_tile)
+    process_events()
+
+
+def main():
+    app = QtWidgets.QApplication(sys.argv)
+    from src.models.model_apps import Model
+
+    cam_type, params_name = sys.argv[1], sys.argv[2]
+    cycles = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    source = ('Image/Video', cam_type, os.path.join(PLUGIN_DIR, 'resources', 'sample1.jpg'), params_name)
+
+    controller_module = import_plugin()
+    # the session of the plugin is left as it is
+    controller_module.SESSION_PATH = os.path.join(tempfile.mkdtemp(), 'session.json')
+    controller = controller_module.Controller(Model())
+    controller.show()
+    process_events()
+
+    for _ in range(WARMUP_CYCLES):
+        cycle(controller, source)
+    gc.collect()
+    baseline = rss()
+    for _ in range(cycles):
+        cycle(controller, source)
+    gc.collect()
+    after = rss()
+
+    print('tiles left: {}'.format(len(controller.each_tile)))
+    print('rss after {} warm up cycles: {:.1f} MB'.format(WARMUP_CYCLES, baseline / 2**20))
+    print('rss after {} more cycles:    {:.1f} MB ({:+.1f} MB)'.format(cycles, after / 2**20, (after - baseline) / 2**20))
+    controller.close()
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import hashlib
+import itertools
+import json
+import os
+from moildev import Moildev
+
+# the camera parameter files already read: {params_name: (modification time, parameters of every camera type)}
+camera_configs = {}
+# one Moildev per camera type and parameter set, shared by every tile of that camera: {camera_key: moildev}
+moildevs = {}
+# a Moildev keeps two float32 maps and an RGB image of the size of the fisheye image, which it fills on every call
+MOILDEV_BYTES_PER_PIXEL = 4 + 4 + 3
+
+# the Moildev arguments of the keys of a camera parameter file, all of them are needed: Moildev only warns when
+# one is missing and cannot compute anything then
+MOILDEV_ARGUMENTS = {
+    'cameraName': 'camera_name', 'cameraFov': 'camera_fov',
+    'cameraSensorWidth': 'sensor_width', 'cameraSensorHeight': 'sensor_height',
+    'iCx': 'icx', 'iCy': 'icy', 'ratio': 'ratio', 'imageWidth': 'image_width', 'imageHeight': 'image_height',
+    'calibrationRatio': 'calibration_ratio',
+    'parameter0': 'parameter_0', 'parameter1': 'parameter_1', 'parameter2': 'parameter_2',
+    'parameter3': 'parameter_3', 'parameter4': 'parameter_4', 'parameter5': 'parameter_5',
+}
+
+
+# after the camera parameters were edited (form_camera_parameter)
+def clear_cameras():
+    camera_configs.clear()
+    moildevs.clear()
+
+
+# the parameters of cam_type in the params_name file, None if the file cannot be read, a ValueError if it is not
+# a camera parameter file or has no parameters for cam_type
+# the file is read again only when it was modified
+def camera_config(cam_type, params_name):
+    try:
+        modified = os.path.getmtime(params_name)
+        if params_name not in camera_configs or camera_configs[params_name][0] != modified:
+            with open(params_name) as file:
+                try:
+                    config = json.load(file)
+                except ValueError as error:
+                    # the error is kept like the parameters, so a broken file is not read again for every frame
+                    config = '{} is not a camera parameter file: {}'.format(params_name, error)
+            camera_configs[params_name] = (modified, config)
+    except (OSError, TypeError):
+        return None
+    config = camera_configs[params_name][1]
+    if isinstance(config, str):
+        raise ValueError(config)
+    # a file with one camera has its parameters at the top level, like Moildev reads it
+    if isinstance(config, dict) and isinstance(config.get(cam_type), dict):
+        return config[cam_type]
+    if isinstance(config, dict) and 'cameraName' in config:
+        return config
+    raise ValueError('{} has no parameters for the camera {}'.format(params_name, cam_type))
+
+
+# identifies the camera of a source, the parameter set is part of it so that the maps and lookup tables of
+# parameters that were edited since are not used again
+def camera_key(cam_type, params_name):
+    config = camera_config(cam_type, params_name)
+    if config is None:
+        return (cam_type, params_name)
+    parameters = json.dumps(config, sort_keys=True).encode()
+    return (cam_type, params_name, hashlib.sha1(parameters).hexdigest()[:12])
+
+
+# the Moildev of the camera, made from the parameters already read instead of from the file, None if the
+# parameter file cannot be read, a ValueError if parameters are missing
+def camera_moildev(cam_type, params_name):
+    config = camera_config(cam_type, params_name)
+    if config is None:
+        return None
+    key = camera_key(cam_type, params_name)
+    if key not in moildevs:
+        missing = [name for name in MOILDEV_ARGUMENTS if name not in config]
+        if missing:
+            raise ValueError('{} misses {} for the camera {}'.format(params_name, ', '.join(missing), cam_type))
+        moildevs[key] = Moildev(**{argument: config[name] for name, argument in MOILDEV_ARGUMENTS.items()})
+    return moildevs[key]
+
+
+# the ratio of the camera (Moildev does not tell it), None if the parameter file cannot be read
+def camera_ratio(cam_type, params_name):
+    config = camera_config(cam_type, params_name)
+    return None if config is None else config.get('ratio')
+
+
+# bytes of the buffers of the shared Moildevs and of the others given (e.g. the ones of the ModelApps of the
+# tiles), each one counted once (the tables and the parameters are small next to the buffers)
+def moildevs_usage(others=()):
+    unique = {id(moildev): moildev for moildev in itertools.chain(moildevs.values(), others) if moildev is not None}
+    return sum(moildev.image_width * moildev.image_height * MOILDEV_BYTES_PER_PIXEL for moildev in unique.values())
@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6 import QtCore
+import cv2
+from .fake_camera import is_fake_source, open_fake_camera
+
+
+# opens a media source like ModelApps would, but giving up after timeout seconds
+def open_capture(media_source, timeout=5.0):
+    if is_fake_source(media_source):
+        return open_fake_camera(media_source)
+    if isinstance(media_source, str) and media_source.isdigit():
+        media_source = int(media_source)
+    timeout_msec = int(timeout * 1000)
+    return cv2.VideoCapture(media_source, cv2.CAP_ANY, [
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_msec,
+        cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_msec,
+    ])
+
+
+# opens the media sources in background threads so that an unreachable camera never blocks the GUI thread
+# and all the sources are warmed up at the same time. A source that cannot be opened within timeout seconds
+# is tried again after an exponential backoff (backoff, 2 * backoff, ... up to max_backoff seconds) until it
+# answers or is cancelled. state_changed tells the tiles what is going on, connected is emitted once the
+# source gave a frame, with the capture that is still open so the tile reads from it instead of opening the
+# source again; the captures that come too late or for a cancelled source are released
+class SourceConnector(QtCore.QObject):
+    CONNECTING = 'connecting'
+    RETRYING = 'retrying'
+    CONNECTED = 'connected'
+
+    # the token and the open capture
+    connected = QtCore.pyqtSignal(object, object)
+    state_changed = QtCore.pyqtSignal(object, str)
+    # emitted from the worker threads, delivered in the GUI thread
+    probe_finished = QtCore.pyqtSignal(object, object, object)
+
+    def __init__(self, max_workers=8, timeout=5.0, backoff=1.0, max_backoff=30.0, opener=open_capture):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='source')
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.opener = opener
+        # token -> the connection in progress: {'media_source', 'timeout', 'attempt', 'request'}
+        self.pending = {}
+        self.probe_finished.connect(self.__probe_finished)
+
+    # token is given back with the signals, media_source is what ModelApps.set_media_source gets
+    def connect_source(self, token, media_source, timeout=None):
+        connection = {
+            'media_source': media_source,
+            'timeout': self.timeout if timeout is None else timeout,
+            'attempt': 0,
+            'request': None,
+        }
+        self.pending[token] = connection
+        self.__try(token, connection)
+
+    # the same source, for a stream that stopped (see the watchdog)
+    def reconnect(self, token, media_source, timeout=None):
+        self.connect_source(token, media_source, timeout)
+
+    def cancel(self, token):
+        self.pending.pop(token, None)
+
+    def is_pending(self, token):
+        return token in self.pending
+
+    def shutdown(self):
+        self.pending = {}
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # the capture of the source if it can be opened and gives a frame, else None
+    def probe(self, media_source, timeout):
+        capture = self.opener(media_source, timeout)
+        try:
+            if capture.isOpened() and capture.read()[0]:
+                return capture
+        except Exception:
+            capture.release()
+            raise
+        capture.release()
+        return None
+
+    def __try(self, token, connection):
+        if self.pending.get(token) is not connection:
+            return
+        request = object()
+        connection['request'] = request
+        self.state_changed.emit(token, self.CONNECTING)
+
+        future = self.executor.submit(self.probe, connection['media_source'], connection['timeout'])
+        future.add_done_callback(
+            lambda f: self.probe_finished.emit(
+                token, request, f.result() if not f.cancelled() and f.exception() is None else None
+            )
+        )
+        # the worker cannot be interrupted, a late answer is just ignored
+        QtCore.QTimer.singleShot(
+            int(connection['timeout'] * 1000), lambda: self.__probe_finished(token, request, None)
+        )
+
+    def __probe_finished(self, token, request, capture):
+        connection = self.pending.get(token)
+        if connection is None or connection['request'] is not request:
+            if capture is not None:
+                capture.release()
+            return
+        connection['request'] = None
+
+        if capture is not None:
+            self.pending.pop(token)
+            self.state_changed.emit(token, self.CONNECTED)
+            self.connected.emit(token, capture)
+            return
+
+        delay = min(self.backoff * 2 ** connection['attempt'], self.max_backoff)
+        connection['attempt'] += 1
+        self.state_changed.emit(token, self.RETRYING)
+        QtCore.QTimer.singleShot(int(delay * 1000), lambda: self.__try(token, connection))
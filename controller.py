@@ -1,41 +1,46 @@
 from src.plugin_interface import PluginInterface
 from src.models.model_apps import Model, ModelApps
-from PyQt6 import QtWidgets, QtCore, QtGui
+from PyQt6 import QtWidgets, QtCore, QtGui, sip
+import os
 from .ui_main import Ui_Main
 from .ui_tile import Ui_Tile
-from .ui_setup import Ui_Setup
-from .QTileLayout6 import QTileLayout
+from .wall import WallWindow, new_tile_layout
+from .anypoint import MapCache, MapWorker, default_view, quadrant_views
+from .angles import AngleLookup, clear_angle_lookups, angle_lookups_usage, evict_angle_lookups
+from .cameras import camera_key, camera_moildev, camera_ratio, clear_cameras, moildevs_usage
+from .connector import SourceConnector
+from .tile_source import TileSource
+from .watchdog import StreamWatchdog
+from .session import load_session, save_session
+from .view_picker import ViewPicker
+from .setup_dialog import SetupDialog
+from .styles import StyleSheets, MAIN_ROLES
+from .icons import load_icons
+from .memory import MemoryBudget
 
-# for the setup dialog
-class SetupDialog(QtWidgets.QDialog):
-    def __init__(self):
-        super().__init__()
-    
-    # get the slot and signal of the result image (rectilinear) so it can be connected and display it continously
-    def setup_result_signal(self, slot, signal):
-        self.result_slot = slot
-        self.result_signal = signal
-        self.result_signal.connect(self.result_slot)
-
-    # get the slot and signal of the original image (fisheye) so it can be connected and display it continously
-    def setup_original_signal(self, slot, signal):
-        self.original_slot = slot
-        self.original_signal = signal
-        self.original_signal.connect(self.original_slot)
-
-    # Escape Key does not invoke closeEvent (to disconnect the signals and slots), so need to do it manually
-    def keyPressEvent(self, event):
-        if event.key() == QtCore.Qt.Key.Key_Escape:
-            self.close()  
-        else:
-            super().keyPressEvent(event)
+PLUGIN_DIR = os.path.dirname(__file__)
+SESSION_PATH = os.path.join(PLUGIN_DIR, 'session.json')
+MAPS_CACHE_DIR = os.path.join(PLUGIN_DIR, 'cache')
+# bytes the caches and frames of the plugin may use together
+MEMORY_BUDGET = 1024 * 2**20
+# bytes the maps of the tile views may take in MAPS_CACHE_DIR
+MAPS_CACHE_DISK = 512 * 2**20
+# seconds a source stays paused with its capture open, it is opened again by the connector after that
+SOURCE_RELEASE_DELAY = 30.0
 
-    # need to disconnect the signals and slots else RuntimeError: wrapped C/C++ object of type QLabel has been deleted
-    # because the QLabel's lifetime will be over when the Setup Dialog is closed but the previous slot and signal will still call it
-    def closeEvent(self, event):
-        self.result_signal.disconnect(self.result_slot)
-        self.original_signal.disconnect(self.original_slot)
-        super().closeEvent(event)
+# stops what runs in the background for the tiles: the reader threads of their sources (which release the
+# captures), the connections in progress, the map worker and the timers
+# it is given these rather than the Controller, so that it still runs once the Controller was deleted
+def stop_tiles_background(each_tile, connector, map_worker, watchdog, memory):
+    for tile in each_tile.values():
+        if tile['tile_source'] is not None:
+            tile['tile_source'].stop()
+    connector.shutdown()
+    map_worker.shutdown()
+    # at exit the timers may be deleted before the widget, they are stopped then
+    for timer in (watchdog.timer, memory.timer):
+        if not sip.isdeleted(timer):
+            timer.stop()
 
 
 class Controller(QtWidgets.QWidget):
@@ -44,6 +49,7 @@ class Controller(QtWidgets.QWidget):
         super().__init__()
         
         self.model = model
+        self.style_sheets = StyleSheets(model)
 
         self.ui = Ui_Main()
         self.ui.setupUi(self)
@@ -53,155 +59,926 @@ class Controller(QtWidgets.QWidget):
         self.ui.parameterButton.clicked.connect(self.parameter_clicked)
         self.ui.recordedButton.clicked.connect(self.recorded_clicked)
         self.ui.capturedButton.clicked.connect(self.captured_clicked)
+        self.ui.layoutComboBox.currentTextChanged.connect(self.layout_preset_changed)
+        self.ui.windowButton.clicked.connect(lambda : self.open_wall())
+        self.tile_layout_ready = False
 
-        # TODO make a 2x4, 3x4, and 1x1 configuration
-        row_number = 2
-        column_number = 4
-        vertical_span = 200
-        horizontal_span = 300
-        spacing = 5
-
-        self.tile_layout = QTileLayout(
-            rowNumber=row_number,
-            columnNumber=column_number,
-            verticalSpan=vertical_span,
-            horizontalSpan=horizontal_span,
-            verticalSpacing=spacing,
-            horizontalSpacing=spacing,
-        )
-        
-        self.tile_layout.acceptDragAndDrop(True)
-        self.tile_layout.acceptResizing(True)
-        self.tile_layout.setCursorIdle(QtCore.Qt.CursorShape.ArrowCursor)
-        self.tile_layout.setCursorGrab(QtCore.Qt.CursorShape.OpenHandCursor)
-        self.tile_layout.setCursorResizeHorizontal(QtCore.Qt.CursorShape.SizeHorCursor)
-        self.tile_layout.setCursorResizeVertical(QtCore.Qt.CursorShape.SizeVerCursor)
-        self.tile_layout.setColorIdle((240, 240, 240))
-        self.tile_layout.setColorResize((211, 211, 211))
-        self.tile_layout.setColorDragAndDrop((211, 211, 211))
-        self.tile_layout.setColorEmptyCheck((150, 150, 150))
-        self.tile_layout.activateFocus(False)
+        # the layout presets of layoutComboBox, as (row_number, column_number)
+        self.layout_presets = {'1x1': (1, 1), '2x4': (2, 4), '3x4': (3, 4)}
+
+        # this dictionary (it was previously a list) is to keep the ModelApps instance (created later) alive in this class object
+        # the tiles that do not fit in the current layout preset stay in it, with their source still running
+        self.each_tile = {}
+        # the WallWindows, whose tile layouts are linked with the one of this widget
+        self.walls = []
+        self.setup_dialog = None
+        # the wall as it was before a tile went fullscreen: {'tile', 'rows', 'columns', 'positions', 'preset'}
+        self.fullscreen = None
+        self.set_stylesheet()
+
+        # the widget is created when MoilApp loads the plugin, the tile layout, the map cache and the source
+        # handling are only built when it is shown for the first time
+        self.built = False
+
+    def showEvent(self, event):
+        if not self.built:
+            self.built = True
+            self.__build()
+        super().showEvent(event)
+
+    def __build(self):
+        load_icons()
+        row_number, column_number = self.layout_presets[self.ui.layoutComboBox.currentText()]
+        self.tile_layout = new_tile_layout(row_number, column_number)
 
         self.ui.scrollAreaWidgetContents.setLayout(self.tile_layout)
         self.ui.scrollArea.setWidgetResizable(True)
         self.ui.scrollArea.setContentsMargins(0, 0, 0, 0)
         self.ui.scrollArea.resizeEvent = self.__tileLayoutResize
-        vertical_margins = self.tile_layout.contentsMargins().top() + self.tile_layout.contentsMargins().bottom()
-        horizontal_margins = self.tile_layout.contentsMargins().left() + self.tile_layout.contentsMargins().right()
-        self.ui.scrollArea.setMinimumHeight(
-            row_number * vertical_span + (row_number - 1) * spacing + vertical_margins + 2
+        self.tile_layout.globalSizeSettled.connect(self.__tileLayoutSettled)
+        self.ui.scrollArea.horizontalScrollBar().valueChanged.connect(self.__tileLayoutViewport)
+        self.ui.scrollArea.verticalScrollBar().valueChanged.connect(self.__tileLayoutViewport)
+        self.__setScrollAreaMinimumSize()
+
+        self.tile_layout.tileMoved.connect(self.save_session)
+        self.tile_layout.tileMoved.connect(self.update_sources_activity)
+        self.tile_layout.tileResized.connect(self.save_session)
+        self.tile_layout.tileVisibilityChanged.connect(self.tile_visibility_changed)
+
+        # the anypoint views of the tiles are remapped by the plugin from the original (fisheye) frames
+        self.map_cache = MapCache(MAPS_CACHE_DIR, max_disk_bytes=MAPS_CACHE_DISK)
+        self.map_worker = MapWorker(self.map_cache)
+        self.map_worker.maps_ready.connect(self.tile_view_maps_ready)
+        self.map_worker.map_failed.connect(self.tile_view_maps_failed)
+        self.map_worker.dropped.connect(self.tile_view_maps_dropped)
+        # the views picked for the tiles whose maps are being computed: {widget_tile: (moildev, camera_key, view)}
+        self.pending_views = {}
+        # the maps go first when over the memory budget (the ones not used lately, i.e. of the tiles not shown),
+        # the frames and pixmaps of the tiles, the Moildevs and the maps of the view picker are only counted, the
+        # maps memory mapped from MAPS_CACHE_DIR are reported apart as the system drops their pages by itself
+        # the camera parameters (cameras.camera_configs) are a few numbers per camera and are left out, as are the
+        # empty tiles pooled by the tile layout, which are bounded by its grid
+        self.memory = MemoryBudget(MEMORY_BUDGET)
+        self.memory.register(
+            'derived maps', 0, lambda: self.map_cache.memory_usage(derived=True),
+            lambda nbytes: self.map_cache.evict(nbytes, derived=True),
         )
-        self.ui.scrollArea.setMinimumWidth(
-            column_number * horizontal_span + (column_number - 1) * spacing + horizontal_margins + 2
+        self.memory.register('maps', 1, self.map_cache.memory_usage, self.map_cache.evict)
+        self.memory.register(
+            'mapped maps', 1, lambda: self.map_cache.memory_usage(mapped=True),
+            lambda nbytes: self.map_cache.evict(nbytes, mapped=True), resident=False,
         )
+        self.memory.register('angle lookups', 2, angle_lookups_usage, evict_angle_lookups)
+        self.memory.register('picker maps', 3, self.picker_memory_usage)
+        self.memory.register('moildevs', 3, self.moildevs_memory_usage)
+        self.memory.register('frames', 3, self.frames_memory_usage)
+        # the sources are opened in the background, a tile shows its connection state until its source answers
+        self.connector = SourceConnector()
+        self.connector.state_changed.connect(self.tile_source_state)
+        self.connector.connected.connect(self.tile_source_connected)
+        # stalled streams are restarted through the connector
+        self.watchdog = StreamWatchdog(stall_timeout=5.0, min_fps=2.0, max_restarts=5, restart_window=300.0)
+        self.watchdog.state_changed.connect(self.tile_stream_state)
+        self.watchdog.restart.connect(self.restart_tile_source)
 
-        # this dictionary (it was previously a list) is to keep the ModelApps instance (created later) alive in this class object
-        self.each_tile = {}
-        self.set_stylesheet()
+        # the widget may be deleted without being closed (e.g. by MoilApp), the background stops either way
+        each_tile, connector, map_worker, watchdog, memory = (
+            self.each_tile, self.connector, self.map_worker, self.watchdog, self.memory
+        )
+        self.destroyed.connect(lambda: stop_tiles_background(each_tile, connector, map_worker, watchdog, memory))
+        QtCore.QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+        # the wall of the previous run is rebuilt once the widget is shown
+        QtCore.QTimer.singleShot(0, self.restore_session)
+
+    def closeEvent(self, event):
+        self.shutdown()
+        super().closeEvent(event)
+
+    # the sources, the workers and the timers are stopped for good, the wall windows are closed with the widget
+    # and stay in the session (it is not saved once they are closed)
+    def shutdown(self):
+        if not self.built:
+            return
+        for wall in self.walls:
+            wall.blockSignals(True)
+            wall.close()
+        stop_tiles_background(self.each_tile, self.connector, self.map_worker, self.watchdog, self.memory)
     
-    # find every QPushButton, QLabel, QScrollArea, and Line, this works because this class is a subclass of QWidget
+    # one stylesheet for every QPushButton, QLabel, QScrollArea, QComboBox and QSlider, set on this widget
+    # so that all its children, the tiles too, get it (see StyleSheets), and the Line
     def set_stylesheet(self):
-        [button.setStyleSheet(self.model.style_pushbutton()) for button in self.findChildren(QtWidgets.QPushButton)]
-        [label.setStyleSheet(self.model.style_label()) for label in self.findChildren(QtWidgets.QLabel)]
-        [scroll_area.setStyleSheet(self.model.style_scroll_area()) for scroll_area in self.findChildren(QtWidgets.QScrollArea)]
+        self.style_sheets.apply(self, MAIN_ROLES)
         self.ui.line.setStyleSheet(self.model.style_line())
+        if self.setup_dialog is not None:
+            self.setup_dialog.set_stylesheet()
     
     # create new widget with ui_tile design and add it into the tile_layout
+    # a full layout is told at the button, the source is only asked for when there is a cell for it
     def add_clicked(self):
+        free_area = self.tile_layout.findFreeArea(1, 1)
+        if free_area is None:
+            QtWidgets.QToolTip.showText(
+                self.ui.addButton.mapToGlobal(self.ui.addButton.rect().center()),
+                'No free tile left, pick a bigger layout or close a tile', self.ui.addButton,
+            )
+            return
+        source = self.select_media_source()
+        if source is None:
+            return
+
+        widget_tile = self.create_tile(*free_area)
+        self.connect_tile_source(widget_tile, source)
+        self.save_session()
+
+    # None when the selection was cancelled (the connector would retry an empty media source for ever)
+    def select_media_source(self):
+        source = self.model.select_media_source()
+        if not source or not source[2]:
+            return None
+        return source
+
+    # the tile is empty until open_tile_source gives it a source
+    # the tile goes in the main wall unless tile_layout is the one of a WallWindow
+    # a tile created with group shows one more anypoint view of the source of that group (see add_view_group)
+    def create_tile(self, i_row, i_column, row_span=1, column_span=1, view=None, group=None, tile_layout=None):
         widget_tile = QtWidgets.QWidget()
+        if group is None:
+            # the frames of the source go through ModelApps (see TileSource), the moildev of the camera is shared
+            model_apps = ModelApps()
+        else:
+            model_apps = self.each_tile[group]['model_apps']
+
+        # to make the model_apps instance alive, 'width' is the display width the frames are scaled to
+        # 'ui' is the Ui_Tile of the tile while it is visible, None otherwise (see update_tile_ui), 'text' and
+        # 'tool_tip' are the ones of its label, which it gets back when it is built again
+        # 'source' is what set_media_source got and 'view' the anypoint view of the tile (None shows the result of ModelApps)
+        # 'stream' is the last frame time, frame rate and state kept by the watchdog once the source is open
+        # 'tile_source' pauses and stops the source of the ModelApps (see TileSource), None for the views of a group
+        # 'released' tells that its capture was released after a long pause (see pause_tile_source)
+        # 'group' is the tile owning the source shared by the views of a group (the owner itself included), else None
+        # 'camera' is the (moildev, camera_key) of the source, see tile_camera
+        self.each_tile[widget_tile] = {
+            'model_apps' : model_apps, 'ui' : None, 'text' : '', 'tool_tip' : '', 'width' : 300, 'source' : None,
+            'view' : view, 'stream' : None, 'tile_source' : TileSource(model_apps) if group is None else None,
+            'released' : False, 'group' : group, 'camera' : None,
+        }
+        self.build_tile_ui(widget_tile)
+
+        if tile_layout is None:
+            tile_layout = self.tile_layout
+        if i_row is not None:
+            tile_layout.addWidget(
+                widget=widget_tile,
+                fromRow=i_row,
+                fromColumn=i_column,
+                rowSpan=row_span,
+                columnSpan=column_span,
+            )
+        else:
+            widget_tile.setParent(self.ui.scrollAreaWidgetContents)
+            widget_tile.hide()
+
+        # the frames of a group are only received by its owner, which renders all the views of the group
+        if group is None:
+            model_apps.image_result.connect(lambda img: self.show_tile_frame(widget_tile, img))
+            model_apps.signal_image_original.connect(lambda img: self.show_tile_view(widget_tile, img))
+        return widget_tile
+
+    # the widgets of the tile (see Ui_Tile), its label gets back the text and the tooltip it had
+    def build_tile_ui(self, widget_tile):
+        tile = self.each_tile[widget_tile]
         ui_tile = Ui_Tile()
         ui_tile.setupUi(widget_tile)
-        [w.setStyleSheet(self.model.style_label()) for w in widget_tile.findChildren(QtWidgets.QLabel)]
-        [w.setStyleSheet(self.model.style_pushbutton()) for w in widget_tile.findChildren(QtWidgets.QPushButton)]
-        [w.setStyleSheet(self.model.style_slider()) for w in widget_tile.findChildren(QtWidgets.QSlider)]
-        
-        i_row, i_column = 0, 0
-        while not self.tile_layout.isAreaEmpty(i_row, i_column, 1, 1):
-            i_column += 1
-            if i_column > 4:
-                i_row = (i_row + 1) % 2
-                i_column = 0
-
-        self.tile_layout.addWidget(
-            widget=widget_tile,
-            fromRow=i_row,
-            fromColumn=i_column,
-        )        
-
-        # I have no idea how this works but I think the order of calling these is important
-        model_apps = ModelApps()
-        model_apps.create_moildev()
-        model_apps.create_image_original()
-        model_apps.update_file_config()
-        source_type, cam_type, media_source, params_name = self.model.select_media_source()
-        model_apps.set_media_source(source_type, cam_type, media_source, params_name)
+        ui_tile.videoLabel.setText(tile['text'])
+        ui_tile.videoLabel.setToolTip(tile['tool_tip'])
+        ui_tile.setupButton.clicked.connect(lambda : self.setup_tile(widget_tile, ui_tile, tile['model_apps']))
+        ui_tile.fullscreenButton.clicked.connect(lambda : self.toggle_fullscreen(widget_tile))
+        ui_tile.pushButton.clicked.connect(lambda : self.close_tile(widget_tile))
+        tile['ui'] = ui_tile
+
+    # a wall of many cameras only keeps the widgets of the tiles on screen: a tile scrolled out of its wall, out of
+    # the layout preset or behind a fullscreen tile is left empty, it is built again when it is back
+    # returns True if the tile was built again, its last frame is to be drawn
+    def update_tile_ui(self, widget_tile):
+        tile = self.each_tile[widget_tile]
+        if self.is_tile_visible(widget_tile):
+            if tile['ui'] is None:
+                self.build_tile_ui(widget_tile)
+                return True
+        elif tile['ui'] is not None:
+            tile['ui'] = None
+            for child in widget_tile.findChildren(
+                QtWidgets.QWidget, options=QtCore.Qt.FindChildOption.FindDirectChildrenOnly
+            ):
+                child.hide()
+                child.deleteLater()
+            # the layout goes at once, so that the tile can be built again before the next event loop
+            sip.delete(widget_tile.layout())
+        return False
+
+    # the text of the label of the tile, kept while the tile is not built
+    def set_tile_text(self, widget_tile, text):
+        tile = self.each_tile[widget_tile]
+        tile['text'] = text
+        if tile['ui'] is not None:
+            tile['ui'].videoLabel.setText(text)
+
+    def set_tile_tool_tip(self, widget_tile, tool_tip):
+        tile = self.each_tile[widget_tile]
+        tile['tool_tip'] = tool_tip
+        if tile['ui'] is not None:
+            tile['ui'].videoLabel.setToolTip(tool_tip)
+
+    # the tile is taken out of the layout and deleted with everything it holds: closing the owner of a view group
+    # closes the whole group and its source, closing another view of the group only removes that view
+    def close_tile(self, widget_tile):
+        if widget_tile not in self.each_tile:
+            return
+        if self.fullscreen is not None:
+            self.toggle_fullscreen(self.fullscreen['tile'])
+
+        owner = self.source_tile(widget_tile)
+        widget_tiles = self.group_tiles(widget_tile) if owner is widget_tile else [widget_tile]
+        camera = self.each_tile[owner]['camera']
+        views = [self.each_tile[w]['view'] for w in widget_tiles if self.each_tile[w]['view'] is not None]
+        if owner is widget_tile:
+            self.close_tile_source(widget_tile)
+
+        self.tile_layout.beginUpdate()
+        for w in widget_tiles:
+            tile_layout = self.tile_layout_of(w)
+            if tile_layout is not None:
+                tile_layout.removeWidget(w)
+            w.deleteLater()
+            del self.each_tile[w]
+        self.tile_layout.endUpdate()
+
+        if camera is not None:
+            self.discard_view_maps(camera[1], views)
+        self.update_sources_activity()
+        self.save_session()
+
+    # the source is stopped for good and its ModelApps no longer calls the tile
+    def close_tile_source(self, widget_tile):
+        self.connector.cancel(widget_tile)
+        self.watchdog.unwatch(widget_tile)
+        self.stop_tile_source(widget_tile)
+        model_apps = self.each_tile[widget_tile]['model_apps']
+        model_apps.image_result.disconnect()
+        model_apps.signal_image_original.disconnect()
+
+    # frees the maps of the views that no other tile of the camera shows nor waits for, the ones the map worker was
+    # still to compute are cancelled
+    def discard_view_maps(self, camera_key, views):
+        shown_views = [
+            tile['view'] for w, tile in self.each_tile.items()
+            if tile['view'] is not None and self.each_tile[self.source_tile(w)]['camera'] is not None
+            and self.each_tile[self.source_tile(w)]['camera'][1] == camera_key
+        ] + [pending['view'] for pending in self.pending_views.values() if pending['camera_key'] == camera_key]
+        views = [view for view in views if view not in shown_views]
+        for view in views:
+            self.map_cache.discard(camera_key, view)
+        self.map_worker.cancel(camera_key, views)
+
+    # one source split into several anypoint views (e.g. the quadrants of a 360 degree fisheye), each in its own tile
+    # the source is decoded once and every view of a frame is computed in one batched remap
+    def add_view_group(self, source, views):
+        widget_tiles = []
+        for view in views:
+            free_area = self.tile_layout.findFreeArea(1, 1) or (None, None)
+            group = widget_tiles[0] if widget_tiles else None
+            widget_tiles.append(self.create_tile(*free_area, view=dict(view), group=group))
+        self.each_tile[widget_tiles[0]]['group'] = widget_tiles[0]
+        self.connect_tile_source(widget_tiles[0], source)
+        return widget_tiles
+
+    # the tile owning the source that a tile shows
+    def source_tile(self, widget_tile):
+        return self.each_tile[widget_tile]['group'] or widget_tile
+
+    # the tiles showing the source of widget_tile
+    def group_tiles(self, widget_tile):
+        owner = self.source_tile(widget_tile)
+        return [w for w, tile in self.each_tile.items() if w is owner or tile['group'] is owner]
+
+    # the tile layouts of the main wall and of the wall windows
+    def tile_layouts(self):
+        return [self.tile_layout] + [wall.tile_layout for wall in self.walls]
+
+    # the tile layout holding the tile, None for a tile that does not fit in the main wall
+    def tile_layout_of(self, widget_tile):
+        for tile_layout in self.tile_layouts():
+            if tile_layout.hasWidget(widget_tile):
+                return tile_layout
+        return None
+
+    # frames of the tiles scrolled out of the viewport of their wall are not rendered
+    def is_tile_visible(self, widget_tile):
+        return any(tile_layout.isWidgetVisible(widget_tile) for tile_layout in self.tile_layouts())
+
+    # a tile scrolled out of its wall keeps no widgets, the last frame of its source is drawn again when it is back
+    def tile_visibility_changed(self, widget_tile, visible):
+        if widget_tile not in self.each_tile:
+            return
+        self.update_source_activity(widget_tile)
+
+    # a source is read while one of its tiles is visible, in the main wall or in a wall window, it is paused
+    # while none is: scrolled out of the wall, out of the layout preset, or behind a fullscreen tile
+    # the tiles of the source are built or emptied the same way (see update_tile_ui)
+    def update_source_activity(self, widget_tile):
+        owner = self.source_tile(widget_tile)
+        # every tile of a group is built before one is drawn, a group draws all its visible views at once
+        for w in [w for w in self.group_tiles(owner) if self.update_tile_ui(w)]:
+            self.redraw_tile(w)
+        visible = any(self.is_tile_visible(w) for w in self.group_tiles(owner))
+        if self.each_tile[owner]['released']:
+            if visible:
+                self.each_tile[owner]['released'] = False
+                self.connector.connect_source(owner, self.each_tile[owner]['source'][2])
+            return
+        if self.each_tile[owner]['tile_source'].reader is None:
+            # an image, or a source the connector has not opened yet
+            return
+        if visible and self.each_tile[owner]['tile_source'].paused:
+            self.resume_tile_source(owner)
+        elif not visible and not self.each_tile[owner]['tile_source'].paused:
+            self.pause_tile_source(owner)
+
+    # after tiles were moved between or out of the tile layouts
+    def update_sources_activity(self, *args):
+        for widget_tile in list(self.each_tile):
+            if widget_tile is self.source_tile(widget_tile):
+                self.update_source_activity(widget_tile)
+
+    # opening a camera can block for seconds, so the connector opens it in the background and the tile reads
+    # from the capture it opened (see open_tile_source)
+    def connect_tile_source(self, widget_tile, source):
+        self.each_tile[widget_tile]['source'] = list(source)
+        self.each_tile[widget_tile]['camera'] = None
+        self.connector.connect_source(widget_tile, source[2])
+
+    def open_tile_source(self, widget_tile, source, capture=None):
+        tile = self.each_tile[widget_tile]
+        tile['source'] = list(source)
+        # the frames, the only one of an image too, are shown through the image_result signal
+        tile['tile_source'].open(source, capture)
         # model_apps.create_maps_fov() # no clue what this does
-        
-        model_apps.image_result.connect(lambda img: self.update_label_image(img, ui_tile.videoLabel))
-        # the above is sufficient if wanting to display videos, but the below one is needed to display images
-        self.update_label_image(model_apps.image, ui_tile.videoLabel)
-        
-        ui_tile.setupButton.clicked.connect(lambda : self.setup_tile(widget_tile, ui_tile, model_apps))
 
-        # to make the model_apps instance alive 
-        self.each_tile[widget_tile] = {'model_apps' : model_apps, 'ui' : ui_tile}
+    def show_tile_frame(self, widget_tile, image):
+        self.watchdog.frame(widget_tile)
+        tile = self.each_tile[widget_tile]
+        if tile['view'] is not None or not self.is_tile_visible(widget_tile):
+            return
+        self.update_label_image(image, tile['ui'].videoLabel, self.display_width(widget_tile))
+
+    # the width the frames of the tile are scaled to: the fullscreen tile is shown at the size of its label right away,
+    # the other ones at their width from the last time the layout settled
+    def display_width(self, widget_tile):
+        if self.fullscreen is not None and self.fullscreen['tile'] is widget_tile:
+            return max(self.each_tile[widget_tile]['ui'].videoLabel.width(), self.each_tile[widget_tile]['width'])
+        return self.each_tile[widget_tile]['width']
+
+    # tiles with an anypoint view remap the original frame with the cached maps of their view
+    # the maps of the wall are scaled down to the tile width, only the fullscreen tile gets the full resolution ones
+    def show_tile_view(self, widget_tile, image):
+        tile = self.each_tile[widget_tile]
+        if tile['group'] is widget_tile:
+            self.show_group_views(widget_tile, image)
+            return
+        if tile['view'] is None or image is None or not self.is_tile_visible(widget_tile):
+            return
+        try:
+            moildev, camera_key = self.tile_camera(widget_tile)
+        except ValueError as error:
+            self.set_tile_text(widget_tile, str(error))
+            return
+        width = None if self.fullscreen is not None and self.fullscreen['tile'] is widget_tile else tile['width']
+        view_image = self.map_cache.remap(image, camera_key, tile['view'], width)
+        if view_image is None:
+            # the frame is skipped, the tile is drawn again once its maps are ready (see tile_view_maps_ready)
+            self.map_worker.fetch(moildev, camera_key, tile['view'], width)
+            return
+        self.update_label_image(view_image, tile['ui'].videoLabel, self.display_width(widget_tile))
+
+    # only the visible views of the group are computed, all of them with the same maps width
+    def show_group_views(self, widget_tile, image):
+        widget_tiles = [w for w in self.group_tiles(widget_tile) if self.is_tile_visible(w)]
+        if image is None or not widget_tiles:
+            return
+        try:
+            moildev, camera_key = self.tile_camera(widget_tile)
+        except ValueError as error:
+            for w in widget_tiles:
+                self.set_tile_text(w, str(error))
+            return
+        if self.fullscreen is not None and self.fullscreen['tile'] in widget_tiles:
+            width = None
+        else:
+            width = max(self.each_tile[w]['width'] for w in widget_tiles)
+        views = [self.each_tile[w]['view'] for w in widget_tiles]
+        images = self.map_cache.remap_views(image, camera_key, views, width)
+        if images is None:
+            for view in views:
+                if self.map_cache.find(camera_key, view, width) is None:
+                    self.map_worker.fetch(moildev, camera_key, view, width)
+            return
+        for w, view_image in zip(widget_tiles, images):
+            self.update_label_image(view_image, self.each_tile[w]['ui'].videoLabel, self.display_width(w))
+
+    # the last frame of the source again, e.g. the only one of an image
+    def redraw_tile(self, widget_tile):
+        image = self.each_tile[self.source_tile(widget_tile)]['model_apps'].image
+        if image is None:
+            return
+        if self.each_tile[widget_tile]['view'] is None:
+            self.update_label_image(image, self.each_tile[widget_tile]['ui'].videoLabel, self.display_width(widget_tile))
+        else:
+            self.show_tile_view(self.source_tile(widget_tile), image)
 
     def update_label_image(self, image, ui_label, width=300, scale_content=False):
         self.model.show_image_to_label(ui_label, image, width=width, scale_content=scale_content)
 
+    # the setup dialog is made the first time it is needed, then reused for every tile
     def setup_tile(self, widget_tile, ui_tile, model_apps : ModelApps):
-        ui_setup = Ui_Setup()
-        dialog = SetupDialog()
-        ui_setup.setupUi(dialog)
-        [label.setStyleSheet(self.model.style_label()) for label in dialog.findChildren(QtWidgets.QLabel)]
-        [button.setStyleSheet(self.model.style_pushbutton()) for button in dialog.findChildren(QtWidgets.QPushButton)]
-        [spinbox.setStyleSheet(self.model.style_spinbox()) for spinbox in dialog.findChildren(QtWidgets.QSpinBox)]
-        [combobox.setStyleSheet(self.model.style_combobox()) for combobox in dialog.findChildren(QtWidgets.QComboBox)]
-
-        # setup and gracefully close the slots and signals of image_result and signal_image_original from ModelApps
-        update_result_label_slot = lambda img: self.update_label_image(img, ui_setup.label_image_result, 300, False)
-        dialog.setup_result_signal(update_result_label_slot, model_apps.image_result)
-        update_original_label_slot = lambda img: self.update_label_image(img, ui_setup.label_image_original, 300, False)
-        dialog.setup_original_signal(update_original_label_slot, model_apps.signal_image_original)
-        
-        model_apps.alpha_beta.connect(self.alpha_beta_from_coordinate)
-        model_apps.state_rubberband = False # no idea what this is
-
-        # set up Anypoint Mode 1 with state_recent_view = "AnypointView"
-        # and change_anypoint_mode = "mode_1" then create_maps_anypoint_mode_1()
-        model_apps.state_recent_view = "AnypointView"
-        model_apps.change_anypoint_mode = "mode_1"
-        model_apps.set_draw_polygon = True
-        model_apps.create_maps_anypoint_mode_1()
-
-        # setup mouse events
-        # just mouseMoveEvent is sufficient but without mousePressEvent, it will be laggy (on my machine, YMMV)
-        # ui_setup.label_image_original.mouseReleaseEvent = 
-        ui_setup.label_image_original.mouseMoveEvent = lambda event: model_apps.label_original_mouse_move_event(ui_setup.label_image_original, event)
-        ui_setup.label_image_original.mousePressEvent = lambda event: model_apps.label_original_mouse_move_event(ui_setup.label_image_original, event)
-        ui_setup.label_image_original.leaveEvent = lambda event: model_apps.label_original_mouse_leave_event()
-        # ui_setup.label_image_original.mouseDoubleClickEvent = 
+        source = self.each_tile[self.source_tile(widget_tile)]['source']
+        if source is None:
+            ui_tile.videoLabel.setText('No source to set up yet')
+            return
+        try:
+            camera = self.tile_camera(widget_tile)
+        except ValueError as error:
+            ui_tile.videoLabel.setText(str(error))
+            return
+        if self.setup_dialog is None:
+            self.setup_dialog = SetupDialog(self.model, self.style_sheets)
+            self.setup_dialog.alpha_beta.connect(self.alpha_beta_from_coordinate)
+
+        # the view picked in the dialog is rendered by the plugin from the original frames (like the tile views),
+        # it becomes the tile view when okButton is clicked, the ModelApps of the tile is left as it is
+        # its preview maps come from the lens model of the camera, which only holds for a ratio of 1
+        angle_lookup = self.angle_lookup(widget_tile)
+        picker = ViewPicker(
+            self.map_cache, *camera,
+            self.each_tile[widget_tile]['view'] or default_view(), self.setup_dialog.ui.label_image_result.minimumWidth(),
+            angle_lookup if camera_ratio(source[1], source[3]) == 1 else None,
+        )
+        self.setup_dialog.bind(picker, angle_lookup, model_apps.signal_image_original, model_apps.image)
 
         # start setup dialog    
-        dialog.exec()
+        if self.setup_dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
+            self.commit_tile_view(widget_tile, dict(picker.view))
+
+    # the tile switches to the new view at once, when the maps of the view are ready, so its frames never wait for them
+    # a tile waits for one view at most, the one picked last
+    def commit_tile_view(self, widget_tile, view):
+        tile = self.each_tile[widget_tile]
+        moildev, camera_key = self.tile_camera(widget_tile)
+        if self.map_cache.find(camera_key, view, tile['width']) is not None:
+            self.pending_views.pop(widget_tile, None)
+            tile['view'] = view
+            self.save_session()
+        else:
+            self.pending_views[widget_tile] = {'moildev': moildev, 'camera_key': camera_key, 'view': view, 'requested': True}
+            self.map_worker.request(moildev, camera_key, view, tile['width'])
+
+    # the worker tells the view only, the tiles of another camera waiting for the same view find no maps yet
+    # the tiles showing the view whose frames were skipped for want of its maps are drawn again
+    def tile_view_maps_ready(self, view):
+        committed = False
+        for widget_tile, pending in list(self.pending_views.items()):
+            if widget_tile not in self.each_tile:
+                del self.pending_views[widget_tile]
+            elif pending['view'] == view and self.map_cache.find(pending['camera_key'], view) is not None:
+                del self.pending_views[widget_tile]
+                self.each_tile[widget_tile]['view'] = view
+                committed = True
+        if committed:
+            self.save_session()
+        for widget_tile, tile in self.each_tile.items():
+            if tile['view'] == view and self.is_tile_visible(widget_tile):
+                self.redraw_tile(widget_tile)
+        self.request_pending_view()
+
+    # the tile keeps its previous view, the tiles already showing the view tell it
+    def tile_view_maps_failed(self, view):
+        for widget_tile, tile in self.each_tile.items():
+            if tile['view'] == view:
+                self.set_tile_text(widget_tile, 'The maps of the view could not be computed')
+        for widget_tile, pending in list(self.pending_views.items()):
+            if pending['view'] != view or not pending['requested']:
+                continue
+            del self.pending_views[widget_tile]
+            if widget_tile in self.each_tile:
+                self.set_tile_tool_tip(
+                    widget_tile, 'The maps of the view could not be computed, the tile keeps its previous view'
+                )
+                if self.each_tile[widget_tile]['ui'] is not None:
+                    video_label = self.each_tile[widget_tile]['ui'].videoLabel
+                    QtWidgets.QToolTip.showText(
+                        video_label.mapToGlobal(video_label.rect().center()), video_label.toolTip(), video_label
+                    )
+        self.request_pending_view()
+
+    # the view was skipped by the worker for a later request (of another tile)
+    def tile_view_maps_dropped(self, view):
+        for pending in self.pending_views.values():
+            if pending['view'] == view:
+                pending['requested'] = False
+
+    # a skipped view is requested again once the worker has nothing else to compute, so that two tiles waiting for
+    # their views never keep skipping each other
+    def request_pending_view(self):
+        if self.map_worker.pending is not None:
+            return
+        for widget_tile, pending in list(self.pending_views.items()):
+            if widget_tile not in self.each_tile:
+                del self.pending_views[widget_tile]
+            elif not pending['requested']:
+                pending['requested'] = True
+                self.map_worker.request(
+                    pending['moildev'], pending['camera_key'], pending['view'], self.each_tile[widget_tile]['width']
+                )
+                return
+
+    # pixel positions of the source of the tile to alpha/beta and back, for single points or whole arrays
+    # (e.g. the detection boxes of a frame), the table is made once per camera
+    def angle_lookup(self, widget_tile):
+        return AngleLookup.for_camera(*self.tile_camera(widget_tile))
+
+    # the last frame of every source and the pixmap of every tile
+    def frames_memory_usage(self):
+        usage = 0
+        for widget_tile, tile in self.each_tile.items():
+            image = tile['model_apps'].image
+            if widget_tile is self.source_tile(widget_tile) and image is not None:
+                usage += image.nbytes
+            pixmap = tile['ui'].videoLabel.pixmap() if tile['ui'] is not None else None
+            if pixmap is not None:
+                usage += pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        return usage
+
+    # the Moildevs of the cameras and the ones of the ModelApps of the tiles whose parameter file cannot be read
+    def moildevs_memory_usage(self):
+        return moildevs_usage(
+            tile['tile_source'].model_apps.moildev for tile in self.each_tile.values()
+            if tile['tile_source'] is not None and tile['tile_source'].model_apps_set_up
+        )
+
+    # the maps of the view being picked, there are none once the setup dialog is closed
+    def picker_memory_usage(self):
+        if self.setup_dialog is None or self.setup_dialog.picker is None:
+            return 0
+        return self.setup_dialog.picker.memory_usage()
+
+    # the moildev of the camera of the tile source is shared by every tile of that camera (see cameras.py), the
+    # ModelApps moildev is only set up when the camera parameter file cannot be read
+    # a parameter file with missing or broken parameters raises a ValueError, which the tile shows
+    def tile_camera(self, widget_tile):
+        tile = self.each_tile[self.source_tile(widget_tile)]
+        if tile['camera'] is None:
+            cam_type, params_name = tile['source'][1], tile['source'][3]
+            moildev = camera_moildev(cam_type, params_name) or tile['tile_source'].model_apps_moildev()
+            tile['camera'] = (moildev, camera_key(cam_type, params_name))
+        return tile['camera']
 
     def alpha_beta_from_coordinate(self, alpha_beta):
         print(alpha_beta)
 
+    # before the first show the preset is only read when the tile layout is built
+    def layout_preset_changed(self, preset):
+        if not self.built:
+            return
+        if self.fullscreen is not None:
+            self.toggle_fullscreen(self.fullscreen['tile'])
+            self.set_layout_preset_text(preset)
+        self.apply_layout_preset(*self.layout_presets[preset])
+
+    # layoutComboBox shows the preset without applying it
+    def set_layout_preset_text(self, preset):
+        self.ui.layoutComboBox.blockSignals(True)
+        if preset in self.layout_presets:
+            self.ui.layoutComboBox.setCurrentText(preset)
+        self.ui.layoutComboBox.blockSignals(False)
+
+    # the tile takes the whole wall with full resolution maps, the other tiles are paused until it goes back
+    # (see update_source_activity), the sources shown in a wall window keep streaming
+    # the wall windows are a wall per monitor already, only the tiles of the main wall go fullscreen
+    def toggle_fullscreen(self, widget_tile):
+        if self.fullscreen is None:
+            if self.tile_layout_of(widget_tile) is not self.tile_layout:
+                return
+            self.fullscreen = {
+                'tile': widget_tile,
+                'rows': self.tile_layout.rowCount(),
+                'columns': self.tile_layout.columnCount(),
+                'positions': {w: self.tile_layout.widgetPosition(w) for w in self.tile_layout.widgetList()},
+                'preset': self.ui.layoutComboBox.currentText(),
+            }
+            self.set_layout_preset_text('1x1')
+            self.apply_layout_preset(1, 1, focus_tile=widget_tile)
+        else:
+            fullscreen, self.fullscreen = self.fullscreen, None
+            self.set_layout_preset_text(fullscreen['preset'])
+            self.apply_layout_preset(fullscreen['rows'], fullscreen['columns'], positions=fullscreen['positions'])
+
+    # another wall in its own window, on a screen without one if there is any
+    # a restored wall window goes back to its screen (with the geometry it had there) if that screen is still plugged,
+    # otherwise, like a new one, to the first screen not showing a wall yet
+    def open_wall(self, row_number=2, column_number=2, screen_name=None, geometry=None):
+        wall = WallWindow(row_number, column_number, self)
+        for tile_layout in self.tile_layouts():
+            tile_layout.linkLayout(wall.tile_layout)
+        wall.tile_layout.tileMoved.connect(self.save_session)
+        wall.tile_layout.tileMoved.connect(self.update_sources_activity)
+        wall.tile_layout.tileResized.connect(self.save_session)
+        wall.tile_layout.tileVisibilityChanged.connect(self.tile_visibility_changed)
+        wall.tile_layout.globalSizeSettled.connect(self.__tileLayoutSettled)
+        wall.closed.connect(self.close_wall)
+        wall.placed.connect(self.save_session)
+
+        screens = {screen.name(): screen for screen in QtGui.QGuiApplication.screens()}
+        if screen_name in screens:
+            saved_geometry = QtCore.QRect(*geometry) if geometry is not None else QtCore.QRect()
+            if screens[screen_name].availableGeometry().intersects(saved_geometry):
+                wall.setGeometry(saved_geometry)
+            else:
+                wall.setGeometry(screens[screen_name].availableGeometry())
+        else:
+            used_screens = [self.screen()] + [other_wall.screen() for other_wall in self.walls]
+            free_screens = [screen for screen in screens.values() if screen not in used_screens]
+            if free_screens:
+                wall.setGeometry(free_screens[0].availableGeometry())
+        self.walls.append(wall)
+        wall.show()
+        self.save_session()
+        return wall
+
+    # the tiles of a closed wall window go back to the main wall, the ones that do not fit in it are hidden and their
+    # sources paused like the other tiles not shown (see update_source_activity)
+    def close_wall(self, wall):
+        if wall not in self.walls:
+            return
+        self.walls.remove(wall)
+        widget_tiles = wall.tile_layout.widgetList()
+        wall.tile_layout.beginUpdate()
+        for widget_tile in widget_tiles:
+            wall.tile_layout.removeWidget(widget_tile)
+            # keep the widget alive, its tile is going away
+            widget_tile.setParent(self.ui.scrollAreaWidgetContents)
+        wall.tile_layout.endUpdate()
+        for tile_layout in self.tile_layouts():
+            tile_layout.unLinkLayout(wall.tile_layout)
+
+        self.tile_layout.beginUpdate()
+        for widget_tile in widget_tiles:
+            free_area = self.tile_layout.findFreeArea(1, 1)
+            if free_area is None:
+                widget_tile.hide()
+                continue
+            self.tile_layout.addWidget(widget_tile, *free_area)
+            widget_tile.show()
+        self.tile_layout.endUpdate()
+        wall.deleteLater()
+        self.update_sources_activity()
+        self.save_session()
+
+    # reshape the tile layout and move the existing tiles into the new cells, in one batch so it costs one relayout
+    # the sources of the tiles are left untouched, the tiles that do not fit are only taken out of the layout
+    # the tiles of the wall windows stay where they are
+    # focus_tile, if given, gets the first cell (e.g. to show one camera in 1x1)
+    # positions, if given, puts the tiles back where they were: {widget_tile: (row, column, row_span, column_span)}
+    def apply_layout_preset(self, row_number, column_number, focus_tile=None, positions=None):
+        widget_tiles = self.tile_layout.widgetList() + [w for w in self.each_tile if self.tile_layout_of(w) is None]
+        if focus_tile is not None:
+            widget_tiles.remove(focus_tile)
+            widget_tiles.insert(0, focus_tile)
+
+        self.tile_layout.beginUpdate()
+        for widget_tile in self.tile_layout.widgetList():
+            self.tile_layout.removeWidget(widget_tile)
+            # keep the widget alive, its tile is going away
+            widget_tile.setParent(self.ui.scrollAreaWidgetContents)
+
+        if row_number > self.tile_layout.rowCount():
+            self.tile_layout.addRows(row_number - self.tile_layout.rowCount())
+        elif row_number < self.tile_layout.rowCount():
+            self.tile_layout.removeRows(self.tile_layout.rowCount() - row_number)
+        if column_number > self.tile_layout.columnCount():
+            self.tile_layout.addColumns(column_number - self.tile_layout.columnCount())
+        elif column_number < self.tile_layout.columnCount():
+            self.tile_layout.removeColumns(self.tile_layout.columnCount() - column_number)
+
+        for widget_tile in widget_tiles:
+            if positions is not None:
+                free_area = positions.get(widget_tile)
+            else:
+                free_area = self.tile_layout.findFreeArea(1, 1)
+            if free_area is None:
+                widget_tile.hide()
+                continue
+            self.tile_layout.addWidget(widget_tile, *free_area)
+            widget_tile.show()
+        self.tile_layout.endUpdate()
+
+        self.__setScrollAreaMinimumSize()
+        self.tile_layout.updateGlobalSize(QtGui.QResizeEvent(self.ui.scrollArea.size(), self.ui.scrollArea.size()))
+        self.update_sources_activity()
+        self.save_session()
+
+    # the tiles are saved with their place in the layout (of the main wall or of a wall window), their source
+    # and their anypoint view
+    # the tiles of a view group share a 'group' number, the owner of the group is saved first
+    # the wall is not saved while a tile is fullscreen, the session keeps the wall to go back to
+    def save_session(self, *args):
+        if not self.tile_layout_ready or self.fullscreen is not None:
+            return
+        tiles = []
+        groups = {}
+        for widget_tile, tile in self.each_tile.items():
+            source = self.each_tile[self.source_tile(widget_tile)]['source']
+            if source is None:
+                continue
+            group = groups.setdefault(tile['group'], len(groups)) if tile['group'] is not None else None
+            tile_layout = self.tile_layout_of(widget_tile)
+            if tile_layout is not None:
+                row, column, row_span, column_span = tile_layout.widgetPosition(widget_tile)
+            else:
+                row, column, row_span, column_span = None, None, 1, 1
+            wall = self.tile_layouts().index(tile_layout) - 1 if tile_layout not in (None, self.tile_layout) else None
+            tiles.append({
+                'row': row, 'column': column, 'row_span': row_span, 'column_span': column_span,
+                'source': source, 'view': tile['view'], 'group': group, 'wall': wall,
+            })
+        walls = [
+            {
+                'rows': wall.tile_layout.rowCount(), 'columns': wall.tile_layout.columnCount(),
+                'screen': wall.screen().name(), 'geometry': wall.geometry().getRect(),
+            }
+            for wall in self.walls
+        ]
+        save_session(SESSION_PATH, self.tile_layout.rowCount(), self.tile_layout.columnCount(), tiles, walls)
+
+    # rebuild the tiles of the previous run at once, then every source is warmed up in parallel
+    # and each tile starts its video as soon as its own source answered
+    # nothing is saved until every tile is back with its source, so a restore cut short (or with sources that do
+    # not answer yet) never overwrites the saved wall with a partial one
+    def restore_session(self):
+        session = load_session(SESSION_PATH)
+        if session is None:
+            self.tile_layout_ready = True
+            return
+
+        self.set_layout_preset_text('{}x{}'.format(session['rows'], session['columns']))
+        self.apply_layout_preset(session['rows'], session['columns'])
+        walls = [
+            self.open_wall(wall['rows'], wall['columns'], wall.get('screen'), wall.get('geometry'))
+            for wall in session.get('walls', [])
+        ]
+
+        self.tile_layout.beginUpdate()
+        groups = {}
+        for saved_tile in session['tiles']:
+            group = saved_tile.get('group')
+            wall = saved_tile.get('wall')
+            widget_tile = self.create_tile(
+                saved_tile['row'], saved_tile['column'], saved_tile['row_span'], saved_tile['column_span'],
+                saved_tile['view'], groups.get(group), walls[wall].tile_layout if wall is not None else None,
+            )
+            if group is not None and group in groups:
+                continue
+            if group is not None:
+                groups[group] = widget_tile
+                self.each_tile[widget_tile]['group'] = widget_tile
+            self.connect_tile_source(widget_tile, saved_tile['source'])
+        self.tile_layout.endUpdate()
+        self.tile_layout_ready = True
+        self.save_session()
+
+    def tile_source_connected(self, widget_tile, capture):
+        if widget_tile not in self.each_tile:
+            capture.release()
+            return
+        self.open_tile_source(widget_tile, self.each_tile[widget_tile]['source'], capture)
+        self.each_tile[widget_tile]['stream'] = self.watchdog.watch(widget_tile)
+        self.update_source_activity(widget_tile)
+        self.save_session()
+
+    # placeholder text of the tile while its source is not streaming
+    def tile_source_state(self, widget_tile, state):
+        if widget_tile not in self.each_tile or state == SourceConnector.CONNECTED:
+            return
+        text = 'Connecting...' if state == SourceConnector.CONNECTING else 'Source unavailable, retrying...'
+        for w in self.group_tiles(widget_tile):
+            self.set_tile_text(w, text)
+
+    # the frozen last frame is replaced by the state, a degraded stream keeps its frames and gets a tooltip
+    def tile_stream_state(self, widget_tile, state):
+        if widget_tile not in self.each_tile:
+            return
+        fps = self.each_tile[widget_tile]['stream']['fps']
+        for w in self.group_tiles(widget_tile):
+            if state == StreamWatchdog.STALLED:
+                self.set_tile_text(w, 'Stream stalled, restarting...')
+            elif state == StreamWatchdog.FAILED:
+                self.set_tile_text(w, 'Stream lost')
+            elif state == StreamWatchdog.DEGRADED:
+                self.set_tile_tool_tip(w, 'Degraded stream: {:.1f} fps'.format(fps))
+            else:
+                self.set_tile_tool_tip(w, '')
+
+    # stop the reader of the stalled source so it does not hold its capture and frames, then reopen it in the background
+    def restart_tile_source(self, widget_tile):
+        if widget_tile not in self.each_tile:
+            return
+        self.stop_tile_source(widget_tile)
+        self.connector.reconnect(widget_tile, self.each_tile[widget_tile]['source'][2])
+
+    # the reader of a paused source keeps its capture open, so resuming it is immediate, unless the source stays
+    # paused for SOURCE_RELEASE_DELAY: its capture is released then, and opened again when one of its tiles is back
+    def pause_tile_source(self, widget_tile):
+        tile_source = self.each_tile[widget_tile]['tile_source']
+        tile_source.pause()
+        self.watchdog.unwatch(widget_tile)
+        paused_since = tile_source.paused_since
+        QtCore.QTimer.singleShot(
+            round(SOURCE_RELEASE_DELAY * 1000), lambda: self.release_tile_source(widget_tile, paused_since)
+        )
+
+    # only if the source was not resumed, restarted, closed nor paused again since paused_since (the tile sources
+    # are stopped when the widget closes)
+    def release_tile_source(self, widget_tile, paused_since):
+        if widget_tile not in self.each_tile or self.each_tile[widget_tile]['tile_source'].paused_since != paused_since:
+            return
+        self.stop_tile_source(widget_tile)
+        self.each_tile[widget_tile]['released'] = True
+
+    def resume_tile_source(self, widget_tile):
+        tile = self.each_tile[widget_tile]
+        tile['tile_source'].resume()
+        if tile['source'] is not None and not self.connector.is_pending(widget_tile):
+            tile['stream'] = self.watchdog.watch(widget_tile)
+
+    def stop_tile_source(self, widget_tile):
+        self.each_tile[widget_tile]['tile_source'].stop()
+
     def captured_clicked(self):
         pass
 
+    # the cameras are made again from the edited parameters, with new maps and lookup tables
     def parameter_clicked(self):
         self.model.form_camera_parameter()
+        clear_cameras()
+        clear_angle_lookups()
+        self.map_cache.clear()
+        self.map_worker.clear_failed()
+        for tile in self.each_tile.values():
+            tile['camera'] = None
 
+    # a fisheye source shown as its four quadrants
     def fisheye_clicked(self):
-        print('fisheye_clicked')
+        source = self.select_media_source()
+        if source is None:
+            return
+        self.add_view_group(source, quadrant_views())
+        self.save_session()
 
     def recorded_clicked(self):
         print('recorded_clicked')
     
+    def __setScrollAreaMinimumSize(self):
+        row_number = self.tile_layout.rowCount()
+        column_number = self.tile_layout.columnCount()
+        vertical_margins = self.tile_layout.contentsMargins().top() + self.tile_layout.contentsMargins().bottom()
+        horizontal_margins = self.tile_layout.contentsMargins().left() + self.tile_layout.contentsMargins().right()
+        self.ui.scrollArea.setMinimumHeight(
+            row_number * self.tile_layout.rowsMinimumHeight()
+            + (row_number - 1) * self.tile_layout.verticalSpacing() + vertical_margins + 2
+        )
+        self.ui.scrollArea.setMinimumWidth(
+            column_number * self.tile_layout.columnsMinimumWidth()
+            + (column_number - 1) * self.tile_layout.horizontalSpacing() + horizontal_margins + 2
+        )
+
+    # the tile layout coalesces these into one relayout per frame
     def __tileLayoutResize(self, a0):
         self.tile_layout.updateGlobalSize(a0)
+
+    # once the resizing is over, the video tiles scale their frames to the new label size
+    def __tileLayoutSettled(self, vertical_span, horizontal_span):
+        for tile in self.each_tile.values():
+            if tile['ui'] is not None:
+                tile['width'] = max(tile['ui'].videoLabel.width(), 300)
+        self.__tileLayoutViewport()
+
+    # tell the virtualized tile layout which part of it is visible
+    def __tileLayoutViewport(self, *args):
+        self.tile_layout.setViewport(QtCore.QRect(
+            self.ui.scrollArea.horizontalScrollBar().value(),
+            self.ui.scrollArea.verticalScrollBar().value(),
+            self.ui.scrollArea.viewport().width(),
+            self.ui.scrollArea.viewport().height(),
+        ))
     
 
 class SurveillanceFisheyeCamera(PluginInterface):
@@ -0,0 +1,106 @@
+import threading
+import time
+import cv2
+import numpy as np
+
+FAKE_SCHEME = 'fake://'
+
+# the fake cameras that can be opened with a 'fake://<name>' media source
+fake_cameras = {}
+
+
+def register_fake_camera(name, camera):
+    fake_cameras[name] = camera
+    return FAKE_SCHEME + name
+
+
+def unregister_fake_camera(name):
+    fake_cameras.pop(name, None)
+
+
+def is_fake_source(media_source):
+    return isinstance(media_source, str) and media_source.startswith(FAKE_SCHEME)
+
+
+def open_fake_camera(media_source):
+    camera = fake_cameras.get(media_source[len(FAKE_SCHEME):])
+    if camera is None:
+        return FakeCapture(None)
+    return camera.open()
+
+
+# a local stand-in for a camera, to reproduce stalls and disconnects deterministically:
+# open_failures is the number of opens that fail before one succeeds, open_delay the time an open takes,
+# fps the frame rate the capture reports,
+# stall() blocks the reads until resume() (or until read_timeout, like a real stream), and
+# disconnect() makes every open and read fail until connect()
+class FakeCamera:
+    def __init__(self, width=640, height=480, open_failures=0, open_delay=0.0, read_timeout=1.0, fps=30.0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.open_failures = open_failures
+        self.open_delay = open_delay
+        self.read_timeout = read_timeout
+        self.online = True
+        self.frame_count = 0
+        self.open_count = 0
+        self.running = threading.Event()
+        self.running.set()
+
+    def open(self):
+        self.open_count += 1
+        if self.open_delay:
+            time.sleep(self.open_delay)
+        if not self.online or self.open_failures > 0:
+            self.open_failures = max(self.open_failures - 1, 0)
+            return FakeCapture(None)
+        return FakeCapture(self)
+
+    def stall(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def disconnect(self):
+        self.online = False
+
+    def connect(self):
+        self.online = True
+
+    def next_frame(self):
+        if not self.running.wait(self.read_timeout) or not self.online:
+            return False, None
+        self.frame_count += 1
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        # a moving bar so that consecutive frames differ
+        frame[:, self.frame_count % self.width] = 255
+        return True, frame
+
+
+# what FakeCamera.open returns, with the part of the cv2.VideoCapture interface the plugin uses
+class FakeCapture:
+    def __init__(self, camera):
+        self.camera = camera
+
+    def isOpened(self):
+        return self.camera is not None
+
+    def read(self):
+        if self.camera is None:
+            return False, None
+        return self.camera.next_frame()
+
+    def get(self, property_id):
+        if self.camera is None:
+            return 0.0
+        properties = {
+            cv2.CAP_PROP_FPS: self.camera.fps,
+            cv2.CAP_PROP_FRAME_WIDTH: self.camera.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.camera.height,
+        }
+        return float(properties.get(property_id, 0.0))
+
+    def release(self):
+        self.camera = None
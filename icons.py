@@ -0,0 +1,20 @@
+import os
+from PyQt6 import QtCore
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), 'resources')
+# compiled from resources/surveillance.qrc, see README.md
+RCC_PATH = os.path.join(RESOURCES_DIR, 'surveillance.rcc')
+
+icons_loaded = False
+
+
+# the icons of the .ui files (":/icon/..."), registered the first time a tile or the setup dialog is built
+# instead of when the plugin is imported; Qt maps the .rcc file into memory rather than the resource module
+# keeping a copy of every icon, resources/surveillance.py is only the fallback when the .rcc file is missing
+def load_icons():
+    global icons_loaded
+    if icons_loaded:
+        return
+    if not QtCore.QResource.registerResource(RCC_PATH):
+        from .resources import surveillance
+    icons_loaded = True
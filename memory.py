@@ -0,0 +1,50 @@
+from PyQt6 import QtCore
+
+
+# keeps the memory of the caches and buffers of the plugin under one budget (in bytes)
+# every category registers how to measure its memory and how to free some of it, when the total goes over the
+# budget the categories with the lowest priority are evicted first (e.g. maps of tiles that are not shown) and
+# the live frames last; the categories that can only be measured still count in the total
+# the usage is checked every check_interval seconds, enforce() can also be called after a large allocation
+# the categories that are not resident (e.g. maps memory mapped from their files, whose pages the system can drop
+# at any time) are reported by usage() but do not count in the total, nor are they evicted
+class MemoryBudget(QtCore.QObject):
+    # the usage of every category after some memory was freed: {category: bytes}
+    evicted = QtCore.pyqtSignal(object)
+
+    def __init__(self, budget=1024 * 2**20, check_interval=1.0):
+        super().__init__()
+        self.budget = budget
+        self.categories = {}
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(round(check_interval * 1000))
+        self.timer.timeout.connect(self.enforce)
+        self.timer.start()
+
+    # usage() returns the bytes held by the category, evict(nbytes) frees about nbytes of them and returns
+    # the bytes it freed
+    def register(self, category, priority, usage, evict=None, resident=True):
+        self.categories[category] = {'priority': priority, 'usage': usage, 'evict': evict, 'resident': resident}
+
+    def unregister(self, category):
+        self.categories.pop(category, None)
+
+    def usage(self):
+        return {category: entry['usage']() for category, entry in self.categories.items()}
+
+    def total(self):
+        return sum(entry['usage']() for entry in self.categories.values() if entry['resident'])
+
+    def enforce(self):
+        excess = self.total() - self.budget
+        if excess <= 0:
+            return
+        for category, entry in sorted(self.categories.items(), key=lambda item: item[1]['priority']):
+            if excess <= 0:
+                break
+            if entry['evict'] is not None and entry['resident']:
+                excess -= entry['evict'](excess)
+        self.evicted.emit(self.usage())
+
+    def stop(self):
+        self.timer.stop()
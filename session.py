@@ -0,0 +1,123 @@
+import json
+import os
+
+SESSION_VERSION = 1
+
+
+# the session file keeps the wall between two runs of the plugin:
+# {"version": 1, "rows": 2, "columns": 4,
+#  "tiles": [{"row": 0, "column": 0, "row_span": 1, "column_span": 1,
+#             "source": [source_type, cam_type, media_source, params_name],
+#             "view": {"mode": 1, "alpha": 0, "beta": 0, "zoom": 4} or null, "group": 0 or null, "wall": 0 or null}],
+#  "walls": [{"rows": 2, "columns": 2, "screen": screen name, "geometry": [x, y, width, height]}]}
+# the tiles with the same group show views of one source, opened once by the first of them
+# tiles that are not in the layout (they do not fit in the current preset) have a null row and column
+# the tiles of a wall window have the index of the window in walls, the tiles of the main wall a null wall
+# the sessions of older versions may have no walls, no screen and geometry for a wall and no group and wall for a tile
+# a session that cannot be read or does not follow the schema (e.g. edited by hand, or overlapping tiles) is None,
+# the plugin starts with its default layout then
+def load_session(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as file:
+            session = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not is_valid_session(session):
+        return None
+    return session
+
+
+def is_index(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def is_count(value):
+    return is_index(value) and value >= 1
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_valid_wall(wall):
+    return (
+        isinstance(wall, dict) and is_count(wall.get('rows')) and is_count(wall.get('columns'))
+        and isinstance(wall.get('screen', ''), str)
+        and (wall.get('geometry') is None or (
+            isinstance(wall['geometry'], list) and len(wall['geometry']) == 4 and all(map(is_number, wall['geometry']))
+        ))
+    )
+
+
+def is_valid_view(view):
+    return view is None or (
+        isinstance(view, dict) and view.get('mode') in (1, 2)
+        and all(is_number(view.get(name)) for name in ('alpha', 'beta', 'zoom'))
+    )
+
+
+def is_valid_tile(tile, wall_count):
+    if not isinstance(tile, dict) or not all(key in tile for key in ('row', 'column', 'source', 'view')):
+        return False
+    if not is_count(tile.get('row_span')) or not is_count(tile.get('column_span')) or not is_valid_view(tile['view']):
+        return False
+    if not isinstance(tile['source'], list) or len(tile['source']) != 4:
+        return False
+    if tile.get('group') is not None and not is_index(tile['group']):
+        return False
+    if tile.get('wall') is not None and not (is_index(tile['wall']) and tile['wall'] < wall_count):
+        return False
+    if tile['row'] is None or tile['column'] is None:
+        return tile['row'] is None and tile['column'] is None
+    return is_index(tile['row']) and is_index(tile['column'])
+
+
+def is_valid_session(session):
+    if not isinstance(session, dict) or session.get('version') != SESSION_VERSION:
+        return False
+    if not is_count(session.get('rows')) or not is_count(session.get('columns')):
+        return False
+    walls, tiles = session.get('walls', []), session.get('tiles')
+    if not isinstance(walls, list) or not all(map(is_valid_wall, walls)) or not isinstance(tiles, list):
+        return False
+    if not all(is_valid_tile(tile, len(walls)) for tile in tiles):
+        return False
+
+    # the tiles of every layout fit in its grid without overlapping
+    grids = [(session['rows'], session['columns'])] + [(wall['rows'], wall['columns']) for wall in walls]
+    cells = [set() for _ in grids]
+    for tile in tiles:
+        if tile['row'] is None:
+            continue
+        layout = 0 if tile.get('wall') is None else tile['wall'] + 1
+        rows, columns = grids[layout]
+        if tile['row'] + tile['row_span'] > rows or tile['column'] + tile['column_span'] > columns:
+            return False
+        area = {
+            (tile['row'] + row, tile['column'] + column)
+            for row in range(tile['row_span']) for column in range(tile['column_span'])
+        }
+        if area & cells[layout]:
+            return False
+        cells[layout] |= area
+    return True
+
+
+# written next to the file then renamed, so that a crash while saving does not lose the previous session
+# returns whether it was saved: a session that cannot be written (e.g. a read-only install) is only not kept
+def save_session(path, rows, columns, tiles, walls=()):
+    session = {'version': SESSION_VERSION, 'rows': rows, 'columns': columns, 'tiles': tiles, 'walls': list(walls)}
+    temporary_path = path + '.tmp'
+    try:
+        with open(temporary_path, 'w') as file:
+            json.dump(session, file, indent=2)
+        os.replace(temporary_path, path)
+    except OSError:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        return False
+    return True
@@ -0,0 +1,158 @@
+from PyQt6 import QtWidgets, QtCore
+from .ui_setup import Ui_Setup
+from .view_picker import PreviewFeed, MousePicker, PolygonOverlay, PAN_STEP, PAN_REPEAT_INTERVAL
+from .styles import DIALOG_ROLES
+
+
+# for the setup dialog
+# it is built once, the first time a tile is set up, then bind() gives it the tile to set up: its widgets and
+# their connections stay, only the connections to the tile (the picked view and the frames of its source) change
+class SetupDialog(QtWidgets.QDialog):
+    # [alpha, beta] picked with the mouse on the original image
+    alpha_beta = QtCore.pyqtSignal(object)
+
+    # style_sheets is the StyleSheets of the plugin
+    def __init__(self, model, style_sheets):
+        super().__init__()
+        self.model = model
+        self.style_sheets = style_sheets
+        self.ui = Ui_Setup()
+        self.ui.setupUi(self)
+        self.set_stylesheet()
+
+        # the tile being set up
+        self.picker = None
+        self.feed = None
+        self.mouse_picker = None
+        self.original_signal = None
+
+        # the polygon of the view is drawn by the plugin over the original image (the Polygon checkbox shows it),
+        # instead of ModelApps drawing it into every original frame
+        self.overlay = PolygonOverlay(self.ui.label_image_original)
+        self.ui.checkBox.setChecked(True)
+        self.ui.checkBox.toggled.connect(self.overlay.setVisible)
+
+        self.__setupViewControls()
+        self.ui.okButton.clicked.connect(self.accept)
+        self.ui.cancelButton.clicked.connect(self.reject)
+
+    # one stylesheet for the whole dialog, its children get it from there
+    def set_stylesheet(self):
+        self.style_sheets.apply(self, DIALOG_ROLES)
+
+    # picker is the ViewPicker of the tile, angle_lookup the AngleLookup of its camera, original_signal the signal
+    # of its source giving the original (fisheye) frames and image the last of these frames
+    def bind(self, picker, angle_lookup, original_signal, image=None):
+        self.picker = picker
+        self.picker.rendered.connect(self.__showResult)
+        self.picker.view_changed.connect(self.__viewChanged)
+        self.picker.polygon_changed.connect(self.__polygonChanged)
+
+        self.feed = PreviewFeed(picker, self.ui.label_image_original.minimumWidth())
+        self.feed.original.connect(self.__showOriginal)
+        self.original_signal = original_signal
+        self.original_signal.connect(self.feed.frame)
+
+        # the mouse on the original image picks the view, see MousePicker
+        self.mouse_picker = MousePicker(self.ui.label_image_original, picker, angle_lookup)
+        self.mouse_picker.attach()
+        self.mouse_picker.alpha_beta.connect(self.__alphaBetaPicked)
+        self.mouse_picker.position.connect(self.__positionPicked)
+
+        for label in (self.ui.label_pos_x, self.ui.label_pos_y, self.ui.label_alpha, self.ui.label_beta):
+            label.setText('0')
+        self.ui.label_image_result.clear()
+        self.ui.label_image_original.clear()
+        self.overlay.set_polygon(None, None)
+        self.__viewChanged(picker.view)
+        self.feed.frame(image)
+
+    # need to disconnect the signals and slots else the source of the tile keeps feeding the dialog after it is closed
+    # (and RuntimeError: wrapped C/C++ object has been deleted once the tile is gone)
+    def unbind(self):
+        if self.picker is None:
+            return
+        self.original_signal.disconnect(self.feed.frame)
+        self.picker.close()
+        self.mouse_picker.detach()
+        self.picker = self.feed = self.mouse_picker = self.original_signal = None
+
+    # Escape Key does not invoke closeEvent (to disconnect the signals and slots), so need to do it manually
+    def keyPressEvent(self, event):
+        if event.key() == QtCore.Qt.Key.Key_Escape:
+            self.close()
+        else:
+            super().keyPressEvent(event)
+
+    # okButton and cancelButton end the dialog without closeEvent, but closing, accepting and rejecting all go through done()
+    def done(self, result):
+        self.unbind()
+        super().done(result)
+
+    def __showResult(self, image):
+        self.model.show_image_to_label(self.ui.label_image_result, image, width=300, scale_content=False)
+
+    def __showOriginal(self, image):
+        self.model.show_image_to_label(self.ui.label_image_original, image, width=300, scale_content=False)
+        # the polygon needs the size of the original image, known from the first frame
+        if self.overlay.polygon is None:
+            self.__polygonChanged(self.picker.polygon())
+
+    def __polygonChanged(self, polygon):
+        if polygon is not None and self.picker.frame is not None:
+            self.overlay.set_polygon(polygon, (self.picker.frame.shape[1], self.picker.frame.shape[0]))
+
+    def __alphaBetaPicked(self, alpha_beta):
+        self.ui.label_alpha.setText(str(alpha_beta[0]))
+        self.ui.label_beta.setText(str(alpha_beta[1]))
+        self.alpha_beta.emit(alpha_beta)
+
+    def __positionPicked(self, x, y):
+        self.ui.label_pos_x.setText(str(x))
+        self.ui.label_pos_y.setText(str(y))
+
+    # the spinboxes follow the picked view
+    def __viewChanged(self, view):
+        alpha_spinbox, beta_spinbox = self.__modeSpinboxes()[view['mode']]
+        for spinbox, value in ((alpha_spinbox, view['alpha']), (beta_spinbox, view['beta']), (self.ui.zoomSpinMode_2, view['zoom'])):
+            spinbox.blockSignals(True)
+            spinbox.setValue(round(value))
+            spinbox.blockSignals(False)
+        self.ui.m1Button.setChecked(view['mode'] == 1)
+        self.ui.m2Button.setChecked(view['mode'] == 2)
+
+    # mode 1 uses Alpha and Beta, mode 2 Pitch and Yaw (the tile views have no roll)
+    def __modeSpinboxes(self):
+        return {1: (self.ui.setSpin1, self.ui.setSpin2), 2: (self.ui.setSpin3, self.ui.zoomSpinMode)}
+
+    # the pan buttons and the spinboxes move the picked view, the pan buttons repeat while held down
+    # and the picker shows every step at once (see ViewPicker)
+    def __setupViewControls(self):
+        for button, alpha_step, beta_step in (
+            (self.ui.topButton, PAN_STEP, 0), (self.ui.belowButton, -PAN_STEP, 0),
+            (self.ui.leftButton, 0, -PAN_STEP), (self.ui.rightButton, 0, PAN_STEP),
+        ):
+            button.setAutoRepeat(True)
+            button.setAutoRepeatDelay(PAN_REPEAT_INTERVAL * 10)
+            button.setAutoRepeatInterval(PAN_REPEAT_INTERVAL)
+            button.clicked.connect(lambda checked, a=alpha_step, b=beta_step: self.picker.pan(a, b))
+        self.ui.centerButton.clicked.connect(lambda: self.picker.center())
+
+        self.ui.setSpin1.setRange(0, 110)
+        self.ui.setSpin2.setRange(0, 359)
+        self.ui.setSpin2.setWrapping(True)
+        self.ui.setSpin3.setRange(-110, 110)
+        self.ui.zoomSpinMode.setRange(-110, 110)
+        self.ui.zoomSpinMode_4.setEnabled(False)
+        self.ui.zoomSpinMode_2.setRange(1, 20)
+
+        # the spinboxes of the other mode do nothing
+        def spinbox_changed(mode, **changes):
+            if self.picker is not None and self.picker.view['mode'] == mode:
+                self.picker.set_view(**changes)
+        for mode, (alpha_spinbox, beta_spinbox) in self.__modeSpinboxes().items():
+            alpha_spinbox.valueChanged.connect(lambda value, m=mode: spinbox_changed(m, alpha=value))
+            beta_spinbox.valueChanged.connect(lambda value, m=mode: spinbox_changed(m, beta=value))
+        self.ui.zoomSpinMode_2.valueChanged.connect(lambda value: self.picker.set_view(zoom=value))
+        self.ui.m1Button.clicked.connect(lambda: self.picker.set_view(mode=1, alpha=0, beta=0))
+        self.ui.m2Button.clicked.connect(lambda: self.picker.set_view(mode=2, alpha=0, beta=0))
@@ -0,0 +1,45 @@
+from PyQt6 import QtWidgets
+
+# the kinds of widget styled by the Model, as (selector, name of the Model style method)
+MAIN_ROLES = (
+    ('QPushButton', 'style_pushbutton'),
+    ('QLabel', 'style_label'),
+    ('QScrollArea', 'style_scroll_area'),
+    ('QComboBox', 'style_combobox'),
+    ('QSlider', 'style_slider'),
+)
+DIALOG_ROLES = (
+    ('QLabel', 'style_label'),
+    ('QPushButton', 'style_pushbutton'),
+    ('QSpinBox', 'style_spinbox'),
+    ('QComboBox', 'style_combobox'),
+)
+
+
+# a Model style is either complete rules or only declarations, these are given the selector of their role
+def role_rules(selector, style):
+    if '{' in style:
+        return style
+    return '{} {{ {} }}'.format(selector, style)
+
+
+# the styles of the Model combined into one stylesheet per set of roles, set on a parent widget so that its
+# children (including the tiles added later) get their style without a setStyleSheet each
+# the stylesheets are made again only when the Model styles change (another theme)
+class StyleSheets:
+    def __init__(self, model):
+        self.model = model
+        self.sheets = {}
+
+    def sheet(self, roles):
+        styles = tuple(getattr(self.model, name)() for selector, name in roles)
+        key = (roles, styles)
+        if key not in self.sheets:
+            self.sheets[key] = '\n'.join(role_rules(selector, style) for (selector, name), style in zip(roles, styles))
+        return self.sheets[key]
+
+    # Qt parses the stylesheet and polishes every child again, so it is only done when the stylesheet changed
+    def apply(self, widget: QtWidgets.QWidget, roles):
+        sheet = self.sheet(roles)
+        if widget.styleSheet() != sheet:
+            widget.setStyleSheet(sheet)
@@ -0,0 +1,144 @@
+# the plugin is a package loaded by MoilApp from its plugins directory, the tests load it the same way
+# (see benchmarks/startup.py) so that its relative imports work; the Controller gets a fake MoilApp (see below)
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+spec = importlib.util.spec_from_file_location(
+    'surveillance_plugin', os.path.join(PLUGIN_DIR, '__init__.py'), submodule_search_locations=[PLUGIN_DIR]
+)
+package = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = package
+spec.loader.exec_module(package)
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+# runs the event loop until condition() is true or timeout seconds passed, returns condition()
+def wait_until(condition, timeout=5.0):
+    deadline = QtCore.QDeadlineTimer(round(timeout * 1000))
+    while not condition() and not deadline.hasExpired():
+        QtCore.QCoreApplication.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 10)
+    return condition()
+
+
+# the parts of ModelApps the plugin uses, the frames of the tile are kept in results
+class FakeModelApps(QtCore.QObject):
+    image_result = QtCore.pyqtSignal(object)
+    signal_image_original = QtCore.pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.image = None
+        self.results = []
+        self.image_result.connect(self.results.append)
+
+
+# the parts of the MoilApp Model the Controller uses, select_media_source gives the sources of sources in turn
+# (None once there are none left, like a cancelled selection), styles is the theme and the widths the frames
+# were shown at are kept
+class FakeModel:
+    def __init__(self):
+        self.sources = []
+        self.styles = {
+            'style_pushbutton': 'color: black;', 'style_label': 'color: gray;', 'style_scroll_area': 'background: white;',
+            'style_combobox': 'color: black;', 'style_slider': 'color: black;', 'style_spinbox': 'color: black;',
+            'style_line': 'color: gray;',
+        }
+        # {label: width of the last frame shown in it}
+        self.shown = {}
+
+    def style_pushbutton(self):
+        return self.styles['style_pushbutton']
+
+    def style_label(self):
+        return self.styles['style_label']
+
+    def style_scroll_area(self):
+        return self.styles['style_scroll_area']
+
+    def style_combobox(self):
+        return self.styles['style_combobox']
+
+    def style_slider(self):
+        return self.styles['style_slider']
+
+    def style_spinbox(self):
+        return self.styles['style_spinbox']
+
+    def style_line(self):
+        return self.styles['style_line']
+
+    def select_media_source(self):
+        return self.sources.pop(0) if self.sources else None
+
+    def show_image_to_label(self, label, image, width=300, scale_content=False):
+        height = max(round(image.shape[0] * width / image.shape[1]), 1)
+        label.setPixmap(QtGui.QPixmap(width, height))
+        self.shown[label] = width
+
+    def form_camera_parameter(self):
+        pass
+
+
+# the ModelApps of MoilApp, without the moildev the tiles only set up when their parameter file cannot be read
+class FakeMoilModelApps(QtCore.QObject):
+    image_result = QtCore.pyqtSignal(object)
+    signal_image_original = QtCore.pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.image = None
+        self.moildev = None
+
+    def create_moildev(self):
+        pass
+
+    def create_image_original(self):
+        pass
+
+    def update_file_config(self):
+        pass
+
+
+class FakePluginInterface:
+    pass
+
+
+# the controller imports MoilApp (src), which is only there when the tests run from within MoilApp
+if importlib.util.find_spec('src') is None:
+    for name, attributes in (
+        ('src', {}), ('src.plugin_interface', {'PluginInterface': FakePluginInterface}), ('src.models', {}),
+        ('src.models.model_apps', {'Model': FakeModel, 'ModelApps': FakeMoilModelApps}),
+    ):
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+
+
+# a shown Controller without saved session nor disk cache, once its wall was restored
+@pytest.fixture
+def controller(qapp, tmp_path, monkeypatch):
+    pytest.importorskip('moildev')
+    from surveillance_plugin import controller as controller_module
+    monkeypatch.setattr(controller_module, 'SESSION_PATH', str(tmp_path / 'session.json'))
+    monkeypatch.setattr(controller_module, 'MAPS_CACHE_DIR', None)
+    widget = controller_module.Controller(FakeModel())
+    widget.resize(1300, 900)
+    widget.show()
+    assert wait_until(lambda: widget.tile_layout_ready)
+    yield widget
+    widget.close()
+    widget.deleteLater()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete)
@@ -0,0 +1,87 @@
+import itertools
+
+import cv2
+import numpy as np
+import pytest
+
+moildev = pytest.importorskip('moildev')
+
+from surveillance_plugin.angles import AngleLookup
+
+ARGUMENTS = {
+    'camera_name': 'camera', 'camera_fov': 220, 'sensor_width': 1.4, 'sensor_height': 1.4,
+    'icx': 1320, 'icy': 1017, 'ratio': 1, 'image_width': 2592, 'image_height': 1944, 'calibration_ratio': 4.05,
+    'parameter_0': 0, 'parameter_1': 0, 'parameter_2': 0, 'parameter_3': 10.11, 'parameter_4': -85.241,
+    'parameter_5': 282.21,
+}
+
+
+def new_moildev(**arguments):
+    return moildev.Moildev(**dict(ARGUMENTS, **arguments))
+
+
+# pixels of the lens, away from the column get_alpha_beta mistakes for the center (x == icy)
+def lens_pixels(step=97):
+    for x, y in itertools.product(range(500, 2100, step), range(200, 1800, step)):
+        if x != ARGUMENTS['icy']:
+            yield x, y
+
+
+@pytest.mark.parametrize('ratio', [1, 1.2])
+@pytest.mark.parametrize('mode', [1, 2])
+def test_alpha_beta_is_the_one_of_moildev(ratio, mode):
+    camera = new_moildev(ratio=ratio)
+    angle_lookup = AngleLookup(camera)
+    for x, y in lens_pixels():
+        expected_alpha, expected_beta = camera.get_alpha_beta(x, y, mode)
+        alpha, beta = angle_lookup.point_alpha_beta(x, y, mode)
+        if alpha is None:
+            continue
+        assert alpha == pytest.approx(expected_alpha, abs=1e-4)
+        if mode == 1:
+            assert beta == pytest.approx(expected_beta % 360, abs=1e-3)
+        else:
+            assert beta == pytest.approx(expected_beta, abs=1e-4)
+
+
+@pytest.mark.parametrize('mode', [1, 2])
+def test_position_is_the_inverse_of_alpha_beta(mode):
+    angle_lookup = AngleLookup(new_moildev())
+    if mode == 1:
+        alpha, beta = np.meshgrid(np.arange(10, 90, 7.5), np.arange(5, 355, 25))
+    else:
+        alpha, beta = np.meshgrid(np.arange(-45, 45, 7.5), np.arange(-50, 50, 9.5))
+    x, y = angle_lookup.position(alpha, beta, mode)
+    found_alpha, found_beta = angle_lookup.alpha_beta(x, y, mode)
+    assert found_alpha == pytest.approx(alpha, abs=0.2)
+    assert found_beta == pytest.approx(beta, abs=0.2)
+
+
+def test_position_is_the_center_of_the_anypoint_view():
+    camera = new_moildev()
+    angle_lookup = AngleLookup(camera)
+    for alpha, beta in [(0, 0), (30, 45), (60, 200), (85, 300)]:
+        map_x, map_y = camera.maps_anypoint_mode1(alpha, beta, 4)
+        height, width = map_x.shape
+        x, y = angle_lookup.position(alpha, beta)
+        assert (map_x[height // 2, width // 2], map_y[height // 2, width // 2]) == pytest.approx((x, y), abs=1.5)
+
+
+@pytest.mark.parametrize('view', [
+    {'mode': 1, 'alpha': 0, 'beta': 0, 'zoom': 4}, {'mode': 1, 'alpha': 35, 'beta': 120, 'zoom': 2},
+    {'mode': 1, 'alpha': 80, 'beta': 290, 'zoom': 1}, {'mode': 2, 'alpha': 20, 'beta': -40, 'zoom': 2},
+    {'mode': 2, 'alpha': -45, 'beta': 45, 'zoom': 4},
+])
+def test_anypoint_maps_are_the_scaled_down_maps_of_moildev(view):
+    camera = new_moildev()
+    if view['mode'] == 1:
+        maps = camera.maps_anypoint_mode1(view['alpha'], view['beta'], view['zoom'])
+    else:
+        maps = camera.maps_anypoint_mode2(view['alpha'], view['beta'], 0, view['zoom'])
+    expected_x, expected_y = (cv2.resize(m, (300, 225), interpolation=cv2.INTER_LINEAR) for m in maps)
+    map_x, map_y = AngleLookup(camera).anypoint_maps(view, 300)
+    assert map_x.shape == expected_x.shape and map_x.dtype == np.float32
+    # the pixels of the lens, moildev maps the other ones anywhere
+    lens = (expected_x > 0) & (expected_y > 0)
+    error = np.hypot(map_x - expected_x, map_y - expected_y)[lens]
+    assert np.median(error) < 1 and np.percentile(error, 99) < 3
@@ -0,0 +1,358 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from conftest import wait_until
+from surveillance_plugin.anypoint import MapCache, MapWorker
+from surveillance_plugin.view_picker import ViewPicker
+
+CAMERA_KEY = ('camera', 'parameters.json', '0123456789ab')
+
+
+# maps of 64x48 whose values tell which view they were computed for
+class FakeMoildev:
+    icx, icy = 32.0, 24.0
+
+    def __init__(self):
+        self.computed = 0
+
+    def maps_anypoint_mode1(self, alpha, beta, zoom):
+        self.computed += 1
+        map_x = np.full((48, 64), alpha, np.float32)
+        map_y = np.full((48, 64), beta, np.float32)
+        return map_x, map_y
+
+    def maps_anypoint_mode2(self, pitch, yaw, roll, zoom):
+        return self.maps_anypoint_mode1(pitch, yaw, zoom)
+
+
+# blocks in the computation until released
+class BlockingMoildev(FakeMoildev):
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def maps_anypoint_mode1(self, alpha, beta, zoom):
+        self.started.set()
+        self.release.wait(5)
+        return super().maps_anypoint_mode1(alpha, beta, zoom)
+
+
+def view(alpha=0, beta=0, zoom=4, mode=1):
+    return {'mode': mode, 'alpha': alpha, 'beta': beta, 'zoom': zoom}
+
+
+def test_key_identifies_camera_and_view():
+    assert MapCache.key(list(CAMERA_KEY), view(10, 20)) == (CAMERA_KEY, 1, 10, 20, 4)
+    assert MapCache.key(CAMERA_KEY, view(10, 20)) != MapCache.key(CAMERA_KEY, view(10, 20, mode=2))
+    assert MapCache.key(CAMERA_KEY, view(10, 20)) != MapCache.key(CAMERA_KEY[:2] + ('other',), view(10, 20))
+
+
+def test_maps_are_computed_once():
+    moildev = FakeMoildev()
+    map_cache = MapCache()
+    maps = map_cache.get(moildev, CAMERA_KEY, view(10, 20))
+    assert map_cache.get(moildev, CAMERA_KEY, view(10, 20)) is maps
+    assert map_cache.find(CAMERA_KEY, view(10, 20)) is maps
+    assert moildev.computed == 1
+    assert map_cache.find(CAMERA_KEY, view(11, 20)) is None
+
+
+def test_scaled_maps_are_derived():
+    moildev = FakeMoildev()
+    map_cache = MapCache()
+    map_x, map_y = map_cache.get(moildev, CAMERA_KEY, view(10, 20), width=32)
+    assert map_x.shape == (24, 32)
+    assert np.all(map_x == 10) and np.all(map_y == 20)
+    assert map_cache.get(moildev, CAMERA_KEY, view(10, 20), width=128)[0].shape == (48, 64)
+    assert moildev.computed == 1
+    assert map_cache.memory_usage(derived=True) == map_x.nbytes + map_y.nbytes
+
+
+def test_least_recently_used_maps_are_evicted():
+    moildev = FakeMoildev()
+    map_cache = MapCache()
+    for alpha in range(1, 41):
+        map_cache.get(moildev, CAMERA_KEY, view(alpha))
+    # no count limit, only the bytes asked by the memory budget are freed
+    assert map_cache.find(CAMERA_KEY, view(1)) is not None
+    nbytes = map_cache.memory_usage()
+    assert map_cache.evict(1) == nbytes // 40
+    assert map_cache.find(CAMERA_KEY, view(2)) is None
+    assert map_cache.find(CAMERA_KEY, view(1)) is not None
+
+
+def test_discard_frees_scaled_maps_and_stacks():
+    moildev = FakeMoildev()
+    map_cache = MapCache()
+    image = np.zeros((48, 64, 3), np.uint8)
+    for alpha in (1, 2):
+        map_cache.get(moildev, CAMERA_KEY, view(alpha), width=32)
+    assert len(map_cache.remap_views(image, CAMERA_KEY, [view(1), view(2)], width=32)) == 2
+    map_cache.discard(CAMERA_KEY, view(1))
+    assert map_cache.find(CAMERA_KEY, view(1)) is None
+    assert map_cache.find(CAMERA_KEY, view(2)) is not None
+    assert all(key[0] != 'stack' for key in map_cache.maps)
+
+
+def test_remap_views_splits_the_stacked_result():
+    moildev = FakeMoildev()
+    map_cache = MapCache()
+    image = np.arange(48 * 64, dtype=np.float32).reshape(48, 64)
+    for alpha, beta in ((1, 2), (3, 4)):
+        map_cache.get(moildev, CAMERA_KEY, view(alpha, beta))
+    images = map_cache.remap_views(image, CAMERA_KEY, [view(1, 2), view(3, 4)])
+    assert [i.shape for i in images] == [(48, 64), (48, 64)]
+    assert images[0][0, 0] == image[2, 1] and images[1][0, 0] == image[4, 3]
+
+
+# the frames never wait for the maps: without them in memory nothing is remapped, nor computed or loaded
+def test_remap_without_the_maps_in_memory(tmp_path):
+    moildev = FakeMoildev()
+    MapCache(str(tmp_path)).get(moildev, CAMERA_KEY, view(1))
+    map_cache = MapCache(str(tmp_path))
+    image = np.zeros((48, 64), np.float32)
+    assert map_cache.remap(image, CAMERA_KEY, view(1)) is None
+    assert map_cache.remap_views(image, CAMERA_KEY, [view(1), view(2)], width=32) is None
+    assert map_cache.maps == {} and moildev.computed == 1
+
+
+# the maps loaded from cache_dir are memory mapped, their pages are the system's to drop so they are counted apart
+def test_mapped_maps_are_counted_apart(tmp_path):
+    moildev = FakeMoildev()
+    MapCache(str(tmp_path)).get(moildev, CAMERA_KEY, view(1))
+    map_cache = MapCache(str(tmp_path))
+    map_x, map_y = map_cache.get(moildev, CAMERA_KEY, view(1))
+    map_cache.get(moildev, CAMERA_KEY, view(2))
+    assert isinstance(map_x, np.memmap) and moildev.computed == 2
+    assert map_cache.memory_usage(mapped=True) == map_x.nbytes + map_y.nbytes
+    assert map_cache.memory_usage() == map_x.nbytes + map_y.nbytes
+    assert map_cache.evict(1, mapped=True) == map_x.nbytes + map_y.nbytes
+    assert map_cache.find(CAMERA_KEY, view(1)) is None and map_cache.find(CAMERA_KEY, view(2)) is not None
+
+
+def test_lock_is_not_held_while_computing():
+    moildev = BlockingMoildev()
+    map_cache = MapCache()
+    map_cache.get(FakeMoildev(), CAMERA_KEY, view(1))
+    thread = threading.Thread(target=map_cache.get, args=(moildev, CAMERA_KEY, view(2)))
+    thread.start()
+    try:
+        assert moildev.started.wait(5)
+        assert map_cache.lock.acquire(timeout=1)
+        map_cache.lock.release()
+        assert map_cache.find(CAMERA_KEY, view(1)) is not None
+        assert map_cache.memory_usage() > 0
+    finally:
+        moildev.release.set()
+        thread.join()
+    assert map_cache.find(CAMERA_KEY, view(2)) is not None
+
+
+def test_maps_inserted_first_are_kept():
+    moildev = BlockingMoildev()
+    map_cache = MapCache()
+    thread = threading.Thread(target=map_cache.get, args=(moildev, CAMERA_KEY, view(2)))
+    thread.start()
+    try:
+        assert moildev.started.wait(5)
+        maps = map_cache.get(FakeMoildev(), CAMERA_KEY, view(2))
+    finally:
+        moildev.release.set()
+        thread.join()
+    assert map_cache.find(CAMERA_KEY, view(2)) is maps
+
+
+# fills one pair of buffers like moildev, slowly enough for two threads to overlap without the moildev lock
+class SharedBuffersMoildev(FakeMoildev):
+    def __init__(self):
+        super().__init__()
+        self.map_x = np.zeros((48, 64), np.float32)
+        self.map_y = np.zeros((48, 64), np.float32)
+
+    def maps_anypoint_mode1(self, alpha, beta, zoom):
+        for row in range(48):
+            self.map_x[row] = alpha
+            self.map_y[row] = beta
+            time.sleep(0.0005)
+        return self.map_x, self.map_y
+
+
+def test_one_moildev_computes_one_view_at_a_time():
+    moildev = SharedBuffersMoildev()
+    map_cache = MapCache()
+    threads = [
+        threading.Thread(target=map_cache.get, args=(moildev, CAMERA_KEY, view(alpha, alpha))) for alpha in range(1, 5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for alpha in range(1, 5):
+        map_x, map_y = map_cache.find(CAMERA_KEY, view(alpha, alpha))
+        assert np.all(map_x == alpha) and np.all(map_y == alpha)
+
+
+def cached_files(cache_dir):
+    return sorted(path.name for path in cache_dir.iterdir())
+
+
+def test_only_persisted_views_are_written(tmp_path):
+    moildev = FakeMoildev()
+    map_cache = MapCache(str(tmp_path))
+    map_cache.get(moildev, CAMERA_KEY, view(1), persist=False)
+    assert cached_files(tmp_path) == []
+    map_cache.get(moildev, CAMERA_KEY, view(1), width=32)
+    assert len(cached_files(tmp_path)) == 2
+    assert moildev.computed == 1
+
+    map_cache = MapCache(str(tmp_path))
+    map_x, map_y = map_cache.get(moildev, CAMERA_KEY, view(1))
+    assert moildev.computed == 1
+    assert np.all(map_x == 1)
+
+
+def test_disk_cache_removes_least_recently_used_maps(tmp_path):
+    moildev = FakeMoildev()
+    maps_nbytes = 2 * (48 * 64 * 4 + 128)
+    map_cache = MapCache(str(tmp_path), max_disk_bytes=2 * maps_nbytes)
+    map_cache.get(moildev, CAMERA_KEY, view(1))
+    map_cache.get(moildev, CAMERA_KEY, view(2))
+    old = os.path.getmtime(tmp_path / cached_files(tmp_path)[0]) - 60
+    for name in cached_files(tmp_path):
+        os.utime(tmp_path / name, (old, old))
+    # loading view 1 again makes it the most recently used one on disk
+    map_cache.clear()
+    map_cache.get(moildev, CAMERA_KEY, view(1))
+    map_cache.get(moildev, CAMERA_KEY, view(3))
+    assert len(cached_files(tmp_path)) == 4
+    assert not any('_2_0_4_' in name for name in cached_files(tmp_path))
+    assert moildev.computed == 3
+
+
+def test_picked_views_are_kept_apart_from_the_tile_maps(qapp, tmp_path):
+    moildev = FakeMoildev()
+    map_cache = MapCache(str(tmp_path))
+    map_cache.get(moildev, CAMERA_KEY, view(), width=32)
+    picker = ViewPicker(map_cache, moildev, CAMERA_KEY, view(), 32)
+    assert moildev.computed == 1
+    for beta in range(60):
+        picker.set_view(beta=beta)
+    assert wait_until(lambda: not picker.map_worker.running)
+    # the tile maps are only read, the picker keeps the exact maps of the last view computed
+    assert list(map_cache.maps) == [MapCache.key(CAMERA_KEY, view()), MapCache.key(CAMERA_KEY, view()) + (32,)]
+    assert {key[:5] for key in picker.map_cache.maps} == {MapCache.key(CAMERA_KEY, view(0, 59))}
+    assert picker.memory_usage() == picker.map_cache.memory_usage() + picker.map_cache.memory_usage(derived=True)
+    picker.close()
+    assert len(cached_files(tmp_path)) == 2
+    assert picker.map_cache.maps == {}
+
+
+# while previewing only the lens model makes maps, the exact ones are computed once the view settled
+def test_previewed_views_are_not_computed(qapp):
+    moildev = FakeMoildev()
+    picker = ViewPicker(MapCache(), moildev, CAMERA_KEY, view(), 32, FakeAngleLookup())
+    assert wait_until(lambda: not picker.map_worker.running)
+    picker.set_previewing(True)
+    for alpha in range(1, 30):
+        picker.set_view(alpha=alpha)
+        assert picker.maps[0].shape == (12, 16) and np.all(picker.maps[0] == alpha)
+    assert moildev.computed == 1 and picker.memory_usage() > picker.map_cache.memory_usage()
+    picker.set_previewing(False)
+    assert wait_until(lambda: not picker.map_worker.running)
+    assert moildev.computed == 2 and picker.maps[0].shape == (24, 32)
+    picker.close()
+
+
+def test_worker_tells_the_skipped_and_the_failed_views(qapp):
+    moildev = BlockingMoildev()
+    map_worker = MapWorker(MapCache())
+    events = []
+    map_worker.maps_ready.connect(lambda ready_view: events.append(('ready', ready_view['alpha'])))
+    map_worker.map_failed.connect(lambda failed_view: events.append(('failed', failed_view['alpha'])))
+    map_worker.dropped.connect(lambda dropped_view: events.append(('dropped', dropped_view['alpha'])))
+
+    map_worker.request(moildev, CAMERA_KEY, view(1))
+    assert moildev.started.wait(5)
+    map_worker.request(moildev, CAMERA_KEY, view(2))
+    map_worker.request(None, CAMERA_KEY, view(3))
+    moildev.release.set()
+    assert wait_until(lambda: not map_worker.running and len(events) == 3)
+    map_worker.shutdown()
+    assert events == [('dropped', 2), ('ready', 1), ('failed', 3)]
+
+
+def test_fetched_views_wait_behind_the_requested_one_and_fail_once(qapp):
+    moildev = BlockingMoildev()
+    map_worker = MapWorker(MapCache())
+    events = []
+    map_worker.maps_ready.connect(lambda ready_view: events.append(('ready', ready_view['alpha'])))
+    map_worker.map_failed.connect(lambda failed_view: events.append(('failed', failed_view['alpha'])))
+
+    map_worker.fetch(moildev, CAMERA_KEY, view(1), 32)
+    assert moildev.started.wait(5)
+    for _ in range(3):
+        map_worker.fetch(moildev, CAMERA_KEY, view(1), 32)
+        map_worker.fetch(moildev, CAMERA_KEY, view(2), 32)
+        map_worker.fetch(None, CAMERA_KEY, view(3), 32)
+    map_worker.request(moildev, CAMERA_KEY, view(4))
+    moildev.release.set()
+    assert wait_until(lambda: not map_worker.running and len(events) == 4)
+    assert events == [('ready', 1), ('ready', 4), ('ready', 2), ('failed', 3)]
+    assert moildev.computed == 3
+
+    map_worker.fetch(None, CAMERA_KEY, view(3), 32)
+    assert not map_worker.running
+    map_worker.shutdown()
+
+
+def test_cancelled_views_are_neither_computed_nor_kept(qapp):
+    moildev = BlockingMoildev()
+    map_cache = MapCache()
+    map_worker = MapWorker(map_cache)
+    events = []
+    map_worker.maps_ready.connect(lambda ready_view: events.append(('ready', ready_view['alpha'])))
+
+    for alpha in (1, 2, 3):
+        map_worker.fetch(moildev, CAMERA_KEY, view(alpha), 32)
+    assert moildev.started.wait(5)
+    map_worker.cancel(CAMERA_KEY, [view(1), view(2)])
+    moildev.release.set()
+    assert wait_until(lambda: not map_worker.running and len(events) == 1)
+    map_worker.shutdown()
+    assert events == [('ready', 3)]
+    assert moildev.computed == 2
+    assert map_cache.find(CAMERA_KEY, view(1)) is None and map_cache.find(CAMERA_KEY, view(3)) is not None
+
+
+# preview maps of the lens model that tell the view and width they were made for
+class FakeAngleLookup:
+    def anypoint_maps(self, picked_view, width):
+        height = width * 3 // 4
+        return np.full((height, width), picked_view['alpha'], np.float32), np.full((height, width), -1, np.float32)
+
+
+def test_every_picked_view_is_previewed_at_once(qapp):
+    moildev = BlockingMoildev()
+    picker = ViewPicker(MapCache(), moildev, CAMERA_KEY, view(), 32, FakeAngleLookup())
+    picker.set_frame(np.zeros((48, 64), np.float32))
+    rendered = []
+    picker.rendered.connect(rendered.append)
+    assert moildev.started.wait(5)
+    try:
+        for changes in ({'alpha': 10}, {'zoom': 8}, {'mode': 2, 'alpha': -20, 'beta': 15}):
+            picker.set_view(**changes)
+            assert rendered[-1].shape == (24, 32)
+            assert np.all(picker.maps[0] == picker.view['alpha']) and np.all(picker.maps[1] == -1)
+        picker.set_previewing(True)
+        assert rendered[-1].shape == (12, 16)
+        picker.set_previewing(False)
+    finally:
+        moildev.release.set()
+    # the exact maps replace the preview ones once computed
+    assert wait_until(lambda: not picker.map_worker.running)
+    assert np.all(picker.maps[1] == 15)
+    picker.close()
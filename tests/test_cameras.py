@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+pytest.importorskip('moildev')
+
+from surveillance_plugin.cameras import camera_config, camera_key, camera_moildev, clear_cameras, moildevs_usage
+
+PARAMETERS = {
+    'cameraName': 'camera', 'cameraFov': 220, 'cameraSensorWidth': 1.4, 'cameraSensorHeight': 1.4,
+    'iCx': 1320, 'iCy': 1017, 'ratio': 1, 'imageWidth': 2592, 'imageHeight': 1944, 'calibrationRatio': 4.05,
+    'parameter0': 0, 'parameter1': 0, 'parameter2': 0, 'parameter3': 10.11, 'parameter4': -85.241, 'parameter5': 282.21,
+}
+
+
+@pytest.fixture(autouse=True)
+def cameras():
+    clear_cameras()
+    yield
+    clear_cameras()
+
+
+def write_parameters(tmp_path, parameters, name='parameters.json'):
+    path = tmp_path / name
+    path.write_text(json.dumps(parameters) if not isinstance(parameters, str) else parameters)
+    return str(path)
+
+
+def test_one_moildev_per_camera(tmp_path):
+    params_name = write_parameters(tmp_path, {'camera': PARAMETERS})
+    assert camera_config('camera', params_name) == PARAMETERS
+    assert camera_moildev('camera', params_name) is camera_moildev('camera', params_name)
+    assert camera_key('camera', params_name)[:2] == ('camera', params_name)
+
+
+def test_a_missing_file_has_no_camera(tmp_path):
+    params_name = str(tmp_path / 'missing.json')
+    assert camera_moildev('camera', params_name) is None
+    assert camera_key('camera', params_name) == ('camera', params_name)
+
+
+def test_missing_parameters_are_reported(tmp_path):
+    parameters = dict(PARAMETERS)
+    del parameters['cameraFov']
+    del parameters['parameter5']
+    params_name = write_parameters(tmp_path, {'camera': parameters})
+    with pytest.raises(ValueError, match='cameraFov, parameter5'):
+        camera_moildev('camera', params_name)
+
+
+def test_broken_files_are_reported(tmp_path):
+    params_name = write_parameters(tmp_path, '{"camera": ')
+    with pytest.raises(ValueError, match='not a camera parameter file'):
+        camera_moildev('camera', params_name)
+    params_name = write_parameters(tmp_path, {'other camera': PARAMETERS}, 'other.json')
+    with pytest.raises(ValueError, match='no parameters for the camera camera'):
+        camera_moildev('camera', params_name)
+
+
+def test_moildevs_usage_counts_every_moildev_once(tmp_path):
+    params_name = write_parameters(tmp_path, {'camera': PARAMETERS})
+    assert moildevs_usage() == 0
+    moildev = camera_moildev('camera', params_name)
+    nbytes = moildevs_usage()
+    # the maps and the image of the size of the fisheye image
+    assert nbytes == 2592 * 1944 * 11
+    assert moildevs_usage([moildev, None]) == nbytes
+    other = camera_moildev('camera', write_parameters(tmp_path, {'camera': PARAMETERS}, 'other.json'))
+    assert moildevs_usage([other]) == 2 * nbytes
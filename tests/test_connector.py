@@ -0,0 +1,121 @@
+import time
+
+from conftest import wait_until
+from surveillance_plugin.connector import SourceConnector
+from surveillance_plugin.fake_camera import FakeCamera, register_fake_camera, unregister_fake_camera
+
+
+def test_the_open_capture_is_handed_over(qapp):
+    camera = FakeCamera(width=32, height=24)
+    media_source = register_fake_camera('handed over', camera)
+    connector = SourceConnector()
+    connected = []
+    connector.connected.connect(lambda token, capture: connected.append((token, capture)))
+    try:
+        connector.connect_source('tile', media_source)
+        assert wait_until(lambda: connected)
+        token, capture = connected[0]
+        assert token == 'tile' and capture.isOpened()
+        assert capture.read()[0]
+        assert camera.open_count == 1
+        capture.release()
+    finally:
+        connector.shutdown()
+        unregister_fake_camera('handed over')
+
+
+def test_the_capture_of_a_cancelled_source_is_released(qapp):
+    camera = FakeCamera(width=32, height=24, open_delay=0.2)
+    captures = []
+    connector = SourceConnector(opener=lambda media_source, timeout: captures.append(camera.open()) or captures[-1])
+    connected = []
+    connector.connected.connect(lambda token, capture: connected.append(capture))
+    try:
+        connector.connect_source('tile', 'fake://cancelled')
+        connector.cancel('tile')
+        assert wait_until(lambda: captures and not captures[0].isOpened())
+        assert connected == []
+    finally:
+        connector.shutdown()
+
+
+# the states of the connector with the time they were reached
+def record_states(connector):
+    states = []
+    connector.state_changed.connect(lambda token, state: states.append((state, time.monotonic())))
+    return states
+
+
+def retry_delays(states):
+    return [
+        after[1] - before[1] for before, after in zip(states, states[1:])
+        if before[0] == SourceConnector.RETRYING and after[0] == SourceConnector.CONNECTING
+    ]
+
+
+def test_failed_opens_are_retried_with_exponential_backoff(qapp):
+    camera = FakeCamera(width=32, height=24, open_failures=4)
+    connector = SourceConnector(backoff=0.05, max_backoff=0.2, opener=lambda media_source, timeout: camera.open())
+    states = record_states(connector)
+    connected = []
+    connector.connected.connect(lambda token, capture: connected.append(capture))
+    try:
+        connector.connect_source('tile', 'fake://flaky')
+        assert wait_until(lambda: connected)
+    finally:
+        connector.shutdown()
+    assert [state for state, at in states].count(SourceConnector.RETRYING) == 4
+    assert states[-1][0] == SourceConnector.CONNECTED
+    delays = retry_delays(states)
+    for delay, expected in zip(delays, (0.05, 0.1, 0.2, 0.2)):
+        assert expected * 0.9 <= delay < expected + 0.15
+    assert camera.open_count == 5
+    connected[0].release()
+
+
+def test_a_slow_open_times_out_and_its_late_capture_is_ignored(qapp):
+    camera = FakeCamera(width=32, height=24, open_delay=0.5)
+    captures = []
+
+    def opener(media_source, timeout):
+        capture = camera.open()
+        captures.append(capture)
+        return capture
+
+    connector = SourceConnector(timeout=0.1, backoff=0.05, opener=opener)
+    states = record_states(connector)
+    connected = []
+    connector.connected.connect(lambda token, capture: connected.append(capture))
+    try:
+        start = time.monotonic()
+        connector.connect_source('tile', 'fake://slow')
+        assert wait_until(lambda: len(states) >= 2)
+        assert states[1][0] == SourceConnector.RETRYING
+        assert states[1][1] - start < 0.4
+        # the next open answers at once, before the first one
+        camera.open_delay = 0.0
+        assert wait_until(lambda: connected)
+        # the first capture comes back last
+        assert wait_until(lambda: len(captures) == 2 and not captures[1].isOpened())
+        wait_until(lambda: False, 0.1)
+    finally:
+        connector.shutdown()
+    assert connected == [captures[0]] and captures[0].isOpened()
+    assert [state for state, at in states].count(SourceConnector.CONNECTED) == 1
+    captures[0].release()
+
+
+def test_a_cancelled_source_is_not_retried(qapp):
+    camera = FakeCamera(width=32, height=24, open_failures=100)
+    connector = SourceConnector(backoff=0.05, opener=lambda media_source, timeout: camera.open())
+    states = record_states(connector)
+    try:
+        connector.connect_source('tile', 'fake://cancelled')
+        assert wait_until(lambda: len(states) >= 2)
+        connector.cancel('tile')
+        open_count = camera.open_count
+        wait_until(lambda: False, 0.3)
+    finally:
+        connector.shutdown()
+    assert camera.open_count == open_count
+    assert not connector.is_pending('tile')
@@ -0,0 +1,284 @@
+import json
+
+import pytest
+from PyQt6 import QtCore, QtWidgets, sip
+
+pytest.importorskip('moildev')
+
+from conftest import FakeModel, wait_until
+from surveillance_plugin import controller as controller_module, icons
+from surveillance_plugin.angles import clear_angle_lookups
+from surveillance_plugin.cameras import clear_cameras
+from surveillance_plugin.fake_camera import FakeCamera, register_fake_camera, unregister_fake_camera
+from surveillance_plugin.session import load_session, save_session
+
+PARAMETERS = {
+    'cameraName': 'camera', 'cameraFov': 220, 'cameraSensorWidth': 1.4, 'cameraSensorHeight': 1.4,
+    'iCx': 1320, 'iCy': 1017, 'ratio': 1, 'imageWidth': 2592, 'imageHeight': 1944, 'calibrationRatio': 4.05,
+    'parameter0': 0, 'parameter1': 0, 'parameter2': 0, 'parameter3': 10.11, 'parameter4': -85.241, 'parameter5': 282.21,
+}
+
+
+# registers a fake camera and returns it with the source select_media_source gives for it
+@pytest.fixture
+def camera():
+    names = []
+
+    def new_camera(name, params_name='parameters.json', **arguments):
+        fake_camera = FakeCamera(width=64, height=48, **arguments)
+        names.append(name)
+        return fake_camera, ['Streaming', 'camera', register_fake_camera(name, fake_camera), params_name]
+
+    yield new_camera
+    for name in names:
+        unregister_fake_camera(name)
+
+
+# the path of a camera parameter file, whose moildev and lookup tables are dropped after the test
+@pytest.fixture
+def params_name(tmp_path):
+    path = tmp_path / 'parameters.json'
+    path.write_text(json.dumps({'camera': PARAMETERS}))
+    yield str(path)
+    clear_cameras()
+    clear_angle_lookups()
+
+
+# a tile added with the add button, once its source streams
+def add_tile(controller, source):
+    controller.model.sources.append(source)
+    controller.add_clicked()
+    widget_tile = list(controller.each_tile)[-1]
+    model_apps = controller.each_tile[widget_tile]['model_apps']
+    assert wait_until(lambda: model_apps.image is not None)
+    return widget_tile
+
+
+def paused(controller, widget_tiles):
+    return [controller.each_tile[widget_tile]['tile_source'].paused for widget_tile in widget_tiles]
+
+
+def test_presets_move_the_tiles_without_reopening_their_sources(controller, camera):
+    cameras, widget_tiles = [], []
+    for name in ('first', 'second', 'third'):
+        fake_camera, source = camera(name)
+        cameras.append(fake_camera)
+        widget_tiles.append(add_tile(controller, source))
+    tile_sources = [controller.each_tile[widget_tile]['tile_source'] for widget_tile in widget_tiles]
+
+    controller.ui.layoutComboBox.setCurrentText('1x1')
+    assert (controller.tile_layout.rowCount(), controller.tile_layout.columnCount()) == (1, 1)
+    assert controller.tile_layout.widgetList() == widget_tiles[:1]
+    assert paused(controller, widget_tiles) == [False, True, True]
+
+    controller.ui.layoutComboBox.setCurrentText('3x4')
+    assert (controller.tile_layout.rowCount(), controller.tile_layout.columnCount()) == (3, 4)
+    assert [controller.tile_layout.widgetPosition(widget_tile)[:2] for widget_tile in widget_tiles] == [
+        (0, 0), (0, 1), (0, 2),
+    ]
+    assert paused(controller, widget_tiles) == [False, False, False]
+    assert [controller.each_tile[widget_tile]['tile_source'] for widget_tile in widget_tiles] == tile_sources
+    assert [fake_camera.open_count for fake_camera in cameras] == [1, 1, 1]
+    # the resumed sources stream again
+    frame_counts = [fake_camera.frame_count for fake_camera in cameras]
+    assert wait_until(lambda: all(c.frame_count > n for c, n in zip(cameras, frame_counts)))
+
+    session = load_session(controller_module.SESSION_PATH)
+    assert (session['rows'], session['columns']) == (3, 4)
+    assert len(session['tiles']) == 3
+
+
+def test_a_fullscreen_tile_is_shown_at_its_label_size_and_goes_back(controller, camera):
+    widget_tiles = [add_tile(controller, camera(name)[1]) for name in ('first', 'second')]
+    positions = [controller.tile_layout.widgetPosition(widget_tile) for widget_tile in widget_tiles]
+
+    controller.toggle_fullscreen(widget_tiles[1])
+    assert controller.tile_layout.widgetList() == widget_tiles[1:]
+    assert controller.ui.layoutComboBox.currentText() == '1x1'
+    assert paused(controller, widget_tiles) == [True, False]
+    label = controller.each_tile[widget_tiles[1]]['ui'].videoLabel
+    assert wait_until(lambda: label.width() > 300)
+    assert wait_until(lambda: controller.model.shown.get(label) == label.width())
+    # the wall to go back to stays the saved one
+    session = load_session(controller_module.SESSION_PATH)
+    assert (session['rows'], session['columns']) == (2, 4)
+
+    controller.toggle_fullscreen(widget_tiles[1])
+    assert controller.fullscreen is None
+    assert [controller.tile_layout.widgetPosition(widget_tile) for widget_tile in widget_tiles] == positions
+    assert controller.ui.layoutComboBox.currentText() == '2x4'
+    assert paused(controller, widget_tiles) == [False, False]
+    assert wait_until(lambda: controller.model.shown.get(label) == controller.each_tile[widget_tiles[1]]['width'])
+
+
+def test_one_setup_dialog_is_bound_to_each_tile_in_turn(controller, camera, params_name, monkeypatch):
+    cameras, sources = zip(*(camera(name, params_name) for name in ('first', 'second')))
+    widget_tiles = [add_tile(controller, source) for source in sources]
+    bindings = []
+
+    # the frames of the tile reach the dialog while it is open, the second tile picks a view
+    def exec(dialog):
+        bindings.append((dialog, dialog.picker, dialog.feed))
+        assert wait_until(lambda: dialog.feed.last_frame is not None and dialog.picker.frame is not None)
+        assert dialog.ui.label_image_original.pixmap() is not None
+        if len(bindings) == 1:
+            dialog.reject()
+        else:
+            dialog.picker.set_view(alpha=30, beta=90)
+            dialog.accept()
+        return dialog.result()
+
+    monkeypatch.setattr(controller_module.SetupDialog, 'exec', exec)
+    for widget_tile in widget_tiles:
+        controller.each_tile[widget_tile]['ui'].setupButton.click()
+
+    assert len(bindings) == 2 and bindings[0][0] is bindings[1][0] is controller.setup_dialog
+    assert bindings[0][1] is not bindings[1][1]
+    assert controller.setup_dialog.picker is None and controller.setup_dialog.feed is None
+    # the closed dialog is no longer fed by the sources
+    last_frames = [feed.last_frame for dialog, picker, feed in bindings]
+    frame_counts = [fake_camera.frame_count for fake_camera in cameras]
+    assert wait_until(lambda: all(c.frame_count > n + 5 for c, n in zip(cameras, frame_counts)))
+    assert [feed.last_frame for dialog, picker, feed in bindings] == last_frames
+
+    assert controller.each_tile[widget_tiles[0]]['view'] is None
+    assert wait_until(
+        lambda: controller.each_tile[widget_tiles[1]]['view'] == {'mode': 1, 'alpha': 30, 'beta': 90, 'zoom': 4},
+        timeout=10,
+    )
+
+
+def test_the_tiles_get_the_stylesheet_of_the_wall(controller, camera):
+    widget_tile = add_tile(controller, camera('first')[1])
+    assert 'QLabel { color: gray; }' in controller.styleSheet()
+    assert all(widget.styleSheet() == '' for widget in [widget_tile] + widget_tile.findChildren(QtWidgets.QWidget))
+
+    controller.model.styles['style_pushbutton'] = 'color: red;'
+    controller.set_stylesheet()
+    assert 'QPushButton { color: red; }' in controller.styleSheet()
+
+
+def test_the_wall_is_built_when_first_shown(qapp, tmp_path, monkeypatch):
+    monkeypatch.setattr(controller_module, 'SESSION_PATH', str(tmp_path / 'session.json'))
+    monkeypatch.setattr(controller_module, 'MAPS_CACHE_DIR', None)
+    monkeypatch.setattr(icons, 'icons_loaded', False)
+    controller = controller_module.Controller(FakeModel())
+    try:
+        # the preset is only read once the tile layout is built
+        controller.ui.layoutComboBox.setCurrentText('3x4')
+        controller.shutdown()
+        assert not controller.built and not hasattr(controller, 'tile_layout') and not icons.icons_loaded
+
+        controller.show()
+        assert controller.built and icons.icons_loaded
+        assert (controller.tile_layout.rowCount(), controller.tile_layout.columnCount()) == (3, 4)
+        assert wait_until(lambda: controller.tile_layout_ready)
+        tile_layout = controller.tile_layout
+        controller.hide()
+        controller.show()
+        assert controller.tile_layout is tile_layout
+    finally:
+        controller.close()
+        controller.deleteLater()
+
+
+def test_the_maps_go_first_when_the_wall_is_over_its_budget(controller, camera, params_name):
+    widget_tile = add_tile(controller, camera('first', params_name)[1])
+    view = {'mode': 1, 'alpha': 30, 'beta': 90, 'zoom': 4}
+    controller.commit_tile_view(widget_tile, view)
+    assert wait_until(lambda: controller.each_tile[widget_tile]['view'] == view, timeout=10)
+    assert wait_until(lambda: controller.memory.usage()['derived maps'] > 0)
+    usage = controller.memory.usage()
+    assert usage['maps'] > 0 and usage['moildevs'] > 0 and usage['frames'] > 0
+    assert usage['mapped maps'] == usage['picker maps'] == 0
+
+    budget = controller.memory.budget
+    controller.memory.budget = controller.memory.total() - usage['derived maps'] - usage['maps']
+    controller.memory.enforce()
+    evicted_usage = controller.memory.usage()
+    assert evicted_usage['derived maps'] == evicted_usage['maps'] == 0
+    assert evicted_usage['moildevs'] == usage['moildevs'] and evicted_usage['frames'] > 0
+
+    # the tile fetches the maps of its view again
+    controller.memory.budget = budget
+    assert wait_until(lambda: controller.memory.usage()['derived maps'] > 0, timeout=10)
+
+
+# the frames the camera gave in the next timeout seconds
+def frames_given(fake_camera, timeout=0.3):
+    frame_count = fake_camera.frame_count
+    wait_until(lambda: False, timeout)
+    return fake_camera.frame_count - frame_count
+
+
+def test_a_closed_tile_releases_its_source_and_its_cell(controller, camera):
+    fake_camera, source = camera('first')
+    widget_tile = add_tile(controller, source)
+    tile_source = controller.each_tile[widget_tile]['tile_source']
+    controller.each_tile[widget_tile]['ui'].pushButton.click()
+
+    assert controller.each_tile == {}
+    assert tile_source.reader is None
+    assert frames_given(fake_camera) <= 1
+    assert controller.tile_layout.findFreeArea(1, 1)[:2] == (0, 0)
+    assert load_session(controller_module.SESSION_PATH)['tiles'] == []
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete)
+    assert sip.isdeleted(widget_tile)
+
+
+def test_closing_a_view_group_closes_its_source_with_the_owner(controller, camera, params_name):
+    fake_camera, source = camera('fisheye', params_name)
+    controller.model.sources.append(source)
+    controller.fisheye_clicked()
+    widget_tiles = list(controller.each_tile)
+    assert len(widget_tiles) == 4
+    tile_source = controller.each_tile[widget_tiles[0]]['tile_source']
+    # the maps of the first view are there, the other views are still being computed
+    assert wait_until(lambda: controller.map_cache.memory_usage(derived=True) > 0, timeout=10)
+
+    controller.close_tile(widget_tiles[3])
+    assert list(controller.each_tile) == widget_tiles[:3]
+    assert tile_source.reader is not None and not tile_source.paused
+
+    controller.close_tile(widget_tiles[0])
+    assert controller.each_tile == {}
+    assert tile_source.reader is None
+    assert controller.map_worker.queued == {}
+    assert wait_until(lambda: not controller.map_worker.running, timeout=10)
+    assert controller.map_cache.memory_usage() == controller.map_cache.memory_usage(derived=True) == 0
+    assert controller.tile_layout.widgetList() == []
+    assert frames_given(fake_camera) <= 1
+
+
+def test_a_wall_window_shows_the_source_opened_once(controller, camera):
+    fake_cameras, sources = zip(*(camera(name) for name in ('first', 'second')))
+    save_session(controller_module.SESSION_PATH, 2, 4, [
+        {
+            'row': 0, 'column': 0, 'row_span': 1, 'column_span': 1, 'source': sources[0], 'view': None,
+            'group': None, 'wall': None,
+        },
+        {
+            'row': 1, 'column': 1, 'row_span': 1, 'column_span': 1, 'source': sources[1], 'view': None,
+            'group': None, 'wall': 0,
+        },
+    ], [{'rows': 2, 'columns': 2, 'screen': 'unplugged', 'geometry': [0, 0, 800, 600]}])
+    controller.restore_session()
+    assert len(controller.walls) == 1
+    wall = controller.walls[0]
+    widget_tiles = list(controller.each_tile)
+    assert wall.tile_layout.widgetList() == widget_tiles[1:]
+    assert wall.tile_layout.widgetPosition(widget_tiles[1]) == (1, 1, 1, 1)
+    label = controller.each_tile[widget_tiles[1]]['ui'].videoLabel
+    assert wait_until(lambda: label in controller.model.shown)
+    tile_source = controller.each_tile[widget_tiles[1]]['tile_source']
+
+    # the tiles of a closed wall window go back to the main wall with their source
+    wall.close()
+    assert controller.walls == []
+    assert controller.tile_layout.widgetList() == widget_tiles
+    assert controller.each_tile[widget_tiles[1]]['tile_source'] is tile_source and not tile_source.paused
+    assert [fake_camera.open_count for fake_camera in fake_cameras] == [1, 1]
+    frame_count = fake_cameras[1].frame_count
+    assert wait_until(lambda: fake_cameras[1].frame_count > frame_count)
+    session = load_session(controller_module.SESSION_PATH)
+    assert session['walls'] == [] and [tile['wall'] for tile in session['tiles']] == [None, None]
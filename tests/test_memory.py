@@ -0,0 +1,54 @@
+from surveillance_plugin.memory import MemoryBudget
+
+
+# a category holding nbytes, of which evict frees what it is asked for
+class Category:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+        self.asked = []
+
+    def usage(self):
+        return self.nbytes
+
+    def evict(self, nbytes):
+        self.asked.append(nbytes)
+        freed = min(nbytes, self.nbytes)
+        self.nbytes -= freed
+        return freed
+
+
+def test_lowest_priorities_are_evicted_first(qapp):
+    memory = MemoryBudget(budget=100)
+    memory.stop()
+    low, high, measured = Category(60), Category(60), Category(30)
+    memory.register('high', 1, high.usage, high.evict)
+    memory.register('low', 0, low.usage, low.evict)
+    memory.register('measured', 0, measured.usage)
+    evicted = []
+    memory.evicted.connect(evicted.append)
+
+    memory.enforce()
+    assert low.asked == [50] and high.asked == []
+    assert memory.total() == 100
+    assert evicted == [{'high': 60, 'low': 10, 'measured': 30}]
+
+    measured.nbytes = 90
+    memory.enforce()
+    assert low.asked == [50, 60] and high.asked == [50]
+    assert memory.usage() == {'high': 10, 'low': 0, 'measured': 90}
+
+
+def test_categories_that_are_not_resident_are_only_reported(qapp):
+    memory = MemoryBudget(budget=100)
+    memory.stop()
+    resident, mapped = Category(80), Category(500)
+    memory.register('resident', 1, resident.usage, resident.evict)
+    memory.register('mapped', 0, mapped.usage, mapped.evict, resident=False)
+    assert memory.total() == 80
+    assert memory.usage() == {'resident': 80, 'mapped': 500}
+    memory.enforce()
+    assert mapped.asked == [] and resident.asked == []
+
+    resident.nbytes = 130
+    memory.enforce()
+    assert mapped.asked == [] and resident.asked == [30]
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from surveillance_plugin.session import SESSION_VERSION, load_session, save_session
+
+TILES = [
+    {
+        'row': 0, 'column': 0, 'row_span': 1, 'column_span': 2,
+        'source': ['Streaming', 'camera', 'rtsp://camera/stream', 'parameters.json'],
+        'view': None, 'group': None, 'wall': None,
+    },
+    {
+        'row': None, 'column': None, 'row_span': 1, 'column_span': 1,
+        'source': ['Image/Video', 'camera', 'video.mp4', 'parameters.json'],
+        'view': {'mode': 1, 'alpha': 45, 'beta': 90, 'zoom': 4}, 'group': 0, 'wall': 0,
+    },
+]
+WALLS = [{'rows': 2, 'columns': 2, 'screen': 'HDMI-1', 'geometry': [1920, 0, 1920, 1080]}]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'session.json')
+    save_session(path, 3, 4, TILES, WALLS)
+    assert load_session(path) == {'version': SESSION_VERSION, 'rows': 3, 'columns': 4, 'tiles': TILES, 'walls': WALLS}
+    assert [entry.name for entry in tmp_path.iterdir()] == ['session.json']
+
+
+# sessions saved before the view groups and the wall windows have no group, wall nor walls
+def test_older_sessions_are_loaded_as_they_are(tmp_path):
+    path = tmp_path / 'session.json'
+    tiles = [{key: value for key, value in tile.items() if key not in ('group', 'wall')} for tile in TILES]
+    path.write_text(json.dumps({'version': SESSION_VERSION, 'rows': 2, 'columns': 4, 'tiles': tiles}))
+    session = load_session(str(path))
+    assert session['tiles'] == tiles
+    assert session.get('walls', []) == []
+    assert all(tile.get('group') is None and tile.get('wall') is None for tile in session['tiles'])
+
+
+def test_unreadable_sessions_are_ignored(tmp_path):
+    assert load_session(str(tmp_path / 'missing.json')) is None
+    path = tmp_path / 'session.json'
+    path.write_text('{"version": 1, "rows": ')
+    assert load_session(str(path)) is None
+    path.write_text(json.dumps({'version': SESSION_VERSION + 1, 'rows': 2, 'columns': 4, 'tiles': []}))
+    assert load_session(str(path)) is None
+
+
+def session_with(**changes):
+    session = {'version': SESSION_VERSION, 'rows': 3, 'columns': 4, 'tiles': TILES, 'walls': WALLS}
+    return dict(session, **changes)
+
+
+def tile_with(**changes):
+    return [dict(TILES[0], **changes)]
+
+
+@pytest.mark.parametrize('session', [
+    [], 'session', session_with(rows=0), session_with(columns='4'), session_with(tiles=None),
+    session_with(tiles=[{key: value for key, value in TILES[0].items() if key != 'row'}]),
+    session_with(tiles=tile_with(source=['Streaming', 'camera'])),
+    session_with(tiles=tile_with(view={'mode': 3, 'alpha': 0, 'beta': 0, 'zoom': 4})),
+    session_with(tiles=tile_with(row=None)), session_with(tiles=tile_with(row=-1)),
+    session_with(tiles=tile_with(column_span=4, column=1)),
+    session_with(tiles=[TILES[0], dict(TILES[0], column=1)]),
+    session_with(tiles=tile_with(wall=1)), session_with(tiles=tile_with(wall=0, row=1, row_span=2)),
+    session_with(walls=[{'rows': 2}]), session_with(walls=[dict(WALLS[0], geometry=[0, 0])]),
+])
+def test_malformed_sessions_are_ignored(tmp_path, session):
+    path = tmp_path / 'session.json'
+    path.write_text(json.dumps(session))
+    assert load_session(str(path)) is None
+
+
+def test_tiles_of_different_walls_may_share_cells(tmp_path):
+    path = tmp_path / 'session.json'
+    path.write_text(json.dumps(session_with(tiles=[TILES[0], dict(TILES[0], wall=0)])))
+    assert load_session(str(path)) is not None
+
+
+def test_sessions_that_cannot_be_written_are_not_kept(tmp_path):
+    assert not save_session(str(tmp_path / 'missing' / 'session.json'), 3, 4, TILES, WALLS)
+    (tmp_path / 'session.json').mkdir()
+    assert not save_session(str(tmp_path / 'session.json'), 3, 4, TILES, WALLS)
+    assert [entry.name for entry in tmp_path.iterdir()] == ['session.json']
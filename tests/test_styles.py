@@ -0,0 +1,43 @@
+from PyQt6 import QtWidgets
+
+from conftest import FakeModel
+from surveillance_plugin.styles import MAIN_ROLES, StyleSheets, role_rules
+
+
+# counts the stylesheets set on it, Qt polishes every child again for each of them
+class StyledWidget(QtWidgets.QWidget):
+    def __init__(self):
+        super().__init__()
+        self.sheets = []
+
+    def setStyleSheet(self, sheet):
+        self.sheets.append(sheet)
+        super().setStyleSheet(sheet)
+
+
+def test_declarations_get_the_selector_of_their_role():
+    assert role_rules('QLabel', 'color: gray;') == 'QLabel { color: gray; }'
+    assert role_rules('QLabel', 'QLabel#videoLabel { color: gray; }') == 'QLabel#videoLabel { color: gray; }'
+
+
+def test_the_stylesheet_is_made_and_set_once_per_theme(qapp):
+    model = FakeModel()
+    style_sheets = StyleSheets(model)
+    widget = StyledWidget()
+    label = QtWidgets.QLabel(widget)
+    for i in range(3):
+        style_sheets.apply(widget, MAIN_ROLES)
+    assert len(widget.sheets) == 1
+    assert widget.sheets[0].splitlines() == [
+        'QPushButton { color: black; }', 'QLabel { color: gray; }', 'QScrollArea { background: white; }',
+        'QComboBox { color: black; }', 'QSlider { color: black; }',
+    ]
+    # the children, e.g. the tiles, get it from their parent
+    assert label.styleSheet() == ''
+
+    model.styles['style_label'] = 'color: white;'
+    style_sheets.apply(widget, MAIN_ROLES)
+    assert len(widget.sheets) == 2 and 'QLabel { color: white; }' in widget.sheets[1]
+    model.styles['style_label'] = 'color: gray;'
+    style_sheets.apply(widget, MAIN_ROLES)
+    assert len(widget.sheets) == 3 and widget.sheets[2] is widget.sheets[0]
@@ -0,0 +1,425 @@
+import random
+
+import pytest
+from PyQt6 import QtCore, QtGui, QtWidgets, sip
+
+from conftest import wait_until
+from surveillance_plugin.QTileLayout6 import QTileLayout
+from surveillance_plugin.QTileLayout6 import tileLayout as tile_layout_module
+
+SPAN = 100
+SPACING = 5
+
+
+def new_layout(rows, columns):
+    tile_layout = QTileLayout(rows, columns, SPAN, SPAN)
+    tile_layout.setContentsMargins(0, 0, 0, 0)
+    holder = QtWidgets.QWidget()
+    holder.setLayout(tile_layout)
+    return tile_layout, holder
+
+
+# a widget in every other cell of a rows x columns layout
+@pytest.fixture
+def filled_layout(qapp):
+    tile_layout, holder = new_layout(20, 20)
+    widgets = []
+    for index in range(20 * 20):
+        widget = QtWidgets.QLabel(str(index))
+        tile_layout.addWidget(widget, *tile_layout.findFreeArea(1, 1))
+        widgets.append(widget)
+    for widget in widgets[::2]:
+        tile_layout.removeWidget(widget)
+    yield tile_layout, widgets[1::2]
+    holder.deleteLater()
+
+
+def viewport_at(row, column, rows=3, columns=3):
+    step = SPAN + SPACING
+    return QtCore.QRect(column * step, row * step, columns * step - SPACING, rows * step - SPACING)
+
+
+def live_cells(tile_layout):
+    return {
+        (row, column) for row in range(tile_layout.rowCount()) for column in range(tile_layout.columnCount())
+        if tile_layout.tileMap[row][column] is not None
+    }
+
+
+def test_scrolling_keeps_the_tiles_of_the_viewport_and_of_the_widgets(filled_layout):
+    tile_layout, widgets = filled_layout
+    events = []
+    tile_layout.tileVisibilityChanged.connect(lambda widget, visible: events.append((widget, visible)))
+    tile_layout.setVirtualized(True, margin=0)
+    random.seed(3)
+    for _ in range(30):
+        row, column = random.randrange(18), random.randrange(18)
+        tile_layout.setViewport(viewport_at(row, column))
+
+        visible = {(r, c) for r in range(row, row + 3) for c in range(column, column + 3)}
+        positions = {widget: tile_layout.widgetPosition(widget)[:2] for widget in widgets}
+        assert live_cells(tile_layout) == visible | set(positions.values())
+        assert tile_layout.hiddenWidgets == {widget for widget, cell in positions.items() if cell not in visible}
+
+    # every change of visibility was told once
+    shown = {widget for widget in widgets if tile_layout.isWidgetVisible(widget)}
+    last = {}
+    for widget, visible in events:
+        assert last.get(widget, True) != visible
+        last[widget] = visible
+    assert {widget for widget in widgets if last.get(widget, True)} == shown
+
+
+def test_scrolling_only_walks_the_cells_entering_and_leaving_the_viewport(filled_layout, monkeypatch):
+    tile_layout, widgets = filled_layout
+    tile_layout.setVirtualized(True, margin=0)
+    tile_layout.setViewport(viewport_at(0, 0))
+    walked = []
+    changed_cells = tile_layout._QTileLayout__changedCells
+
+    def walk(*areas):
+        for cell in changed_cells(*areas):
+            walked.append(cell)
+            yield cell
+
+    monkeypatch.setattr(tile_layout, '_QTileLayout__changedCells', walk)
+
+    tile_layout.setViewport(viewport_at(1, 0))
+    assert sorted(walked) == [(0, 0), (0, 1), (0, 2), (3, 0), (3, 1), (3, 2)]
+    walked.clear()
+    tile_layout.setViewport(viewport_at(1, 0))
+    assert walked == []
+
+
+def test_a_widget_removed_out_of_the_viewport_gives_its_cell_back(filled_layout):
+    tile_layout, widgets = filled_layout
+    tile_layout.setVirtualized(True, margin=0)
+    tile_layout.setViewport(viewport_at(0, 0))
+    widget = widgets[-1]
+    cell = tile_layout.widgetPosition(widget)[:2]
+    assert not tile_layout.isWidgetVisible(widget)
+
+    tile_layout.removeWidget(widget)
+    assert cell not in live_cells(tile_layout)
+    assert widget not in tile_layout.hiddenWidgets
+
+
+def test_widgets_are_visible_when_told_so(filled_layout):
+    tile_layout, widgets = filled_layout
+    tile_layout.setVirtualized(True, margin=0)
+    tile_layout.setViewport(viewport_at(0, 0))
+    told = []
+    tile_layout.tileVisibilityChanged.connect(
+        lambda widget, visible: told.append(tile_layout.isWidgetVisible(widget) == visible)
+    )
+    tile_layout.setViewport(viewport_at(10, 10))
+    tile_layout.setVirtualized(False)
+    assert told and all(told)
+    assert all(tile_layout.isWidgetVisible(widget) for widget in widgets)
+
+
+# the cells of the widgets, from their positions rather than from the occupancy bitmap
+def occupied_cells(tile_layout):
+    cells = set()
+    for widget in tile_layout.widgetList():
+        row, column, row_span, column_span = tile_layout.widgetPosition(widget)
+        cells.update((row + r, column + c) for r in range(row_span) for c in range(column_span))
+    return cells
+
+
+def first_free_area(tile_layout, row_span, column_span):
+    cells = occupied_cells(tile_layout)
+    for row in range(tile_layout.rowCount() - row_span + 1):
+        for column in range(tile_layout.columnCount() - column_span + 1):
+            if not any((row + r, column + c) in cells for r in range(row_span) for c in range(column_span)):
+                return row, column
+    return None
+
+
+def test_find_free_area_follows_the_widgets_added_and_removed(qapp):
+    tile_layout, holder = new_layout(6, 7)
+    random.seed(5)
+    widgets = []
+    for _ in range(200):
+        row_span, column_span = random.randint(1, 3), random.randint(1, 3)
+        free_area = tile_layout.findFreeArea(row_span, column_span)
+        assert free_area == first_free_area(tile_layout, row_span, column_span)
+        if free_area is not None and random.random() < 0.6:
+            widget = QtWidgets.QLabel()
+            tile_layout.addWidget(widget, *free_area, row_span, column_span)
+            widgets.append(widget)
+        elif widgets:
+            tile_layout.removeWidget(widgets.pop(random.randrange(len(widgets))))
+        assert tile_layout.occupiedCells == len(occupied_cells(tile_layout))
+        assert all(
+            tile_layout.isAreaEmpty(row, column, 1, 1) == ((row, column) not in occupied_cells(tile_layout))
+            for row in range(6) for column in range(7)
+        )
+    holder.deleteLater()
+
+
+# the occupancy rows findFreeArea reads
+class CountingRows(list):
+    reads = 0
+
+    def __getitem__(self, index):
+        CountingRows.reads += 1
+        return super().__getitem__(index)
+
+
+def test_find_free_area_of_a_16x16_layout(qapp, monkeypatch):
+    tile_layout, holder = new_layout(16, 16)
+    random.seed(11)
+    widgets = []
+    for _ in range(600):
+        row_span, column_span = random.choice([(1, 1), (1, 1), (1, 2), (2, 1), (2, 3), (4, 4)])
+        free_area = tile_layout.findFreeArea(row_span, column_span)
+        assert free_area == first_free_area(tile_layout, row_span, column_span)
+        if free_area is not None and random.random() < 0.7:
+            widget = QtWidgets.QLabel()
+            tile_layout.addWidget(widget, *free_area, row_span, column_span)
+            widgets.append(widget)
+        elif widgets:
+            tile_layout.removeWidget(widgets.pop(random.randrange(len(widgets))))
+    assert tile_layout.occupiedCells == len(occupied_cells(tile_layout))
+
+    # a 1x1 area is found in the first row with a free cell, without reading the full rows before it
+    for widget in widgets:
+        tile_layout.removeWidget(widget)
+    monkeypatch.setattr(tile_layout, 'occupancy', CountingRows(tile_layout.occupancy))
+    for index in range(16 * 16):
+        CountingRows.reads = 0
+        free_area = tile_layout.findFreeArea(1, 1)
+        assert free_area == divmod(index, 16) and CountingRows.reads == 1
+        tile_layout.addWidget(QtWidgets.QLabel(), *free_area)
+    assert tile_layout.findFreeArea(1, 1) is None
+    holder.deleteLater()
+
+
+def test_find_free_area_of_a_full_or_too_small_layout(qapp):
+    tile_layout, holder = new_layout(2, 3)
+    assert tile_layout.findFreeArea(3, 1) is None
+    assert tile_layout.findFreeArea(1, 4) is None
+    tile_layout.addWidget(QtWidgets.QLabel(), 0, 0, 2, 2)
+    assert tile_layout.findFreeArea(2, 1) == (0, 2)
+    assert tile_layout.findFreeArea(1, 2) is None
+    tile_layout.addWidget(QtWidgets.QLabel(), 0, 2, 2, 1)
+    assert tile_layout.findFreeArea(1, 1) is None
+    tile_layout.addColumns(1)
+    assert tile_layout.findFreeArea(2, 1) == (0, 3)
+    tile_layout.removeColumns(1)
+    assert tile_layout.findFreeArea(1, 1) is None
+    tile_layout.addRows(1)
+    assert tile_layout.findFreeArea(1, 3) == (2, 0)
+    tile_layout.removeRows(1)
+    assert tile_layout.findFreeArea(1, 1) is None
+    holder.deleteLater()
+
+
+# counts the tiles the layout builds, pooled tiles are reset instead
+@pytest.fixture
+def created_tiles(monkeypatch):
+    created = []
+    tile_class = tile_layout_module.Tile
+
+    def new_tile(*args, **kwargs):
+        tile = tile_class(*args, **kwargs)
+        created.append(tile)
+        return tile
+
+    monkeypatch.setattr(tile_layout_module, 'Tile', new_tile)
+    return created
+
+
+# a drag of tile dropped at row, column, as the QDrag of Tile.mouseMoveEvent would do it
+class FakeDrag:
+    def __init__(self, tile_layout, row, column):
+        self.tile_layout = tile_layout
+        self.row = row
+        self.column = column
+
+    def exec(self):
+        self.tile_layout.addWidget(self.tile_layout.getWidgetToDrop(), self.row, self.column, 1, 1)
+        return 2
+
+
+def drag_and_drop(tile_layout, widget, row, column):
+    origin_row, origin_column = tile_layout.widgetPosition(widget)[:2]
+    tile = tile_layout.tileMap[origin_row][origin_column]
+    tile._Tile__dragAndDropProcess(FakeDrag(tile_layout, row, column))
+    assert tile_layout.widgetPosition(widget)[:2] == (row, column)
+    assert tile_layout.tileMap[origin_row][origin_column] is not tile
+
+
+def test_dragging_and_dropping_reuses_the_pooled_tiles(qapp, created_tiles):
+    tile_layout, holder = new_layout(4, 4)
+    widget = QtWidgets.QLabel()
+    tile_layout.addWidget(widget, 0, 0)
+    # the first drag needs a tile for the cell it leaves, the dragged tile is pooled once it is over
+    drag_and_drop(tile_layout, widget, 1, 1)
+    tile_count = len(created_tiles)
+    random.seed(7)
+    for _ in range(50):
+        cells = [(row, column) for row in range(4) for column in range(4)]
+        cells.remove(tile_layout.widgetPosition(widget)[:2])
+        drag_and_drop(tile_layout, widget, *random.choice(cells))
+
+    assert len(created_tiles) == tile_count
+    assert len(tile_layout.tilePool) <= 1
+    holder.deleteLater()
+
+
+def test_the_tile_pool_shrinks_with_the_grid(qapp):
+    tile_layout, holder = new_layout(8, 8)
+    tile_layout.removeRows(4)
+    assert len(tile_layout.tilePool) <= 4 * 8
+    tile_layout.removeColumns(4)
+    assert len(tile_layout.tilePool) <= 4 * 4
+    qapp.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete.value)
+    assert len(holder.findChildren(tile_layout_module.Tile)) == 4 * 4 + len(tile_layout.tilePool)
+    holder.deleteLater()
+
+
+def test_widgets_are_listed_in_the_order_they_were_added(qapp):
+    tile_layout, holder = new_layout(3, 3)
+    widgets = [QtWidgets.QLabel(str(index)) for index in range(5)]
+    for widget in widgets:
+        tile_layout.addWidget(widget, *tile_layout.findFreeArea(1, 1))
+    assert tile_layout.widgetList() == widgets
+
+    tile_layout.removeWidget(widgets[1])
+    tile_layout.removeWidget(widgets[3])
+    assert not tile_layout.hasWidget(widgets[1])
+    tile_layout.addWidget(widgets[1], 2, 1, 1, 2)
+    assert tile_layout.widgetList() == [widgets[0], widgets[2], widgets[4], widgets[1]]
+    assert tile_layout.widgetPosition(widgets[1]) == (2, 1, 1, 2)
+    assert {tile: widget for widget, tile in tile_layout.widgetToTile.items()} == tile_layout.tileToWidget
+    with pytest.raises(AssertionError):
+        tile_layout.addWidget(widgets[0], 1, 1)
+    with pytest.raises(AssertionError):
+        tile_layout.removeWidget(widgets[3])
+    holder.deleteLater()
+
+
+# the tiles whose color was set, and how many times
+@pytest.fixture
+def painted_tiles(monkeypatch):
+    painted = []
+    change_color = tile_layout_module.Tile.changeColor
+
+    def paint(tile, palette):
+        painted.append(tile)
+        change_color(tile, palette)
+
+    monkeypatch.setattr(tile_layout_module.Tile, 'changeColor', paint)
+    return painted
+
+
+def test_only_the_tiles_whose_color_changed_are_painted(qapp, painted_tiles):
+    tile_layout, holder = new_layout(16, 16)
+    tile_layout.changeTilesColor('idle')
+    painted_tiles.clear()
+
+    tile_layout.changeTilesColor('empty_check', (3, 4), (2, 2))
+    tile_layout.changeTilesColor('empty_check', (3, 5), (2, 2))
+    assert len(painted_tiles) == 8 and len(set(painted_tiles)) == 6
+    painted_tiles.clear()
+    # back to the base color: only the highlighted tiles
+    tile_layout.changeTilesColor('idle')
+    assert len(painted_tiles) == 6
+    painted_tiles.clear()
+    tile_layout.changeTilesColor('idle')
+    assert painted_tiles == []
+
+    # another base color repaints every tile, with one palette per color
+    tile_layout.changeTilesColor('drag_and_drop')
+    assert len(set(painted_tiles)) == 16 * 16
+    assert len({id(tile.currentPalette) for tile in painted_tiles}) == 1
+    holder.deleteLater()
+
+
+def test_resizes_are_coalesced_and_settle_once(qapp, monkeypatch):
+    tile_layout, holder = new_layout(4, 4)
+    tile_layout.setResizeSettleDelay(50)
+    relayouts = []
+    update_all_tiles = tile_layout._QTileLayout__updateAllTiles
+    monkeypatch.setattr(tile_layout, '_QTileLayout__updateAllTiles', lambda: (relayouts.append(1), update_all_tiles()))
+    settled = []
+    tile_layout.globalSizeSettled.connect(lambda vertical_span, horizontal_span: settled.append(horizontal_span))
+
+    for width in range(800, 1200, 10):
+        tile_layout.updateGlobalSize(QtGui.QResizeEvent(QtCore.QSize(width, 600), QtCore.QSize()))
+    # nothing is laid out while the events come
+    assert relayouts == [] and tile_layout.horizontalSpan == SPAN
+    assert wait_until(lambda: settled)
+    wait_until(lambda: False, 0.1)
+
+    expected_span = (1190 - 3 * tile_layout.horizontalSpacing()) // 4
+    assert settled == [expected_span] and tile_layout.horizontalSpan == expected_span
+    assert len(relayouts) == 1
+    holder.deleteLater()
+
+
+# the QGridLayout placements of the tiles
+@pytest.fixture
+def grid_calls(monkeypatch):
+    calls = []
+    add_widget, remove_widget = QtWidgets.QGridLayout.addWidget, QtWidgets.QGridLayout.removeWidget
+
+    def grid_add_widget(layout, *args):
+        calls.append('add')
+        add_widget(layout, *args)
+
+    def grid_remove_widget(layout, widget):
+        calls.append('remove')
+        remove_widget(layout, widget)
+
+    monkeypatch.setattr(QtWidgets.QGridLayout, 'addWidget', grid_add_widget)
+    monkeypatch.setattr(QtWidgets.QGridLayout, 'removeWidget', grid_remove_widget)
+    return calls
+
+
+def test_a_batch_places_the_final_tiles_once(qapp, grid_calls):
+    tile_layout, holder = new_layout(8, 8)
+    widgets = [QtWidgets.QLabel(str(index)) for index in range(64)]
+    for widget in widgets:
+        tile_layout.addWidget(widget, *tile_layout.findFreeArea(1, 1))
+    grid_calls.clear()
+
+    tile_layout.beginUpdate()
+    tile_layout.beginUpdate()
+    for widget in widgets:
+        tile_layout.removeWidget(widget)
+    tile_layout.endUpdate()
+    assert tile_layout.isUpdating() and not holder.updatesEnabled()
+    tile_layout.removeRows(4)
+    tile_layout.removeColumns(4)
+    for widget in widgets[:8]:
+        tile_layout.addWidget(widget, *tile_layout.findFreeArea(1, 2), 1, 2)
+    assert grid_calls == []
+    tile_layout.endUpdate()
+
+    assert not tile_layout.isUpdating() and holder.updatesEnabled()
+    assert grid_calls.count('add') == 8
+    tiles = {tile_layout.tileMap[row][column] for row in range(4) for column in range(4)}
+    assert len(tiles) == 8 and tile_layout.count() == 8
+    assert all(tile_layout.itemAtPosition(tile.getFromRow(), tile.getFromColumn()).widget() is tile for tile in tiles)
+    assert tile_layout.widgetList() == widgets[:8]
+    holder.deleteLater()
+
+
+def test_merges_and_splits_reuse_the_pooled_tiles(qapp, created_tiles):
+    tile_layout, holder = new_layout(6, 6)
+    tile_count = len(created_tiles)
+    widget = QtWidgets.QLabel()
+    random.seed(13)
+    for _ in range(40):
+        row_span, column_span = random.randint(1, 4), random.randint(1, 4)
+        tile_layout.addWidget(widget, *tile_layout.findFreeArea(row_span, column_span), row_span, column_span)
+        tile_layout.removeWidget(widget)
+    assert len(created_tiles) == tile_count == 36
+    assert tile_layout.count() == 36
+    # the removed widget is left to its owner, with the holder of the layout as parent
+    qapp.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete.value)
+    assert not sip.isdeleted(widget) and widget.parent() is holder
+    holder.deleteLater()
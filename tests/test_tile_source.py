@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+import pytest
+from PyQt6 import sip
+
+from conftest import FakeModelApps, wait_until
+from surveillance_plugin.fake_camera import FakeCamera
+from surveillance_plugin.tile_source import TileSource
+
+
+def stream_source():
+    return ['Streaming', 'camera', 'fake://camera', 'parameters.json']
+
+
+def test_missing_model_apps_attributes_fail_at_once(qapp):
+    with pytest.raises(AttributeError, match='image, image_result, signal_image_original'):
+        TileSource(object())
+
+
+def test_images_are_read_once(qapp, tmp_path):
+    image_path = str(tmp_path / 'image.png')
+    cv2.imwrite(image_path, np.zeros((8, 8, 3), np.uint8))
+    capture = FakeCamera().open()
+    model_apps = FakeModelApps()
+    tile_source = TileSource(model_apps)
+    tile_source.open(['Image/Video', 'camera', image_path, 'parameters.json'], capture)
+    assert model_apps.image.shape == (8, 8, 3) and len(model_apps.results) == 1
+    assert not capture.isOpened()
+    assert tile_source.reader is None
+
+
+def test_frames_of_the_capture_go_through_model_apps(qapp):
+    camera = FakeCamera(width=32, height=24, fps=100)
+    model_apps = FakeModelApps()
+    tile_source = TileSource(model_apps)
+    tile_source.open(stream_source(), camera.open())
+    try:
+        assert wait_until(lambda: len(model_apps.results) >= 3)
+        assert model_apps.image.shape == (24, 32, 3)
+        assert camera.open_count == 1
+    finally:
+        tile_source.stop()
+
+
+def test_pause_keeps_the_capture(qapp):
+    camera = FakeCamera(width=32, height=24, fps=100)
+    model_apps = FakeModelApps()
+    tile_source = TileSource(model_apps)
+    capture = camera.open()
+    tile_source.open(stream_source(), capture)
+    try:
+        assert wait_until(lambda: model_apps.results)
+        tile_source.pause()
+        paused_since = tile_source.paused_since
+        assert tile_source.paused and paused_since is not None
+        tile_source.pause()
+        assert tile_source.paused_since == paused_since
+        wait_until(lambda: False, 0.1)
+        frame_count = camera.frame_count
+        wait_until(lambda: False, 0.1)
+        assert camera.frame_count == frame_count and capture.isOpened()
+        tile_source.resume()
+        assert tile_source.paused_since is None
+        assert wait_until(lambda: camera.frame_count > frame_count)
+    finally:
+        tile_source.stop()
+
+
+def test_stop_releases_the_capture(qapp):
+    camera = FakeCamera(width=32, height=24, fps=100)
+    model_apps = FakeModelApps()
+    tile_source = TileSource(model_apps)
+    capture = camera.open()
+    tile_source.open(stream_source(), capture)
+    assert wait_until(lambda: model_apps.results)
+    reader = tile_source.reader
+    tile_source.pause()
+    tile_source.stop()
+    reader['thread'].join(5)
+    assert not capture.isOpened()
+    assert model_apps.image is None and not tile_source.paused and tile_source.paused_since is None
+    results = len(model_apps.results)
+    wait_until(lambda: False, 0.1)
+    assert len(model_apps.results) == results
+
+
+# without an exception in the reader thread
+@pytest.mark.filterwarnings('error::pytest.PytestUnhandledThreadExceptionWarning')
+def test_a_deleted_tile_source_releases_the_capture(qapp):
+    camera = FakeCamera(width=32, height=24, fps=100)
+    model_apps = FakeModelApps()
+    tile_source = TileSource(model_apps)
+    capture = camera.open()
+    tile_source.open(stream_source(), capture)
+    assert wait_until(lambda: model_apps.results)
+    reader = tile_source.reader
+    sip.delete(tile_source)
+    reader['thread'].join(5)
+    assert not reader['thread'].is_alive()
+    assert not capture.isOpened()
@@ -0,0 +1,86 @@
+import numpy as np
+from PyQt6 import QtGui, QtWidgets
+
+from surveillance_plugin import view_picker
+from surveillance_plugin.view_picker import PolygonOverlay, PreviewFeed
+
+# the outline of a view in an original image of 400x300
+POLYGON = np.array([(100, 75), (300, 75), (300, 225), (100, 225)], np.float32)
+
+
+# a label showing an original image at half its size
+def original_label():
+    label = QtWidgets.QLabel()
+    label.resize(200, 150)
+    pixmap = QtGui.QPixmap(200, 150)
+    pixmap.fill()
+    label.setPixmap(pixmap)
+    return label
+
+
+def test_the_polygon_is_drawn_once_over_the_original_image(qapp):
+    label = original_label()
+    overlay = PolygonOverlay(label)
+    overlay.set_polygon(POLYGON, (400, 300))
+    image = overlay.grab().toImage()
+    # the right side of the polygon, scaled to the label
+    assert image.pixelColor(150, 75).green() > 200 and image.pixelColor(150, 75).red() < 50
+    overlay_pixmap = overlay.overlay
+    # the rest of the overlay lets the original image through
+    assert overlay_pixmap.toImage().pixelColor(100, 75).alpha() == 0
+
+    # the frames repaint the overlay, which draws its pixmap again
+    overlay.grab()
+    overlay.grab()
+    assert overlay.overlay is overlay_pixmap
+
+    overlay.set_polygon(POLYGON / 2, (400, 300))
+    overlay.grab()
+    assert overlay.overlay is not overlay_pixmap
+    overlay_pixmap = overlay.overlay
+    # the resize events of a hidden label wait until it is shown
+    label.show()
+    label.resize(300, 200)
+    assert overlay.size() == label.size()
+    overlay.grab()
+    assert overlay.overlay is not overlay_pixmap
+
+
+def test_nothing_is_drawn_without_polygon_or_image(qapp):
+    label = QtWidgets.QLabel()
+    label.resize(200, 150)
+    overlay = PolygonOverlay(label)
+    overlay.set_polygon(POLYGON, (400, 300))
+    overlay.grab()
+    assert overlay.overlay is None
+    label.setPixmap(original_label().pixmap())
+    overlay.set_polygon(None, None)
+    overlay.grab()
+    assert overlay.overlay is None
+
+
+# the frames the preview renders the picked view from
+class FramesPicker:
+    def __init__(self):
+        self.frames = []
+
+    def set_frame(self, image):
+        self.frames.append(image)
+
+
+def test_the_preview_takes_the_frames_at_its_own_rate(qapp, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(view_picker.time, 'monotonic', lambda: now[0])
+    picker = FramesPicker()
+    feed = PreviewFeed(picker, width=100, max_fps=8)
+    originals = []
+    feed.original.connect(originals.append)
+
+    # a source of 32 fps for one second
+    for i in range(32):
+        feed.frame(np.full((300, 400, 3), i, np.uint8))
+        now[0] += 1 / 32
+    feed.frame(None)
+    assert [frame[0, 0, 0] for frame in picker.frames] == list(range(0, 32, 4))
+    # the original image is scaled down once, to the label width
+    assert [original.shape for original in originals] == [(75, 100, 3)] * 8
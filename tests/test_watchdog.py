@@ -0,0 +1,167 @@
+import pytest
+
+from conftest import FakeModelApps, wait_until
+from surveillance_plugin import watchdog as watchdog_module
+from surveillance_plugin.connector import SourceConnector
+from surveillance_plugin.fake_camera import FakeCamera, register_fake_camera, unregister_fake_camera
+from surveillance_plugin.tile_source import TileSource
+from surveillance_plugin.watchdog import StreamWatchdog
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+# a watchdog on a clock of its own, checked by hand
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watchdog_module, 'time', clock)
+    return clock
+
+
+def new_watchdog(**arguments):
+    watchdog = StreamWatchdog(check_interval=3600, **arguments)
+    events = []
+    watchdog.state_changed.connect(lambda token, state: events.append(state))
+    watchdog.restart.connect(lambda token: events.append('restart'))
+    return watchdog, events
+
+
+def frames(watchdog, clock, token, count, interval):
+    for _ in range(count):
+        clock.now += interval
+        watchdog.frame(token)
+
+
+def test_a_still_image_is_never_stalled(qapp, clock):
+    watchdog, events = new_watchdog(stall_timeout=5.0)
+    watchdog.watch('image')
+    watchdog.frame('image')
+    clock.now += 100
+    watchdog.check()
+    assert events == [] and watchdog.stats('image')['state'] == StreamWatchdog.STREAMING
+
+
+def test_a_stalled_stream_is_restarted(qapp, clock):
+    watchdog, events = new_watchdog(stall_timeout=5.0)
+    stream = watchdog.watch('camera')
+    frames(watchdog, clock, 'camera', 10, 0.1)
+    clock.now += 4
+    watchdog.check()
+    assert events == []
+    clock.now += 2
+    watchdog.check()
+    assert events == [StreamWatchdog.STALLED, 'restart']
+    assert stream['frames'] == 0 and stream['last_frame'] is None
+    frames(watchdog, clock, 'camera', 1, 0.1)
+    assert events[-1] == StreamWatchdog.STREAMING
+
+
+def test_a_slow_stream_is_degraded(qapp, clock):
+    watchdog, events = new_watchdog(stall_timeout=5.0, min_fps=2.0)
+    watchdog.watch('camera')
+    frames(watchdog, clock, 'camera', 5, 1.0)
+    watchdog.check()
+    assert events == [StreamWatchdog.DEGRADED]
+    frames(watchdog, clock, 'camera', 5, 0.01)
+    watchdog.check()
+    assert events == [StreamWatchdog.DEGRADED, StreamWatchdog.STREAMING]
+
+
+def test_restarts_are_given_up_after_max_restarts(qapp, clock):
+    watchdog, events = new_watchdog(stall_timeout=1.0, max_restarts=2, restart_window=60.0)
+    watchdog.watch('camera')
+    for _ in range(3):
+        frames(watchdog, clock, 'camera', 2, 0.1)
+        clock.now += 2
+        watchdog.check()
+    assert events.count('restart') == 2
+    assert watchdog.stats('camera')['state'] == StreamWatchdog.FAILED
+    # a frame brings a failed stream back, and the restarts are counted again once out of the window
+    frames(watchdog, clock, 'camera', 2, 0.1)
+    clock.now += 60
+    watchdog.check()
+    assert events.count('restart') == 3
+
+
+def test_unwatched_streams_are_left_alone(qapp, clock):
+    watchdog, events = new_watchdog(stall_timeout=1.0)
+    watchdog.watch('camera')
+    frames(watchdog, clock, 'camera', 2, 0.1)
+    watchdog.unwatch('camera')
+    watchdog.frame('camera')
+    clock.now += 10
+    watchdog.check()
+    assert events == [] and watchdog.stats('camera') is None
+
+
+# a fake camera read by a tile source, opened through the connector and restarted by the watchdog, wired like
+# the controller does it
+class Tile:
+    def __init__(self, camera):
+        self.media_source = register_fake_camera('watched', camera)
+        self.model_apps = FakeModelApps()
+        self.tile_source = TileSource(self.model_apps)
+        self.connector = SourceConnector(timeout=0.5, backoff=0.05, max_backoff=0.1)
+        self.watchdog = StreamWatchdog(stall_timeout=0.3, check_interval=0.05)
+        self.states = []
+        self.watchdog.state_changed.connect(lambda token, state: self.states.append(state))
+        self.connector.connected.connect(self.connected)
+        self.watchdog.restart.connect(self.restart)
+        self.model_apps.image_result.connect(lambda image: self.watchdog.frame('tile'))
+        self.connector.connect_source('tile', self.media_source)
+
+    def connected(self, token, capture):
+        self.tile_source.open(['Streaming', 'camera', self.media_source, 'parameters.json'], capture)
+        self.watchdog.watch('tile')
+
+    def restart(self, token):
+        self.tile_source.stop()
+        self.connector.reconnect('tile', self.media_source)
+
+    def frame_count(self):
+        return len(self.model_apps.results)
+
+    def close(self):
+        self.tile_source.stop()
+        self.connector.shutdown()
+        self.watchdog.timer.stop()
+        unregister_fake_camera('watched')
+
+
+def test_a_stalled_camera_is_restarted_and_streams_again(qapp):
+    camera = FakeCamera(width=32, height=24, read_timeout=0.1, fps=100)
+    tile = Tile(camera)
+    try:
+        assert wait_until(lambda: tile.frame_count() > 5)
+        camera.stall()
+        assert wait_until(lambda: StreamWatchdog.STALLED in tile.states)
+        frame_count = tile.frame_count()
+        camera.resume()
+        assert wait_until(lambda: tile.frame_count() > frame_count + 5)
+        assert tile.watchdog.stats('tile')['state'] == StreamWatchdog.STREAMING
+        assert camera.open_count >= 2
+    finally:
+        tile.close()
+
+
+def test_a_disconnected_camera_is_reconnected(qapp):
+    camera = FakeCamera(width=32, height=24, read_timeout=0.1, fps=100)
+    tile = Tile(camera)
+    try:
+        assert wait_until(lambda: tile.frame_count() > 5)
+        camera.disconnect()
+        assert wait_until(lambda: StreamWatchdog.STALLED in tile.states)
+        assert wait_until(lambda: camera.open_count >= 3)
+        assert tile.connector.is_pending('tile')
+        frame_count = tile.frame_count()
+        camera.connect()
+        assert wait_until(lambda: tile.frame_count() > frame_count + 5)
+        assert not tile.connector.is_pending('tile')
+    finally:
+        tile.close()
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from PyQt6 import QtCore
+import cv2
+
+# the attributes of ModelApps a tile source uses
+MODEL_APPS_ATTRIBUTES = ('image', 'image_result', 'signal_image_original')
+# frame rate of the captures that do not tell theirs (e.g. some network streams)
+DEFAULT_FPS = 30.0
+# time between two reads of a capture that failed, until the watchdog restarts it
+READ_RETRY_INTERVAL = 0.1
+
+
+# an image is read once, every other source is a capture read for every frame
+def is_image_source(media_source):
+    return isinstance(media_source, str) and os.path.isfile(media_source) and cv2.haveImageReader(media_source)
+
+
+# the source of a tile, its frames go through the ModelApps of the tile, which the tile and the setup dialog
+# get them from: an image is read once, a video or a stream is read from the capture the connector opened
+# (see SourceConnector.connected) in a thread of its own, so that a slow or stalled read never blocks the GUI thread
+# only the latest frame is delivered to the GUI thread, the ones read while it is busy are dropped
+# the ModelApps attributes it needs are checked when the tile is made, so that a MoilApp without them fails there
+# the moildev of ModelApps is not set up for every tile, the tiles share the one of their camera (see cameras.py)
+class TileSource(QtCore.QObject):
+    # a frame was read, emitted from the reader thread, delivered in the GUI thread
+    frame_read = QtCore.pyqtSignal()
+
+    def __init__(self, model_apps):
+        super().__init__()
+        missing = [name for name in MODEL_APPS_ATTRIBUTES if not hasattr(model_apps, name)]
+        if missing:
+            raise AttributeError('ModelApps has no {}, the tile sources cannot be read'.format(', '.join(missing)))
+        self.model_apps = model_apps
+        self.model_apps_set_up = False
+        self.paused = False
+        # time.monotonic() of the pause, None while the source is not paused
+        self.paused_since = None
+        # the reader of the capture: {'capture', 'interval', 'running', 'stopped', 'thread'}, None for an image
+        self.reader = None
+        self.lock = threading.Lock()
+        # the latest frame read and its reader, None once delivered
+        self.latest = None
+        self.frame_read.connect(self.__deliver)
+
+    # capture may only be None for an image
+    def open(self, source, capture=None):
+        self.stop()
+        media_source = source[2]
+        if is_image_source(media_source):
+            if capture is not None:
+                capture.release()
+            image = cv2.imread(media_source)
+            if image is not None:
+                self.__show(image)
+            return
+        if capture is None:
+            raise ValueError('{} is opened by the connector'.format(media_source))
+
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        self.reader = {
+            'capture': capture,
+            'interval': 1 / (fps if fps > 0 else DEFAULT_FPS),
+            'running': threading.Event(),
+            'stopped': threading.Event(),
+        }
+        self.reader['running'].set()
+        self.reader['thread'] = threading.Thread(
+            target=self.__read, args=(self.reader,), name='tile source', daemon=True
+        )
+        self.reader['thread'].start()
+
+    # the capture stays open, so resuming is immediate
+    def pause(self):
+        if self.reader is not None and not self.paused:
+            self.reader['running'].clear()
+            self.paused = True
+            self.paused_since = time.monotonic()
+
+    def resume(self):
+        if self.paused:
+            self.reader['running'].set()
+            self.paused = False
+            self.paused_since = None
+
+    # the capture is released by the reader thread once its current read is over, the last frame at once
+    def stop(self):
+        if self.reader is not None:
+            self.reader['stopped'].set()
+            self.reader['running'].set()
+            self.reader = None
+        with self.lock:
+            self.latest = None
+        self.model_apps.image = None
+        self.paused = False
+        self.paused_since = None
+
+    # the moildev of ModelApps, only for a camera whose parameter file the plugin cannot read
+    def model_apps_moildev(self):
+        if not self.model_apps_set_up:
+            # I have no idea how this works but I think the order of calling these is important
+            self.model_apps.create_moildev()
+            self.model_apps.create_image_original()
+            self.model_apps.update_file_config()
+            self.model_apps_set_up = True
+        return self.model_apps.moildev
+
+    def __read(self, reader):
+        capture = reader['capture']
+        next_read = time.monotonic()
+        try:
+            while not reader['stopped'].is_set():
+                reader['running'].wait()
+                if reader['stopped'].is_set():
+                    break
+                # video files are read at their frame rate, a camera blocks in read until its next frame
+                next_read = max(next_read + reader['interval'], time.monotonic())
+                success, frame = capture.read()
+                if not success:
+                    # a lost stream is restarted by the watchdog
+                    time.sleep(READ_RETRY_INTERVAL)
+                    continue
+                with self.lock:
+                    delivering = self.latest is not None
+                    self.latest = (reader, frame)
+                if not delivering:
+                    try:
+                        self.frame_read.emit()
+                    except RuntimeError:
+                        # the tile source was deleted without being stopped (e.g. at exit), nobody reads the frames
+                        break
+                time.sleep(max(next_read - time.monotonic(), 0))
+        finally:
+            capture.release()
+
+    def __deliver(self):
+        with self.lock:
+            latest, self.latest = self.latest, None
+        if latest is not None and latest[0] is self.reader:
+            self.__show(latest[1])
+
+    def __show(self, image):
+        self.model_apps.image = image
+        # the tiles render the original frames themselves, so the result of ModelApps is the original frame
+        self.model_apps.signal_image_original.emit(image)
+        self.model_apps.image_result.emit(image)
@@ -57,6 +57,17 @@ class Ui_Main(object):
         self.capturedButton.setMinimumSize(QtCore.QSize(150, 20))
         self.capturedButton.setObjectName("capturedButton")
         self.horizontalLayout_13.addWidget(self.capturedButton)
+        self.layoutComboBox = QtWidgets.QComboBox(parent=self.toolBox)
+        self.layoutComboBox.setMinimumSize(QtCore.QSize(150, 20))
+        self.layoutComboBox.setObjectName("layoutComboBox")
+        self.layoutComboBox.addItem("")
+        self.layoutComboBox.addItem("")
+        self.layoutComboBox.addItem("")
+        self.horizontalLayout_13.addWidget(self.layoutComboBox)
+        self.windowButton = QtWidgets.QPushButton(parent=self.toolBox)
+        self.windowButton.setMinimumSize(QtCore.QSize(150, 20))
+        self.windowButton.setObjectName("windowButton")
+        self.horizontalLayout_13.addWidget(self.windowButton)
         spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
         self.horizontalLayout_13.addItem(spacerItem)
         self.verticalLayout_4.addWidget(self.toolBox)
@@ -73,6 +84,7 @@ class Ui_Main(object):
         self.horizontalLayout.addWidget(self.verticalFrame)
 
         self.retranslateUi(Main)
+        self.layoutComboBox.setCurrentIndex(1)
         QtCore.QMetaObject.connectSlotsByName(Main)
 
     def retranslateUi(self, Main):
@@ -83,3 +95,7 @@ class Ui_Main(object):
         self.parameterButton.setText(_translate("Main", "Parameter"))
         self.recordedButton.setText(_translate("Main", "Recorded"))
         self.capturedButton.setText(_translate("Main", "Captured"))
+        self.layoutComboBox.setItemText(0, _translate("Main", "1x1"))
+        self.layoutComboBox.setItemText(1, _translate("Main", "2x4"))
+        self.layoutComboBox.setItemText(2, _translate("Main", "3x4"))
+        self.windowButton.setText(_translate("Main", "New Window"))
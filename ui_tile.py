@@ -70,12 +70,20 @@ class Ui_Tile(object):
         self.recordButton.setIcon(icon2)
         self.recordButton.setObjectName("recordButton")
         self.horizontalLayout_3.addWidget(self.recordButton)
+        self.fullscreenButton = QtWidgets.QPushButton(parent=self.frame)
+        self.fullscreenButton.setMaximumSize(QtCore.QSize(30, 16777215))
+        self.fullscreenButton.setText("")
+        icon3 = QtGui.QIcon()
+        icon3.addPixmap(QtGui.QPixmap(":/icon/fullscreen.png"), QtGui.QIcon.Mode.Normal, QtGui.QIcon.State.Off)
+        self.fullscreenButton.setIcon(icon3)
+        self.fullscreenButton.setObjectName("fullscreenButton")
+        self.horizontalLayout_3.addWidget(self.fullscreenButton)
         self.pushButton = QtWidgets.QPushButton(parent=self.frame)
         self.pushButton.setMaximumSize(QtCore.QSize(30, 16777215))
         self.pushButton.setText("")
-        icon3 = QtGui.QIcon()
-        icon3.addPixmap(QtGui.QPixmap(":/icon/close.png"), QtGui.QIcon.Mode.Normal, QtGui.QIcon.State.Off)
-        self.pushButton.setIcon(icon3)
+        icon4 = QtGui.QIcon()
+        icon4.addPixmap(QtGui.QPixmap(":/icon/close.png"), QtGui.QIcon.Mode.Normal, QtGui.QIcon.State.Off)
+        self.pushButton.setIcon(icon4)
         self.pushButton.setObjectName("pushButton")
         self.horizontalLayout_3.addWidget(self.pushButton)
         self.verticalLayout.addWidget(self.frame)
@@ -0,0 +1,327 @@
+import time
+from PyQt6 import QtCore, QtGui, QtWidgets
+import numpy as np
+import cv2
+from .anypoint import MapCache, MapWorker
+
+# degrees per click of a pan button, or per auto repeat while it is held down
+PAN_STEP = 2
+# auto repeat interval of the held down pan buttons, about the display rate
+PAN_REPEAT_INTERVAL = 33
+# the mouse moves are handled at most every MOUSE_INTERVAL ms, the drag is over after MOUSE_SETTLE ms without moves
+MOUSE_INTERVAL = 33
+MOUSE_SETTLE = 150
+# points per side of the polygon of the view drawn on the original image
+POLYGON_SIDE_POINTS = 32
+# frame rate of the setup dialog preview, whatever the rate of the source
+PREVIEW_FPS = 15
+
+
+# where the pixmap of the label is drawn, None without pixmap
+def pixmap_rect(label):
+    pixmap = label.pixmap()
+    if pixmap is None or pixmap.isNull():
+        return None
+    return QtWidgets.QStyle.alignedRect(label.layoutDirection(), label.alignment(), pixmap.size(), label.contentsRect())
+
+
+# the anypoint view being picked in the setup dialog, rendered from the original frames of the tile source
+# a new view is shown right away with preview maps made at the render width while a MapWorker computes its exact
+# maps, so that panning, tilting and zooming never wait for moildev: the preview maps come from the lens model of
+# angle_lookup (see AngleLookup.anypoint_maps), or without it from MapCache.preview or the maps of the previous view
+# while previewing (a mouse drag) only preview maps are made, the exact maps of the view are computed once it settled
+# the maps of the views passed through are kept in a cache and worker of the picker, so that they never evict the
+# maps of the tiles from tile_maps (the MapCache of the tiles, only read for the views the tiles already have); the
+# picker keeps the exact maps of one view, the last one computed
+class ViewPicker(QtCore.QObject):
+    # the view rendered from the last original frame
+    rendered = QtCore.pyqtSignal(object)
+    view_changed = QtCore.pyqtSignal(object)
+    # the outline of the view in the original image, as an array of (x, y) points
+    polygon_changed = QtCore.pyqtSignal(object)
+
+    def __init__(self, tile_maps, moildev, camera_key, view, width=300, angle_lookup=None):
+        super().__init__()
+        self.tile_maps = tile_maps
+        self.map_cache = MapCache()
+        self.map_worker = MapWorker(self.map_cache)
+        self.moildev = moildev
+        self.camera_key = camera_key
+        self.angle_lookup = angle_lookup
+        self.view = dict(view)
+        self.width = width
+        # while previewing (e.g. during a mouse drag) the view is rendered at half the width
+        self.previewing = False
+        self.frame = None
+        self.maps = None
+        # the maps rendered with when they are preview ones, None when they are exact
+        self.preview = None
+        # the view whose exact maps are in map_cache
+        self.computed_view = None
+
+        self.map_worker.maps_ready.connect(self.__maps_ready)
+        self.__update_maps()
+
+    # the picker is done, its maps are freed
+    def close(self):
+        self.map_worker.maps_ready.disconnect(self.__maps_ready)
+        self.map_worker.shutdown()
+        self.map_cache.clear()
+
+    # bytes of the maps of the picker, exact and preview ones
+    def memory_usage(self):
+        preview_nbytes = sum(m.nbytes for m in self.preview) if self.preview is not None else 0
+        return self.map_cache.memory_usage() + self.map_cache.memory_usage(derived=True) + preview_nbytes
+
+    def set_frame(self, image):
+        if image is None:
+            return
+        self.frame = image
+        self.render()
+
+    def set_view(self, **changes):
+        view = dict(self.view, **changes)
+        if view['mode'] == 1:
+            view['alpha'] = min(max(view['alpha'], 0), 110)
+            view['beta'] = view['beta'] % 360
+        else:
+            view['alpha'] = min(max(view['alpha'], -110), 110)
+            view['beta'] = min(max(view['beta'], -110), 110)
+        view['zoom'] = max(view['zoom'], 1)
+        if view == self.view:
+            return
+
+        self.view = view
+        self.view_changed.emit(dict(view))
+        self.__update_maps()
+        self.render()
+
+    def pan(self, alpha_step=0, beta_step=0):
+        self.set_view(alpha=self.view['alpha'] + alpha_step, beta=self.view['beta'] + beta_step)
+
+    def center(self):
+        self.set_view(alpha=0, beta=0)
+
+    def set_previewing(self, previewing):
+        if previewing == self.previewing:
+            return
+        self.previewing = previewing
+        self.__update_maps()
+        self.render()
+
+    def render_width(self):
+        return self.width // 2 if self.previewing else self.width
+
+    def render(self):
+        if self.frame is None or self.maps is None:
+            return
+        self.rendered.emit(cv2.remap(self.frame, self.maps[0], self.maps[1], cv2.INTER_LINEAR))
+
+    # the edges of the maps are where the border of the view is in the original image
+    def polygon(self):
+        if self.maps is None:
+            return None
+        map_x, map_y = np.asarray(self.maps[0]), np.asarray(self.maps[1])
+        step_x = max(map_x.shape[1] // POLYGON_SIDE_POINTS, 1)
+        step_y = max(map_x.shape[0] // POLYGON_SIDE_POINTS, 1)
+        edges = (
+            (0, slice(None, None, step_x)), (slice(None, None, step_y), -1),
+            (-1, slice(None, None, -step_x)), (slice(None, None, -step_y), 0),
+        )
+        return np.concatenate([np.stack([map_x[edge], map_y[edge]], axis=-1) for edge in edges])
+
+    def __update_maps(self):
+        maps = self.__find_maps()
+        if maps is None:
+            maps = self.preview = self.__preview_maps()
+            if not self.previewing:
+                self.map_worker.request(self.moildev, self.camera_key, self.view, self.render_width())
+        else:
+            self.preview = None
+        if maps is not None and maps is not self.maps:
+            self.maps = maps
+            self.polygon_changed.emit(self.polygon())
+
+    def __find_maps(self):
+        maps = self.tile_maps.find(self.camera_key, self.view, self.render_width())
+        if maps is None:
+            maps = self.map_cache.find(self.camera_key, self.view, self.render_width())
+        return maps
+
+    def __preview_maps(self):
+        if self.angle_lookup is not None:
+            return self.angle_lookup.anypoint_maps(self.view, self.render_width())
+        return self.map_cache.preview(self.moildev, self.camera_key, self.view, self.render_width())
+
+    # the exact maps replace the preview ones, if the view is still the same
+    def __maps_ready(self, view):
+        if self.computed_view is not None and self.computed_view != view:
+            self.map_cache.discard(self.camera_key, self.computed_view)
+        self.computed_view = view
+        if view != self.view:
+            return
+        maps = self.__find_maps()
+        if maps is not None and maps is not self.maps:
+            self.maps = maps
+            self.preview = None
+            self.polygon_changed.emit(self.polygon())
+        self.render()
+
+
+# the frames of the tile source as the setup dialog uses them, taken from the signals the source already emits
+# (no other decoding) and limited to max_fps: the ViewPicker renders the picked view from them, and the original
+# image is scaled down once to the label width
+class PreviewFeed(QtCore.QObject):
+    # the original image at the label width
+    original = QtCore.pyqtSignal(object)
+
+    def __init__(self, view_picker, width=300, max_fps=PREVIEW_FPS):
+        super().__init__()
+        self.view_picker = view_picker
+        self.width = width
+        self.interval = 1 / max_fps
+        self.last_frame = None
+
+    def frame(self, image):
+        if image is None:
+            return
+        now = time.monotonic()
+        if self.last_frame is not None and now - self.last_frame < self.interval:
+            return
+        self.last_frame = now
+
+        self.view_picker.set_frame(image)
+        height = max(round(image.shape[0] * self.width / image.shape[1]), 1)
+        self.original.emit(cv2.resize(image, (self.width, height), interpolation=cv2.INTER_AREA))
+
+
+# picks the view of a ViewPicker with the mouse on the label showing the original image
+# a drag can move faster than the views can be rendered, so the mouse events only keep the latest position,
+# which is handled at most every interval ms, with a low resolution preview until the mouse stopped for settle ms
+class MousePicker(QtCore.QObject):
+    # [alpha, beta] of the picked position like ModelApps.alpha_beta, [None, None] outside of the lens
+    alpha_beta = QtCore.pyqtSignal(object)
+    # the picked position in the original image
+    position = QtCore.pyqtSignal(int, int)
+
+    # angle_lookup is the AngleLookup of the camera
+    def __init__(self, label, view_picker, angle_lookup, interval=MOUSE_INTERVAL, settle=MOUSE_SETTLE):
+        super().__init__()
+        self.label = label
+        self.view_picker = view_picker
+        self.angle_lookup = angle_lookup
+        self.latest = None
+
+        self.move_timer = QtCore.QTimer(self)
+        self.move_timer.setSingleShot(True)
+        self.move_timer.setInterval(interval)
+        self.move_timer.timeout.connect(self.__pick)
+        self.settle_timer = QtCore.QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(settle)
+        self.settle_timer.timeout.connect(self.__settle)
+
+    # takes over the mouse events of the label
+    def attach(self):
+        self.label.mousePressEvent = self.move
+        self.label.mouseMoveEvent = self.move
+        self.label.mouseReleaseEvent = self.release
+        self.label.leaveEvent = self.release
+
+    # gives the mouse events back to the label
+    def detach(self):
+        for event in ('mousePressEvent', 'mouseMoveEvent', 'mouseReleaseEvent', 'leaveEvent'):
+            self.label.__dict__.pop(event, None)
+        self.move_timer.stop()
+        self.settle_timer.stop()
+
+    def move(self, event):
+        self.latest = event.position().toPoint()
+        self.view_picker.set_previewing(True)
+        if not self.move_timer.isActive():
+            self.move_timer.start()
+        self.settle_timer.start()
+
+    def release(self, event):
+        if self.latest is not None:
+            self.__pick()
+        self.move_timer.stop()
+        self.settle_timer.stop()
+        self.__settle()
+
+    # the position on the label, in the original image
+    def image_position(self, point):
+        rect = pixmap_rect(self.label)
+        frame = self.view_picker.frame
+        if rect is None or frame is None or not rect.contains(point):
+            return None
+        return (
+            (point.x() - rect.x()) * frame.shape[1] // rect.width(),
+            (point.y() - rect.y()) * frame.shape[0] // rect.height(),
+        )
+
+    def __pick(self):
+        point, self.latest = self.latest, None
+        position = self.image_position(point) if point is not None else None
+        if position is None:
+            return
+        alpha, beta = self.angle_lookup.point_alpha_beta(position[0], position[1], self.view_picker.view['mode'])
+        self.position.emit(*position)
+        self.alpha_beta.emit([alpha, beta])
+        if alpha is not None:
+            self.view_picker.set_view(alpha=alpha, beta=beta)
+
+    def __settle(self):
+        self.view_picker.set_previewing(False)
+
+
+# the polygon of the picked view, over the label showing the original image
+# it is drawn once into a pixmap of the label size when the view (or the label) changes, so the frames only cost
+# one drawPixmap of the overlay, and the original frames do not have to be copied to draw on them
+class PolygonOverlay(QtWidgets.QWidget):
+    def __init__(self, label):
+        super().__init__(label)
+        self.label = label
+        self.polygon = None
+        self.image_size = None
+        self.overlay = None
+        self.overlay_rect = None
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setGeometry(label.rect())
+        label.installEventFilter(self)
+        self.show()
+
+    # polygon in the coordinates of the original image of image_size (width, height)
+    def set_polygon(self, polygon, image_size):
+        self.polygon = polygon
+        self.image_size = image_size
+        self.overlay = None
+        self.update()
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Type.Resize:
+            self.setGeometry(self.label.rect())
+        return False
+
+    def paintEvent(self, event):
+        rect = pixmap_rect(self.label)
+        if self.polygon is None or rect is None:
+            return
+        if self.overlay is None or rect != self.overlay_rect:
+            self.__draw_overlay(rect)
+        QtGui.QPainter(self).drawPixmap(0, 0, self.overlay)
+
+    def __draw_overlay(self, rect):
+        self.overlay = QtGui.QPixmap(self.size())
+        self.overlay.fill(QtCore.Qt.GlobalColor.transparent)
+        self.overlay_rect = rect
+        scale_x = rect.width() / self.image_size[0]
+        scale_y = rect.height() / self.image_size[1]
+        polygon = QtGui.QPolygonF([
+            QtCore.QPointF(rect.x() + x * scale_x, rect.y() + y * scale_y) for x, y in self.polygon
+        ])
+        painter = QtGui.QPainter(self.overlay)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.setPen(QtGui.QPen(QtGui.QColor(0, 255, 0), 2))
+        painter.drawPolygon(polygon)
+        painter.end()
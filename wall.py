@@ -0,0 +1,98 @@
+from PyQt6 import QtWidgets, QtCore
+from .QTileLayout6 import QTileLayout
+
+VERTICAL_SPAN = 200
+HORIZONTAL_SPAN = 300
+SPACING = 5
+# ms without moving or resizing a wall window before it is placed
+PLACE_SETTLE_DELAY = 500
+
+
+# a tile layout like the one of the main wall
+def new_tile_layout(row_number, column_number):
+    tile_layout = QTileLayout(
+        rowNumber=row_number,
+        columnNumber=column_number,
+        verticalSpan=VERTICAL_SPAN,
+        horizontalSpan=HORIZONTAL_SPAN,
+        verticalSpacing=SPACING,
+        horizontalSpacing=SPACING,
+    )
+
+    tile_layout.acceptDragAndDrop(True)
+    tile_layout.acceptResizing(True)
+    tile_layout.setCursorIdle(QtCore.Qt.CursorShape.ArrowCursor)
+    tile_layout.setCursorGrab(QtCore.Qt.CursorShape.OpenHandCursor)
+    tile_layout.setCursorResizeHorizontal(QtCore.Qt.CursorShape.SizeHorCursor)
+    tile_layout.setCursorResizeVertical(QtCore.Qt.CursorShape.SizeVerCursor)
+    tile_layout.setColorIdle((240, 240, 240))
+    tile_layout.setColorResize((211, 211, 211))
+    tile_layout.setColorDragAndDrop((211, 211, 211))
+    tile_layout.setColorEmptyCheck((150, 150, 150))
+    tile_layout.activateFocus(False)
+    # only the cells around the visible part of the scroll area are real widgets
+    tile_layout.setVirtualized(True)
+    return tile_layout
+
+
+# one more wall in its own top level window, e.g. on another monitor
+# its tile layout is linked to the other walls, so a tile dragged there is the same widget with the same source:
+# the stream is neither opened again nor decoded twice
+class WallWindow(QtWidgets.QWidget):
+    closed = QtCore.pyqtSignal(object)
+    # the window was moved or resized (once it settled), e.g. to another screen
+    placed = QtCore.pyqtSignal()
+
+    # the window is deleted with its parent (the main wall)
+    def __init__(self, row_number, column_number, parent=None):
+        super().__init__(parent, QtCore.Qt.WindowType.Window)
+        self.setWindowTitle('Surveillance')
+        self.resize(1066, 641)
+
+        self.scroll_area = QtWidgets.QScrollArea(self)
+        self.scroll_area.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.scroll_area_widget_contents = QtWidgets.QWidget()
+        self.scroll_area.setWidget(self.scroll_area_widget_contents)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.scroll_area)
+
+        self.tile_layout = new_tile_layout(row_number, column_number)
+        self.scroll_area_widget_contents.setLayout(self.tile_layout)
+        self.scroll_area.resizeEvent = self.__tileLayoutResize
+        self.tile_layout.globalSizeSettled.connect(self.__tileLayoutViewport)
+        self.scroll_area.horizontalScrollBar().valueChanged.connect(self.__tileLayoutViewport)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.__tileLayoutViewport)
+
+        self.place_timer = QtCore.QTimer(self)
+        self.place_timer.setSingleShot(True)
+        self.place_timer.setInterval(PLACE_SETTLE_DELAY)
+        self.place_timer.timeout.connect(self.placed)
+
+    def closeEvent(self, event):
+        self.place_timer.stop()
+        self.closed.emit(self)
+        super().closeEvent(event)
+
+    def moveEvent(self, event):
+        self.place_timer.start()
+        super().moveEvent(event)
+
+    def resizeEvent(self, event):
+        self.place_timer.start()
+        super().resizeEvent(event)
+
+    # the tile layout coalesces these into one relayout per frame
+    def __tileLayoutResize(self, a0):
+        self.tile_layout.updateGlobalSize(a0)
+
+    # tell the virtualized tile layout which part of it is visible
+    def __tileLayoutViewport(self, *args):
+        self.tile_layout.setViewport(QtCore.QRect(
+            self.scroll_area.horizontalScrollBar().value(),
+            self.scroll_area.verticalScrollBar().value(),
+            self.scroll_area.viewport().width(),
+            self.scroll_area.viewport().height(),
+        ))
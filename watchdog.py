@@ -0,0 +1,89 @@
+import time
+from PyQt6 import QtCore
+
+
+# keeps the last frame time and the frame rate of every watched stream and checks them every check_interval seconds
+# a stream is stalled when no frame came for stall_timeout seconds, degraded when its frame rate is under min_fps
+# a stream is only checked once it gave two frames, so a still image (one frame) is never taken for a stalled stream
+# stalled streams get restarted, but not more than max_restarts times in restart_window seconds, after that it gives up
+class StreamWatchdog(QtCore.QObject):
+    STREAMING = 'streaming'
+    DEGRADED = 'degraded'
+    STALLED = 'stalled'
+    FAILED = 'failed'
+
+    state_changed = QtCore.pyqtSignal(object, str)
+    # the stream has to be restarted, the watchdog waits for its frames again
+    restart = QtCore.pyqtSignal(object)
+
+    def __init__(self, stall_timeout=5.0, min_fps=2.0, max_restarts=5, restart_window=300.0, check_interval=1.0):
+        super().__init__()
+        self.stall_timeout = stall_timeout
+        self.min_fps = min_fps
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        # token -> {'last_frame', 'fps', 'frames', 'state', 'restarts'}
+        self.streams = {}
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(int(check_interval * 1000))
+        self.timer.timeout.connect(self.check)
+        self.timer.start()
+
+    # returns the stats of the stream, they are updated in place
+    def watch(self, token):
+        stream = self.streams.get(token)
+        self.streams[token] = {
+            'last_frame': None, 'fps': 0.0, 'frames': 0, 'state': self.STREAMING,
+            'restarts': stream['restarts'] if stream is not None else [],
+        }
+        return self.streams[token]
+
+    def unwatch(self, token):
+        self.streams.pop(token, None)
+
+    def stats(self, token):
+        return self.streams.get(token)
+
+    # to be called for every frame of the stream
+    def frame(self, token):
+        stream = self.streams.get(token)
+        if stream is None:
+            return
+        now = time.monotonic()
+        if stream['last_frame'] is not None:
+            interval = max(now - stream['last_frame'], 1e-3)
+            # smoothed so that one late frame does not make the stream degraded
+            stream['fps'] = 1 / interval if stream['frames'] < 2 else 0.9 * stream['fps'] + 0.1 / interval
+        stream['last_frame'] = now
+        stream['frames'] += 1
+        if stream['state'] in (self.STALLED, self.FAILED):
+            self.__set_state(token, stream, self.STREAMING)
+
+    def check(self):
+        now = time.monotonic()
+        for token, stream in list(self.streams.items()):
+            if stream['frames'] < 2 or stream['state'] in (self.STALLED, self.FAILED):
+                continue
+            if now - stream['last_frame'] > self.stall_timeout:
+                self.__stalled(token, stream, now)
+            elif stream['fps'] < self.min_fps:
+                self.__set_state(token, stream, self.DEGRADED)
+            else:
+                self.__set_state(token, stream, self.STREAMING)
+
+    def __stalled(self, token, stream, now):
+        stream['restarts'] = [t for t in stream['restarts'] if now - t < self.restart_window]
+        if len(stream['restarts']) >= self.max_restarts:
+            self.__set_state(token, stream, self.FAILED)
+            return
+        stream['restarts'].append(now)
+        self.__set_state(token, stream, self.STALLED)
+        # the restarted stream starts over, including the check for still images
+        stream['last_frame'], stream['fps'], stream['frames'] = None, 0.0, 0
+        self.restart.emit(token)
+
+    def __set_state(self, token, stream, state):
+        if stream['state'] != state:
+            stream['state'] = state
+            self.state_changed.emit(token, state)